@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.urlresolvers import reverse
 from django.contrib.auth import get_user_model
 from oauth2_provider.models import get_access_token_model, get_refresh_token_model
@@ -159,3 +159,54 @@ class BlenderIdAddonSupportTest(TestCase):
             'host_label': 'unit testing stuff',
         }, HTTP_AUTHORIZATION=f'Bearer {dbtoken.token}')
         self.assertEqual(201, resp.status_code)
+
+    @override_settings(BLENDER_ID_ADDON_SELF_DESCRIBING_TOKENS=True)
+    def test_self_describing_token(self):
+        dbtoken = self.test_verify_identity_happy()
+        self.assertTrue(dbtoken.token.startswith(f'{dbtoken.id}.'))
+
+        url = reverse('addon_support:validate_token')
+        resp = self.client.post(url, {'token': dbtoken.token})
+        self.assertEquals(200, resp.status_code)
+        self.assertEquals(dbtoken.user.id, resp.json()['user']['id'])
+
+        # The token can also be used as bearer token.
+        url = reverse('addon_support:subclient_create_token')
+        resp = self.client.post(url, {
+            'subclient_id': 'PILLAR',
+            'host_label': 'unit testing stuff',
+        }, HTTP_AUTHORIZATION=f'Bearer {dbtoken.token}')
+        self.assertEqual(201, resp.status_code)
+
+    @override_settings(BLENDER_ID_ADDON_SELF_DESCRIBING_TOKENS=True)
+    def test_self_describing_token_bad_secret(self):
+        dbtoken = self.test_verify_identity_happy()
+
+        url = reverse('addon_support:validate_token')
+        resp = self.client.post(url, {'token': f'{dbtoken.id}.wrong-secret'})
+        self.assertEquals(403, resp.status_code)
+        self.assertEquals('fail', resp.json()['status'])
+
+    @override_settings(BLENDER_ID_TOKEN_SIGNING_KEYS={'k1': 'signing-secret'},
+                       BLENDER_ID_TOKEN_SIGNING_KEY_ID='k1')
+    def test_signed_token(self):
+        from bid_main import signed_tokens
+
+        url = reverse('addon_support:identify')
+        resp = self.client.post(url, {
+            'email': 'sybren@example.com',
+            'password': 'jemoeder',
+            'host_label': 'unittest',
+            'token_format': 'signed',
+        })
+        self.assertEquals(200, resp.status_code)
+        signed = resp.json()['data']['oauth_token']['access_token']
+
+        claims = signed_tokens.verify(signed)
+        dbtoken = AccessToken.objects.get(id=int(claims['jti']))
+        self.assertEquals(dbtoken.user.id, claims['sub'])
+
+        url = reverse('addon_support:validate_token')
+        resp = self.client.post(url, {'token': signed})
+        self.assertEquals(200, resp.status_code)
+        self.assertEquals(dbtoken.user.id, resp.json()['user']['id'])
@@ -17,6 +17,8 @@ from oauth2_provider.views.generic import ProtectedResourceView
 
 import oauthlib.common
 
+from bid_main import signed_tokens, tokens, token_usage
+
 # Braces is a dependency of oauth2_provider.
 from braces.views import CsrfExemptMixin
 
@@ -64,15 +66,14 @@ class SpecialSnowflakeMixin:
             AccessToken, RefreshToken):
         """Creates an OAuth token and stores it in the database."""
         expires = timezone.now() + datetime.timedelta(days=self.expires_days)
-        token = AccessToken(
+        token = tokens.create_access_token(
+            self_describing=settings.BLENDER_ID_ADDON_SELF_DESCRIBING_TOKENS,
             user=user,
-            token=oauthlib.common.generate_token(),
             application=self.application,
             expires=expires,
             scope=self.token_scopes,
             host_label=host_label,
             subclient=subclient or '')
-        token.save()
 
         refresh_token = RefreshToken(
             user=user,
@@ -84,8 +85,9 @@ class SpecialSnowflakeMixin:
 
     def validate_oauth_token(self, user_id: int, access_token: str = '', subclient: str = '') \
             -> typing.Optional[AccessToken]:
+        queryset = AccessToken.objects.filter(subclient=subclient or '')
         try:
-            token = AccessToken.objects.get(token=access_token, subclient=subclient or '')
+            token = tokens.find_access_token(access_token, queryset)
         except AccessToken.DoesNotExist:
             self.log.debug('Token not found in database.')
             return None
@@ -99,8 +101,23 @@ class SpecialSnowflakeMixin:
             self.log.debug('Token is found but not valid.')
             return None
 
+        token_usage.record_use(token)
         return token
 
+    def token_for_client(self, token: AccessToken) -> str:
+        """Returns the token string to send to the client.
+
+        Clients can opt in to receiving a signed token by passing
+        token_format=signed in the POST request. Such a token can be
+        verified by other services without contacting Blender ID.
+        """
+        if self.request.POST.get('token_format') != 'signed':
+            return token.token
+        if not signed_tokens.is_enabled():
+            self.log.warning('Signed token requested, but no signing key is configured.')
+            return token.token
+        return signed_tokens.sign_access_token(token)
+
     def fmt_expires(self, expiry: datetime.datetime) -> str:
         """Formats the expiry datetime of an access token."""
 
@@ -144,7 +161,7 @@ class VerifyIdentityView(SpecialSnowflakeMixin, CsrfExemptMixin, View):
             'data': {
                 'user_id': user.id,
                 'oauth_token': {
-                    'access_token': token.token,
+                    'access_token': self.token_for_client(token),
                     'refresh_token': refresh_token.token,
                     'expires': self.fmt_expires(token.expires),
                 },
@@ -231,7 +248,7 @@ class SubclientCreateToken(SpecialSnowflakeMixin, CsrfExemptMixin, LoginRequired
         return JsonResponse({
             'status': 'success',
             'data': {
-                'token': scst.token,
+                'token': self.token_for_client(scst),
                 'expires': self.fmt_expires(scst.expires),
             }
         }, status=201)
@@ -0,0 +1,16 @@
+"""
+Decorators for API views.
+"""
+
+from oauth2_provider import decorators
+from oauth2_provider.settings import oauth2_settings
+
+
+def protected_resource(scopes=None):
+    """Like oauth2_provider.decorators.protected_resource, but uses our own validator.
+
+    The decorator from oauth2_provider always uses its own OAuth2Validator
+    class, and ignores the OAUTH2_VALIDATOR_CLASS setting.
+    """
+    return decorators.protected_resource(scopes=scopes,
+                                         validator_cls=oauth2_settings.OAUTH2_VALIDATOR_CLASS)
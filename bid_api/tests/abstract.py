@@ -16,7 +16,8 @@ class AbstractAPITest(TestCase):
     access_token_scope = ''
 
     @classmethod
-    def setUpClass(cls):
+    def setUpTestData(cls):
+        super().setUpTestData()
         cls.user = UserModel.objects.create_user('test@user.com', '123456')
         cls.application = Application.objects.create(
             name="test_client_credentials_app",
@@ -31,24 +32,6 @@ class AbstractAPITest(TestCase):
             token='secret-access-token-key',
             application=cls.application
         )
-        super().setUpClass()
-
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-
-        try:
-            cls.access_token.delete()
-        except AttributeError:
-            pass
-        try:
-            cls.application.delete()
-        except AttributeError:
-            pass
-        try:
-            cls.user.delete()
-        except AttributeError:
-            pass
 
     def authed_post(self, path: str, *, access_token='', **kwargs) -> HttpResponse:
         if not access_token:
@@ -187,3 +187,26 @@ class BadgerApiRevokeTest(BadgerBaseTest):
     def test_unknown_target_user(self):
         response = self.post('bid_api:badger_revoke', 'badge1', 'unknown@address')
         self.assertEqual(response.status_code, 422)
+
+
+class BadgerDelegationTest(BadgerBaseTest):
+    def setUp(self):
+        super().setUp()
+
+        # Managing the badger role delegates managing the roles it manages.
+        self.role_badger_admin = Role.objects.create(name='badger-admin')
+        self.role_badger_admin.may_manage_roles.add(self.role_badger)
+        self.user.roles.add(self.role_badger_admin)
+
+        self.target_user = UserModel.objects.create_user('target@user.com', '123456')
+
+    def test_grant_delegated_badge(self):
+        response = self.post('bid_api:badger_grant', 'badge1', self.target_user.email)
+        self.assertEqual(response.status_code, 200, f'response: {response}')
+        self.target_user.refresh_from_db()
+        self.assertEqual({self.role_badge1.id}, self.target_user.get_role_ids())
+
+    def test_delegation_removed(self):
+        self.role_badger.may_manage_roles.remove(self.role_badge1)
+        response = self.post('bid_api:badger_grant', 'badge1', self.target_user.email)
+        self.assertEqual(response.status_code, 403)
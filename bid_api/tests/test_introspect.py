@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.core.urlresolvers import reverse
+from django.utils import timezone
+
+from .abstract import AbstractAPITest, AccessToken
+
+
+class IntrospectTest(AbstractAPITest):
+    access_token_scope = 'introspection'
+
+    def introspect(self, token: str):
+        return self.authed_post(reverse('bid_api:introspect'), data={'token': token})
+
+    def test_active_token(self):
+        token = AccessToken.objects.create(
+            user=self.user,
+            scope='email badger',
+            expires=timezone.now() + timedelta(seconds=100),
+            token='token-to-introspect',
+            application=self.application
+        )
+
+        response = self.introspect(token.token)
+        self.assertEqual(200, response.status_code)
+        payload = response.json()
+        self.assertTrue(payload['active'])
+        self.assertEqual('email badger', payload['scope'])
+        self.assertEqual(self.user.id, payload['user_id'])
+        self.assertEqual(self.application.client_id, payload['client_id'])
+
+        # The response may be cached for the remaining lifetime of the token.
+        cache_control = response['Cache-Control']
+        self.assertIn('private', cache_control)
+        max_age = int(cache_control.split('max-age=')[1].split(',')[0])
+        self.assertTrue(0 < max_age <= 100, f'unexpected max-age in {cache_control!r}')
+
+    def test_inactive_token(self):
+        token = AccessToken.objects.create(
+            user=self.user,
+            scope='email',
+            expires=timezone.now() - timedelta(seconds=100),
+            token='expired-token',
+            application=self.application
+        )
+        response = self.introspect(token.token)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'active': False}, response.json())
+
+        response = self.introspect('nonexistant-token')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'active': False}, response.json())
+
+    def test_wrong_scope(self):
+        wrong_token = AccessToken.objects.create(
+            user=self.user,
+            scope='email',
+            expires=timezone.now() + timedelta(seconds=300),
+            token='token-with-wrong-scope',
+            application=self.application
+        )
+        response = self.authed_post(reverse('bid_api:introspect'),
+                                    data={'token': wrong_token.token},
+                                    access_token=wrong_token.token)
+        self.assertEqual(403, response.status_code)
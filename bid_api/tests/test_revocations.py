@@ -0,0 +1,89 @@
+from datetime import timedelta
+import hashlib
+
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from django.utils import timezone
+
+from bid_main import tokens as bid_tokens
+from .abstract import AbstractAPITest, AccessToken, UserModel
+
+
+@override_settings(BLENDER_ID_REVOCATIONS_SETTLE_SECONDS=0)
+class RevocationsTest(AbstractAPITest):
+    access_token_scope = 'revocations'
+
+    def create_token(self, token: str, *, user=None, expires_in=300) -> AccessToken:
+        return AccessToken.objects.create(
+            user=user or self.user,
+            scope='email',
+            expires=timezone.now() + timedelta(seconds=expires_in),
+            token=token,
+            application=self.application
+        )
+
+    def get(self, **params) -> dict:
+        response = self.authed_get(reverse('bid_api:revocations'), data=params)
+        self.assertEqual(200, response.status_code, f'response: {response}')
+        return response.json()
+
+    def test_revoke_and_poll(self):
+        self.assertEqual({'revocations': [], 'cursor': 0, 'has_more': False}, self.get())
+
+        tokens = [self.create_token(f'revoke-me-{i}') for i in range(3)]
+        token_ids = [token.id for token in tokens]
+        for token in tokens:
+            token.revoke()
+
+        payload = self.get(limit=2)
+        self.assertTrue(payload['has_more'])
+        self.assertEqual(token_ids[:2],
+                         [r['token_id'] for r in payload['revocations']])
+        self.assertEqual(hashlib.sha256(b'revoke-me-0').hexdigest(),
+                         payload['revocations'][0]['token_digest'])
+
+        payload = self.get(after=payload['cursor'])
+        self.assertFalse(payload['has_more'])
+        self.assertEqual(token_ids[2:], [r['token_id'] for r in payload['revocations']])
+
+        # Nothing new since the last poll.
+        payload = self.get(after=payload['cursor'])
+        self.assertEqual([], payload['revocations'])
+
+    def test_expired_tokens_not_logged(self):
+        self.create_token('expired', expires_in=-5).delete()
+        self.assertEqual([], self.get()['revocations'])
+
+    def test_user_deactivation(self):
+        other_user = UserModel.objects.create_user('other@user.com', '123456')
+        token = self.create_token('of-other-user', user=other_user)
+
+        other_user.is_active = False
+        other_user.save()
+
+        self.assertFalse(AccessToken.objects.filter(id=token.id).exists())
+        self.assertEqual([token.id], [r['token_id'] for r in self.get()['revocations']])
+
+    def test_bad_cursor(self):
+        for after in ('abc', '-1', '99999999999999999999'):
+            response = self.authed_get(reverse('bid_api:revocations'), data={'after': after})
+            self.assertEqual(400, response.status_code, f'after: {after}')
+
+    @override_settings(BLENDER_ID_REVOCATIONS_SETTLE_SECONDS=60)
+    def test_settle(self):
+        self.create_token('too-recent').revoke()
+        self.assertEqual([], self.get()['revocations'])
+
+    def test_bulk_revocation(self):
+        tokens = [self.create_token(f'bulk-{i}') for i in range(3)]
+        self.create_token('bulk-expired', expires_in=-5)
+        queryset = AccessToken.objects.filter(token__startswith='bulk-')
+        self.assertEqual(4, bid_tokens.delete_access_tokens(queryset))
+        self.assertEqual([token.id for token in tokens],
+                         [r['token_id'] for r in self.get()['revocations']])
+
+    def test_user_deletion(self):
+        other_user = UserModel.objects.create_user('other@user.com', '123456')
+        token = self.create_token('of-deleted-user', user=other_user)
+        other_user.delete()
+        self.assertEqual([token.id], [r['token_id'] for r in self.get()['revocations']])
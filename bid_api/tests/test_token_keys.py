@@ -0,0 +1,86 @@
+from datetime import timedelta
+import base64
+
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from django.utils import timezone
+
+from bid_main import signed_tokens
+from .abstract import AbstractAPITest, AccessToken
+
+
+@override_settings(BLENDER_ID_TOKEN_SIGNING_KEYS={'2017-1': 'old-secret', '2017-2': 'new-secret'},
+                   BLENDER_ID_TOKEN_SIGNING_KEY_ID='2017-2')
+class SignedTokenTest(AbstractAPITest):
+    access_token_scope = 'tokenkeys'
+
+    def test_key_set(self):
+        response = self.authed_get(reverse('bid_api:token_keys'))
+        self.assertEqual(200, response.status_code)
+
+        keys = response.json()['keys']
+        self.assertEqual(['2017-1', '2017-2'], [key['kid'] for key in keys])
+        self.assertEqual(b'new-secret', base64.urlsafe_b64decode(keys[1]['k'] + '=='))
+
+    def test_key_set_wrong_scope(self):
+        wrong_token = AccessToken.objects.create(
+            user=self.user,
+            scope='email',
+            expires=timezone.now() + timedelta(seconds=300),
+            token='token-with-wrong-scope',
+            application=self.application
+        )
+        response = self.authed_get(reverse('bid_api:token_keys'), access_token=wrong_token.token)
+        self.assertEqual(403, response.status_code)
+
+    def test_sign_verify(self):
+        signed = signed_tokens.sign_access_token(self.access_token)
+        claims = signed_tokens.verify(signed)
+        self.assertEqual(str(self.access_token.id), claims['jti'])
+        self.assertEqual(self.user.id, claims['sub'])
+        self.assertEqual('tokenkeys', claims['scope'])
+
+        # Tampering with the claims should be detected.
+        header, _, signature = signed.split('.')
+        other = signed_tokens.sign({'jti': '1', 'exp': claims['exp']}).split('.')[1]
+        with self.assertRaises(signed_tokens.InvalidSignedToken):
+            signed_tokens.verify(f'{header}.{other}x.{signature}')
+
+        # Key IDs that are not strings are invalid, rather than causing a TypeError.
+        bad_header = signed_tokens._b64encode(b'{"alg":"HS256","kid":["2017-2"]}')
+        with self.assertRaises(signed_tokens.InvalidSignedToken):
+            signed_tokens.verify(f'{bad_header}.{signed.split(".", 1)[1]}')
+
+        # Tokens signed with an old key remain valid until that key is removed.
+        with self.settings(BLENDER_ID_TOKEN_SIGNING_KEY_ID='2017-1'):
+            old_signed = signed_tokens.sign_access_token(self.access_token)
+        signed_tokens.verify(old_signed)
+        with self.settings(BLENDER_ID_TOKEN_SIGNING_KEYS={'2017-2': 'new-secret'}):
+            with self.assertRaises(signed_tokens.InvalidSignedToken):
+                signed_tokens.verify(old_signed)
+
+    def test_signed_bearer_token(self):
+        db_token = AccessToken.objects.create(
+            user=self.user,
+            scope='tokenkeys',
+            expires=timezone.now() + timedelta(seconds=300),
+            token='token-to-sign',
+            application=self.application
+        )
+        signed = signed_tokens.sign_access_token(db_token)
+        response = self.authed_get(reverse('bid_api:token_keys'), access_token=signed)
+        self.assertEqual(200, response.status_code)
+
+        # Services know the signing key, but cannot forge tokens for other database tokens.
+        claims = signed_tokens.verify(signed)
+        forged = signed_tokens.sign({**claims, 'jti': str(self.access_token.id)})
+        response = self.authed_get(reverse('bid_api:token_keys'), access_token=forged)
+        self.assertEqual(403, response.status_code)
+        unbound = signed_tokens.sign({key: value for key, value in claims.items() if key != 'tkh'})
+        response = self.authed_get(reverse('bid_api:token_keys'), access_token=unbound)
+        self.assertEqual(403, response.status_code)
+
+        # Revoking the database token also revokes the signed token.
+        db_token.revoke()
+        response = self.authed_get(reverse('bid_api:token_keys'), access_token=signed)
+        self.assertEqual(403, response.status_code)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from django.utils import timezone
+
+from bid_main.models import Role
+from .abstract import AbstractAPITest, AccessToken, UserModel
+
+
+@override_settings(BLENDER_ID_USER_CHANGES_SETTLE_SECONDS=0)
+class UserChangesTest(AbstractAPITest):
+    access_token_scope = 'userchanges'
+
+    def setUp(self):
+        super().setUp()
+        self.start = self.get_all()['cursor']
+
+    def get(self, **params) -> dict:
+        response = self.authed_get(reverse('bid_api:user_changes'), data=params)
+        self.assertEqual(200, response.status_code, f'response: {response}')
+        return response.json()
+
+    def get_all(self) -> dict:
+        payload = self.get()
+        while payload['has_more']:
+            payload = self.get(after=payload['cursor'])
+        return payload
+
+    def test_changes(self):
+        self.assertEqual({'users': [], 'cursor': self.start, 'has_more': False},
+                         self.get(after=self.start))
+
+        users = [UserModel.objects.create_user(f'user{i}@example.com', full_name=f'User {i}')
+                 for i in range(3)]
+        payload = self.get(after=self.start, limit=2)
+        self.assertTrue(payload['has_more'])
+        self.assertEqual([users[0].id, users[1].id], [u['id'] for u in payload['users']])
+        self.assertEqual('User 0', payload['users'][0]['full_name'])
+        self.assertEqual('user0@example.com', payload['users'][0]['email'])
+
+        payload = self.get(after=payload['cursor'])
+        self.assertFalse(payload['has_more'])
+        self.assertEqual([users[2].id], [u['id'] for u in payload['users']])
+        cursor = payload['cursor']
+
+        # Profile changes and role changes both show up.
+        users[1].full_name = 'Changed'
+        users[1].save()
+        role = Role.objects.create(name='cloud_subscriber')
+        users[0].roles.add(role)
+
+        payload = self.get(after=cursor)
+        self.assertEqual([users[1].id, users[0].id], [u['id'] for u in payload['users']])
+        self.assertEqual('Changed', payload['users'][0]['full_name'])
+        self.assertEqual({'cloud_subscriber': True}, payload['users'][1]['roles'])
+
+    @override_settings(BLENDER_ID_USER_CHANGES_SETTLE_SECONDS=60)
+    def test_settle_time(self):
+        UserModel.objects.create_user('user@example.com')
+        self.assertEqual([], self.get(after=self.start)['users'])
+
+    def test_bad_params(self):
+        for params in ({'after': 'abc'}, {'after': '12'}, {'limit': 0},
+                       {'after': '99999999999999999999.1'},
+                       {'after': '-99999999999999999999.1'},
+                       {'after': '0.99999999999999999999'}):
+            response = self.authed_get(reverse('bid_api:user_changes'), data=params)
+            self.assertEqual(400, response.status_code, f'params: {params}')
+
+    def test_wrong_scope(self):
+        wrong_token = AccessToken.objects.create(
+            user=self.user,
+            scope='email',
+            expires=timezone.now() + timedelta(seconds=300),
+            token='token-with-wrong-scope',
+            application=self.application
+        )
+        response = self.authed_get(reverse('bid_api:user_changes'),
+                                   access_token=wrong_token.token)
+        self.assertEqual(403, response.status_code)
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.urlresolvers import reverse
+from django.utils import timezone
+
+from bid_main import role_registry
+from bid_main.models import Role
+from .abstract import AbstractAPITest, AccessToken, UserModel
+
+
+class UserLookupTest(AbstractAPITest):
+    access_token_scope = 'userlookup'
+
+    def setUp(self):
+        super().setUp()
+        public = Role.objects.create(name='cloud_subscriber')
+        private = Role.objects.create(name='secret', is_public=False)
+        inactive = Role.objects.create(name='old', is_active=False)
+
+        self.users = [UserModel.objects.create_user(f'user{i}@example.com', full_name=f'User {i}')
+                      for i in range(3)]
+        self.users[0].roles.add(public, private, inactive)
+
+    def lookup(self, **data) -> dict:
+        response = self.authed_post(reverse('bid_api:user_lookup'), data=data)
+        self.assertEqual(200, response.status_code, f'response: {response}')
+        return response.json()
+
+    def test_lookup(self):
+        role_registry.get_registry()
+        # The access token is checked by both the OAuth2 middleware and the view.
+        with self.assertNumQueries(3):
+            payload = self.lookup(id=[self.users[0].id, self.users[1].id, 9999],
+                                  email=['user2@example.com', 'unknown@example.com'])
+
+        self.assertEqual({str(user.id) for user in self.users}, set(payload['users']))
+        self.assertEqual({'id': self.users[0].id,
+                          'full_name': 'User 0',
+                          'roles': {'cloud_subscriber': True}},
+                         payload['users'][str(self.users[0].id)])
+        self.assertEqual({}, payload['users'][str(self.users[1].id)]['roles'])
+        self.assertEqual({'user2@example.com': self.users[2].id}, payload['emails'])
+
+    def test_email_case(self):
+        payload = self.lookup(email=['user1@example.com', 'User1@Example.com'])
+        self.assertEqual({'user1@example.com': self.users[1].id,
+                          'User1@Example.com': self.users[1].id}, payload['emails'])
+
+    def test_bad_request(self):
+        response = self.authed_post(reverse('bid_api:user_lookup'), data={'id': 'abc'})
+        self.assertEqual(400, response.status_code)
+
+        response = self.authed_post(reverse('bid_api:user_lookup'),
+                                    data={'id': list(range(1001))})
+        self.assertEqual(400, response.status_code)
+
+    def test_wrong_scope(self):
+        wrong_token = AccessToken.objects.create(
+            user=self.user,
+            scope='email',
+            expires=timezone.now() + timedelta(seconds=300),
+            token='token-with-wrong-scope',
+            application=self.application
+        )
+        response = self.authed_post(reverse('bid_api:user_lookup'),
+                                    data={'id': self.users[0].id},
+                                    access_token=wrong_token.token)
+        self.assertEqual(403, response.status_code)
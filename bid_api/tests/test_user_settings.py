@@ -0,0 +1,68 @@
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.utils import timezone
+
+from bid_main import user_settings
+from bid_main.models import Setting, UserSetting
+from .abstract import AbstractAPITest, AccessToken, UserModel
+
+
+class UserSettingsTest(AbstractAPITest):
+    access_token_scope = 'usersettings'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        beta = Setting.objects.create(name='beta', default='false')
+        self.users = [UserModel.objects.create_user(f'user{i}@example.com') for i in range(2)]
+        UserSetting.objects.create(user=self.users[0], setting=beta, unconstrained_value='true')
+        self.url = reverse('bid_api:user_settings')
+
+    def post_json(self, payload, **kwargs):
+        return self.authed_post(self.url, data=json.dumps(payload),
+                                content_type='application/json', **kwargs)
+
+    def test_get(self):
+        user_settings.get_definitions()
+        # The access token is checked by both the OAuth2 middleware and the view.
+        with self.assertNumQueries(4):
+            response = self.authed_get(self.url, data={'id': [self.users[0].id,
+                                                              self.users[1].id, 9999]})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({str(self.users[0].id): {'beta': True},
+                          str(self.users[1].id): {'beta': False}}, response.json()['users'])
+
+    def test_post(self):
+        response = self.post_json({'users': {str(self.users[0].id): {'beta': None},
+                                             str(self.users[1].id): {'beta': True}}})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({str(self.users[0].id): {'beta': False},
+                          str(self.users[1].id): {'beta': True}}, response.json()['users'])
+
+    def test_bad_request(self):
+        self.assertEqual(400, self.authed_get(self.url, data={'id': 'abc'}).status_code)
+        self.assertEqual(400, self.post_json({'users': []}).status_code)
+        self.assertEqual(400, self.post_json({'users': {'9999': {'beta': True}}}).status_code)
+        user_id = str(self.users[1].id)
+        self.assertEqual(400, self.post_json({'users': {user_id: {'alpha': True}}}).status_code)
+        self.assertEqual(400, self.post_json({'users': {user_id: {'beta': 'on'}}}).status_code)
+        Setting.objects.create(name='motto', data_type='text', default='')
+        response = self.post_json({'users': {user_id: {'motto': 'x' * 129}}})
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'beta': False, 'motto': ''},
+                         user_settings.effective_settings(self.users[1].id))
+
+    def test_wrong_scope(self):
+        wrong_token = AccessToken.objects.create(
+            user=self.user,
+            scope='email',
+            expires=timezone.now() + timedelta(seconds=300),
+            token='token-with-wrong-scope',
+            application=self.application
+        )
+        response = self.authed_get(self.url, data={'id': self.users[0].id},
+                                   access_token=wrong_token.token)
+        self.assertEqual(403, response.status_code)
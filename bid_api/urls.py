@@ -1,6 +1,7 @@
 from django.conf.urls import url
 
-from .views import info, badger, create_user, authenticate
+from .views import info, badger, create_user, authenticate, token_keys, revocations, \
+    introspect, user_changes, user_lookup, user_settings
 
 urlpatterns = [
     url(r'^(?:user|me)$', info.user_info, name='user'),
@@ -11,4 +12,10 @@ urlpatterns = [
     url(r'^check-user/(?P<email>[^/]+)$', create_user.CheckUserView.as_view(), name='check_user'),
     url(r'^create-user/?$', create_user.CreateUserView.as_view(), name='create_user'),
     url(r'^authenticate/?$', authenticate.AuthenticateView.as_view(), name='authenticate'),
+    url(r'^token-keys$', token_keys.token_keys, name='token_keys'),
+    url(r'^revocations$', revocations.RevocationsView.as_view(), name='revocations'),
+    url(r'^introspect$', introspect.IntrospectView.as_view(), name='introspect'),
+    url(r'^user-changes$', user_changes.UserChangesView.as_view(), name='user_changes'),
+    url(r'^users$', user_lookup.UserLookupView.as_view(), name='user_lookup'),
+    url(r'^user-settings$', user_settings.UserSettingsView.as_view(), name='user_settings'),
 ]
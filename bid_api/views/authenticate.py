@@ -3,8 +3,8 @@ import logging
 from django.contrib.auth import get_user_model, authenticate
 from django import http
 from django.utils.decorators import method_decorator
-from oauth2_provider.decorators import protected_resource
 
+from ..decorators import protected_resource
 from .abstract import AbstractAPIView
 
 UserModel = get_user_model()
@@ -5,13 +5,12 @@ Badger service functionality.
 import logging
 
 from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
-from django.contrib.admin.models import LogEntry, ADDITION, DELETION
+from django.contrib.admin.models import ADDITION, DELETION
 from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.models import ContentType
 from django.utils.decorators import method_decorator
-from oauth2_provider.decorators import protected_resource
 
-from bid_main import models as bid_main_models
+from bid_main import audit, role_registry, models as bid_main_models
+from ..decorators import protected_resource
 from ..http import HttpResponseUnprocessableEntity
 from .abstract import AbstractAPIView
 
@@ -28,10 +27,7 @@ class BadgerView(AbstractAPIView):
         action = self.action
 
         # See which roles this user can manage.
-        may_manage = {}
-        for role in user.roles.all():
-            for manage_role in role.may_manage_roles.all():
-                may_manage[manage_role.name] = manage_role
+        may_manage = role_registry.get_registry().manageable(user.get_role_ids())
 
         if badge not in may_manage:
             log.warning(
@@ -62,29 +58,27 @@ class BadgerView(AbstractAPIView):
         if action == 'grant':
             log.info('User %s grants role %r to user %s.', user, badge, email)
             action_flag = ADDITION
-            if role in target_user.roles.all():
+            if role.id in target_user.get_role_ids():
                 log.debug('User %s already has role %r', email, badge)
                 return JsonResponse({'result': 'no-op'})
-            target_user.roles.add(role)
+            target_user.roles.add(role.id)
             change_message = f'Granted role {badge}.'
         elif action == 'revoke':
             log.info('User %s revokes role %r from user %s.', user, badge, email)
             action_flag = DELETION
-            if role not in target_user.roles.all():
+            if role.id not in target_user.get_role_ids():
                 log.debug('User %s already does not have role %r', email, badge)
                 return JsonResponse({'result': 'no-op'})
-            target_user.roles.remove(role)
+            target_user.roles.remove(role.id)
             change_message = f'Revoked role {badge}.'
         else:
             log.warning('unknown action %r', action)
             return HttpResponseUnprocessableEntity('unknown action')
-        target_user.save()
+        # Changing the roles already bumped target_user.last_update.
 
-        LogEntry.objects.log_action(
+        audit.log_action(
             user_id=user.id,
-            content_type_id=ContentType.objects.get_for_model(UserModel).pk,
-            object_id=target_user.id,
-            object_repr=str(target_user),
+            obj=target_user,
             action_flag=action_flag,
             change_message=change_message)
 
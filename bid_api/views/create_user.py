@@ -2,13 +2,13 @@ import logging
 
 from django.db import transaction
 from django.contrib.auth import get_user_model
-from django.contrib.admin.models import LogEntry, ADDITION
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.admin.models import ADDITION
 from django.http import JsonResponse, HttpResponse
 from django.utils.decorators import method_decorator
 from django.forms import ModelForm
-from oauth2_provider.decorators import protected_resource
 
+from bid_main import audit
+from ..decorators import protected_resource
 from .abstract import AbstractAPIView
 
 UserModel = get_user_model()
@@ -44,11 +44,9 @@ class CreateUserView(AbstractAPIView):
             cuf.cleaned_data['password'],
             full_name=cuf.cleaned_data['full_name'])
 
-        LogEntry.objects.log_action(
+        audit.log_action(
             user_id=request.user.id,
-            content_type_id=ContentType.objects.get_for_model(UserModel).pk,
-            object_id=db_user.id,
-            object_repr=str(db_user),
+            obj=db_user,
             action_flag=ADDITION,
             change_message='Account created via user creation API.')
 
@@ -1,7 +1,8 @@
 import logging
 
 from django.http import JsonResponse
-from oauth2_provider.decorators import protected_resource
+
+from ..decorators import protected_resource
 
 log = logging.getLogger(__name__)
 
@@ -14,11 +15,7 @@ def user_info(request):
 
     # This is returned as dict to be compatible with the old
     # Flask-based Blender ID implementation.
-    public_roles = {role.name: True
-                    for role in user.roles.filter(is_public=True)
-                    if role.is_active}
-
     return JsonResponse({'id': user.id,
                          'full_name': user.get_full_name(),
                          'email': user.email,
-                         'roles': public_roles})
+                         'roles': user.public_roles()})
@@ -0,0 +1,66 @@
+"""
+Token introspection, as described in RFC 7662.
+"""
+
+import calendar
+import logging
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import View
+
+from bid_main import tokens, token_usage
+from ..decorators import protected_resource
+
+log = logging.getLogger(__name__)
+
+
+class IntrospectView(View):
+    """Tells whether an access token is active, and what it grants access to.
+
+    Unlike the other API views, responses of this view may be cached; the
+    Cache-Control max-age is based on the remaining lifetime of the token,
+    capped by settings.BLENDER_ID_INTROSPECTION_MAX_AGE. Revocations that
+    happen within that time can be picked up from /api/revocations.
+
+    Requires an auth token with 'introspection' scope to use.
+    """
+
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+
+    @method_decorator(protected_resource(scopes=['introspection']))
+    def post(self, request) -> JsonResponse:
+        max_age = settings.BLENDER_ID_INTROSPECTION_MAX_AGE
+        token_string = request.POST.get('token', '')
+
+        queryset = tokens.AccessToken.objects.select_related('application')
+        try:
+            token = tokens.find_access_token(token_string, queryset)
+        except tokens.AccessToken.DoesNotExist:
+            token = None
+
+        if token is None or not token.is_valid():
+            log.debug('Introspection by %s: token is not active', request.resource_owner)
+            response = JsonResponse({'active': False})
+        else:
+            token_usage.record_use(token)
+            remaining = int((token.expires - timezone.now()).total_seconds())
+            max_age = max(0, min(max_age, remaining))
+            response = JsonResponse({
+                'active': True,
+                'token_type': 'Bearer',
+                'scope': token.scope,
+                'exp': calendar.timegm(token.expires.utctimetuple()),
+                'client_id': token.application.client_id if token.application else None,
+                'user_id': token.user_id,
+                'subclient': token.subclient,
+            })
+
+        patch_cache_control(response, private=True, max_age=max_age)
+        return response
@@ -0,0 +1,64 @@
+"""
+Feed of revoked access tokens.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+
+from bid_main.models import TokenRevocation
+from ..decorators import protected_resource
+from .abstract import AbstractAPIView
+
+log = logging.getLogger(__name__)
+
+
+class RevocationsView(AbstractAPIView):
+    """Returns the access tokens revoked since a given cursor.
+
+    Services that cache token validations can poll this endpoint to learn
+    which tokens to drop from their cache. The 'cursor' returned in the
+    response should be passed as 'after' parameter in the next request.
+    Revocations from the last settings.BLENDER_ID_REVOCATIONS_SETTLE_SECONDS
+    are not returned yet: IDs are assigned before their transactions commit,
+    so a recent revocation can still become visible below the cursor.
+    Requires an auth token with 'revocations' scope.
+    """
+
+    default_limit = 1000
+    max_limit = 10000
+
+    @method_decorator(protected_resource(scopes=['revocations']))
+    def get(self, request) -> JsonResponse:
+        try:
+            after = int(request.GET.get('after', 0))
+            limit = min(int(request.GET.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            return HttpResponseBadRequest('after and limit should be integers')
+        # Larger IDs overflow the comparison on some databases.
+        if not 0 <= after < 2 ** 63 or limit < 1:
+            return HttpResponseBadRequest('after should be non-negative and limit positive')
+
+        settle = datetime.timedelta(seconds=settings.BLENDER_ID_REVOCATIONS_SETTLE_SECONDS)
+        # Fetch one more than requested, to know whether there are more to come.
+        revocations = list(TokenRevocation.objects
+                           .filter(id__gt=after, revoked_at__lt=timezone.now() - settle)
+                           .order_by('id')
+                           .values('id', 'token_id', 'token_digest', 'user_id', 'revoked_at')
+                           [:limit + 1])
+        has_more = len(revocations) > limit
+        revocations = revocations[:limit]
+
+        if revocations:
+            after = revocations[-1]['id']
+        log.debug('Sending %d revocations to %s', len(revocations), request.resource_owner)
+
+        return JsonResponse({
+            'revocations': revocations,
+            'cursor': after,
+            'has_more': has_more,
+        })
@@ -0,0 +1,20 @@
+import logging
+
+from django.http import JsonResponse
+
+from bid_main import signed_tokens
+from ..decorators import protected_resource
+
+log = logging.getLogger(__name__)
+
+
+@protected_resource(scopes=['tokenkeys'])
+def token_keys(request):
+    """Returns the keys for verifying signed access tokens.
+
+    As these are HMAC keys, they are secret and only given to services
+    whose token has the 'tokenkeys' scope.
+    """
+
+    log.debug('Sending token signing keys to %s', request.resource_owner)
+    return JsonResponse(signed_tokens.key_set())
@@ -0,0 +1,102 @@
+"""
+Feed of changed users.
+"""
+
+import datetime
+import logging
+import typing
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+
+from ..decorators import protected_resource
+from .abstract import AbstractAPIView
+
+log = logging.getLogger(__name__)
+UserModel = get_user_model()
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+# Largest ID that every database can compare with.
+MAX_ID = 2 ** 63 - 1
+
+
+def make_cursor(last_update: datetime.datetime, user_id: int) -> str:
+    return f'{(last_update - EPOCH) // ONE_MICROSECOND}.{user_id}'
+
+
+def parse_cursor(cursor: str) -> typing.Tuple[datetime.datetime, int]:
+    """Parses a cursor from make_cursor().
+
+    :raises ValueError: when the cursor is invalid.
+    """
+    microseconds, user_id = cursor.split('.')
+    user_id = int(user_id)
+    if not 0 <= user_id <= MAX_ID:
+        raise ValueError(f'user ID out of range: {user_id}')
+    try:
+        last_update = EPOCH + int(microseconds) * ONE_MICROSECOND
+    except OverflowError as ex:
+        raise ValueError(f'timestamp out of range: {microseconds}') from ex
+    return last_update, user_id
+
+
+class UserChangesView(AbstractAPIView):
+    """Returns the users changed since a given cursor, ordered by last_update.
+
+    Services mirroring user info can poll this endpoint, instead of
+    fetching every user. The 'cursor' returned in the response should be
+    passed as 'after' parameter in the next request; leave it out to get
+    all users. Changes to roles are included. Changes from the last
+    settings.BLENDER_ID_USER_CHANGES_SETTLE_SECONDS are not returned yet, so
+    that transactions that are still running cannot be skipped.
+    Requires an auth token with 'userchanges' scope.
+    """
+
+    default_limit = 1000
+    max_limit = 10000
+
+    @method_decorator(protected_resource(scopes=['userchanges']))
+    def get(self, request) -> JsonResponse:
+        after = request.GET.get('after', '')
+        try:
+            limit = min(int(request.GET.get('limit', self.default_limit)), self.max_limit)
+            if after:
+                after_update, after_id = parse_cursor(after)
+        except ValueError:
+            return HttpResponseBadRequest('invalid after or limit')
+        if limit < 1:
+            return HttpResponseBadRequest('limit should be positive')
+
+        settle = datetime.timedelta(seconds=settings.BLENDER_ID_USER_CHANGES_SETTLE_SECONDS)
+        users = UserModel.objects.filter(last_update__lte=timezone.now() - settle)
+        if after:
+            users = users.filter(Q(last_update__gt=after_update) |
+                                 Q(last_update=after_update, id__gt=after_id))
+        # Fetch one more than requested, to know whether there are more to come.
+        users = list(users
+                     .order_by('last_update', 'id')
+                     [:limit + 1])
+        has_more = len(users) > limit
+        users = users[:limit]
+
+        if users:
+            after = make_cursor(users[-1].last_update, users[-1].id)
+        log.debug('Sending %d changed users to %s', len(users), request.resource_owner)
+
+        return JsonResponse({
+            'users': [{
+                'id': user.id,
+                'full_name': user.get_full_name(),
+                'email': user.email,
+                'is_active': user.is_active,
+                'roles': user.public_roles(),
+                'last_update': user.last_update,
+            } for user in users],
+            'cursor': after,
+            'has_more': has_more,
+        })
@@ -0,0 +1,61 @@
+"""
+Bulk lookup of public user info.
+"""
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.utils.decorators import method_decorator
+
+from ..decorators import protected_resource
+from .abstract import AbstractAPIView
+
+log = logging.getLogger(__name__)
+UserModel = get_user_model()
+
+
+class UserLookupView(AbstractAPIView):
+    """Returns the full name and public roles of multiple users.
+
+    POST any number of 'id' and 'email' fields. The response contains the
+    found users by ID, and the IDs of the found email addresses.
+    Requires an auth token with 'userlookup' scope.
+    """
+
+    max_users = 1000
+
+    @method_decorator(protected_resource(scopes=['userlookup']))
+    def post(self, request) -> JsonResponse:
+        try:
+            user_ids = {int(user_id) for user_id in request.POST.getlist('id')}
+        except ValueError:
+            return HttpResponseBadRequest('id should be an integer')
+        emails = set(request.POST.getlist('email'))
+        if len(user_ids) + len(emails) > self.max_users:
+            return HttpResponseBadRequest(f'at most {self.max_users} users can be looked up')
+
+        users = UserModel.objects \
+            .filter(Q(id__in=user_ids) | Q(email__in=emails)) \
+            .only('id', 'email', 'full_name', 'cached_role_ids')
+        log.debug('Looking up %d users on behalf of %s',
+                  len(user_ids) + len(emails), request.resource_owner)
+
+        # MySQL compares email addresses case-insensitively, so do the same here.
+        emails_by_lower = {}
+        for email in emails:
+            emails_by_lower.setdefault(email.lower(), []).append(email)
+
+        found_users = {}
+        found_emails = {}
+        for user in users:
+            found_users[user.id] = {
+                'id': user.id,
+                'full_name': user.get_full_name(),
+                'roles': user.public_roles(),
+            }
+            for email in emails_by_lower.get(user.email.lower(), ()):
+                found_emails[email] = user.id
+
+        return JsonResponse({'users': found_users, 'emails': found_emails})
@@ -0,0 +1,72 @@
+"""
+Bulk reading and writing of effective user settings.
+"""
+
+import json
+import logging
+
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.utils.decorators import method_decorator
+
+from bid_main import user_settings
+from ..decorators import protected_resource
+from .abstract import AbstractAPIView
+
+log = logging.getLogger(__name__)
+UserModel = get_user_model()
+
+
+class UserSettingsView(AbstractAPIView):
+    """Returns or changes the effective settings of multiple users.
+
+    GET with any number of 'id' parameters returns the settings by user ID:
+    the defaults, overridden by the user's own values.
+
+    POST a JSON object {"users": {"<user ID>": {"<setting name>": value}}}
+    to change settings; null resets a setting to its default. The response
+    contains the effective settings of the changed users.
+
+    Requires an auth token with 'usersettings' scope.
+    """
+
+    max_users = 1000
+
+    @method_decorator(protected_resource(scopes=['usersettings']))
+    def get(self, request) -> JsonResponse:
+        try:
+            user_ids = {int(user_id) for user_id in request.GET.getlist('id')}
+        except ValueError:
+            return HttpResponseBadRequest('id should be an integer')
+        if len(user_ids) > self.max_users:
+            return HttpResponseBadRequest(f'at most {self.max_users} users can be requested')
+
+        found_ids = UserModel.objects.filter(id__in=user_ids).values_list('id', flat=True)
+        return JsonResponse({'users': user_settings.effective_settings_many(found_ids)})
+
+    @method_decorator(protected_resource(scopes=['usersettings']))
+    def post(self, request) -> JsonResponse:
+        try:
+            payload = json.loads(request.body.decode('utf8'))
+            changes = {int(user_id): dict(values)
+                       for user_id, values in payload['users'].items()}
+        except (UnicodeDecodeError, ValueError, TypeError, KeyError, AttributeError):
+            return HttpResponseBadRequest('expected {"users": {"<user ID>": {...}}}')
+        if len(changes) > self.max_users:
+            return HttpResponseBadRequest(f'at most {self.max_users} users can be changed')
+
+        found_ids = set(UserModel.objects.filter(id__in=changes).values_list('id', flat=True))
+        unknown_ids = changes.keys() - found_ids
+        if unknown_ids:
+            return HttpResponseBadRequest(f'unknown users: {sorted(unknown_ids)}')
+
+        try:
+            user_settings.update_settings(changes)
+        except KeyError as ex:
+            return HttpResponseBadRequest(f'unknown setting {ex}')
+        except ValueError as ex:
+            return HttpResponseBadRequest(f'invalid setting value: {ex}')
+        log.info('Changed settings of %d users on behalf of %s',
+                 len(changes), request.resource_owner)
+
+        return JsonResponse({'users': user_settings.effective_settings_many(changes)})
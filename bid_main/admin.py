@@ -1,8 +1,20 @@
+from django.conf.urls import url
 from django.contrib import admin
+from django.contrib.admin.models import CHANGE, DELETION
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
-from . import models
+from . import (admin_filters, audit, forms, models, role_assignment, role_export, role_registry,
+               search, tokens)
+from .admin_changelist import KeysetChangeListMixin
 from .admin_decorators import short_description
 
 # Configure the admin site. Easier than creating our own AdminSite subclass.
@@ -28,7 +40,7 @@ def unmake_staff(modeladmin, request, queryset):
 
 
 @admin.register(models.User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(KeysetChangeListMixin, BaseUserAdmin):
     change_form_template = 'loginas/change_form.html'
 
     inlines = (UserSettingInline,)
@@ -59,20 +71,28 @@ class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'full_name', 'is_active', 'is_staff', 'role_names', 'last_update',
                     'confirmed_email_at')
     list_display_links = ('email', 'full_name')
-    list_filter = ('roles', 'is_active', 'groups',
-                   'confirmed_email_at', 'is_staff', 'is_superuser')
+    list_filter = (admin_filters.RoleFilter,
+                   ('is_active', admin_filters.FacetBooleanFieldListFilter),
+                   admin_filters.GroupFilter,
+                   admin_filters.ConfirmedEmailFilter,
+                   ('is_staff', admin_filters.FacetBooleanFieldListFilter),
+                   ('is_superuser', admin_filters.FacetBooleanFieldListFilter))
     list_per_page = 12
     search_fields = ('email', 'full_name')
-    ordering = ('-last_update',)
+    ordering = ('-last_update', '-id')
 
     actions = [make_staff, unmake_staff]
 
-    def role_names(self, user):
-        """Lists role names of the user.
+    def get_search_results(self, request, queryset, search_term):
+        # Uses the search index instead of LIKE '%term%' on search_fields.
+        if not search_term.strip():
+            return queryset, False
+        return search.search(queryset, search_term), False
 
-        Can be used in list_display, but makes things slow.
-        """
-        roles = user.roles.filter(is_active=True)
+    def role_names(self, user):
+        """Lists names of the active roles of the user."""
+        roles = role_registry.get_registry().get_many(user.get_role_ids())
+        roles = sorted((role for role in roles if role.is_active), key=lambda role: role.name)
         if not roles:
             return '-'
         suffix = ''
@@ -94,33 +114,108 @@ class SettingAdmin(admin.ModelAdmin):
 @short_description('Mark selected roles as badges')
 def make_badge(modeladmin, request, queryset):
     queryset.update(is_badge=True)
+    role_registry.bump_version()
 
 
 @short_description('Un-mark selected roles as badges')
 def make_not_badge(modeladmin, request, queryset):
     queryset.update(is_badge=False)
+    role_registry.bump_version()
 
 
 @short_description('Mark selected roles as active')
 def make_active(modeladmin, request, queryset):
     queryset.update(is_active=True)
+    role_registry.bump_version()
 
 
 @short_description('Mark selected roles as inactive')
 def make_inactive(modeladmin, request, queryset):
     queryset.update(is_active=False)
+    role_registry.bump_version()
 
 
 @admin.register(models.Role)
 class RoleAdmin(admin.ModelAdmin):
     model = models.Role
 
-    list_display = ('name', 'description', 'is_badge', 'is_active')
+    list_display = ('name', 'description', 'is_badge', 'is_active', 'member_count',
+                    'member_links')
     list_filter = ('is_badge', 'is_active')
     search_fields = ('name', 'description')
+    readonly_fields = ('member_count',)
 
     actions = [make_badge, make_not_badge, make_active, make_inactive]
 
+    def get_urls(self):
+        export = self.admin_site.admin_view(self.export_members)
+        change_members = self.admin_site.admin_view(self.change_members)
+        return [
+            url(r'^(?P<role_id>\d+)/export/(?P<export_format>csv|jsonl)/$', export,
+                name='bid_main_role_export'),
+            url(r'^(?P<role_id>\d+)/members/$', change_members,
+                name='bid_main_role_members'),
+            *super().get_urls(),
+        ]
+
+    @short_description('Members')
+    def member_links(self, role):
+        return format_html(
+            '<a href="{}">Grant/revoke</a> / Export <a href="{}">CSV</a> <a href="{}">JSONL</a>',
+            reverse('admin:bid_main_role_members', args=(role.pk,)),
+            reverse('admin:bid_main_role_export', args=(role.pk, 'csv')),
+            reverse('admin:bid_main_role_export', args=(role.pk, 'jsonl')))
+
+    def change_members(self, request, role_id: str):
+        """Grants the role to, or revokes it from, a list of users by email address."""
+        # This changes the users too, just like editing their roles on the user page.
+        if not self.has_change_permission(request) \
+                or not request.user.has_perm('bid_main.change_user'):
+            raise PermissionDenied()
+        role = get_object_or_404(models.Role, pk=role_id)
+
+        result = None
+        if request.method == 'POST':
+            form = forms.RoleMembersForm(request.POST, request.FILES)
+            if form.is_valid():
+                grant = form.cleaned_data['action'] == 'grant'
+                result = role_assignment.change_members(
+                    role, form.cleaned_data['email_list'], grant=grant)
+                verb = 'Granted role to' if grant else 'Revoked role from'
+                message = f'{verb} {result.changed} users.'
+                audit.log_action(user_id=request.user.id, obj=role, action_flag=CHANGE,
+                                 change_message=message)
+                self.message_user(request, f'{message} {result.unchanged} users were unchanged, '
+                                           f'{len(result.unknown_emails)} email addresses '
+                                           f'are unknown.')
+                if not result.unknown_emails:
+                    return redirect('admin:bid_main_role_changelist')
+        else:
+            form = forms.RoleMembersForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Grant or revoke {role.name}',
+            'opts': self.model._meta,
+            'role': role,
+            'form': form,
+            'result': result,
+        }
+        return TemplateResponse(request, 'admin/bid_main/role/members.html', context)
+
+    def export_members(self, request, role_id: str, export_format: str):
+        """Streams the members of the role as CSV or JSON Lines."""
+        if not self.has_change_permission(request):
+            raise PermissionDenied()
+        role = get_object_or_404(models.Role, pk=role_id)
+        content_type, make_lines = role_export.FORMATS[export_format]
+
+        response = StreamingHttpResponse(make_lines(role_export.iter_members(role.pk)),
+                                         content_type=content_type)
+        filename = f'{slugify(role.name)}-members.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 
 # Erase the oauth_provider admin classes so that we can register our own.
 # Butt ugly but it seems to work.
@@ -130,9 +225,85 @@ except admin.site.NotRegistered:
     pass
 
 
+@short_description('Revoke selected access tokens')
+def revoke_tokens(modeladmin, request, queryset):
+    # Unlike Django's delete action, custom actions don't check permissions.
+    if not modeladmin.has_delete_permission(request):
+        raise PermissionDenied
+
+    def log_revocations(token_ids):
+        for token_id in token_ids:
+            # str(token) is the token itself, which shouldn't end up in the log.
+            audit.log_action(user_id=request.user.id,
+                             obj=models.OAuth2AccessToken(pk=token_id),
+                             object_repr=f'OAuth2 access token {token_id}',
+                             action_flag=DELETION, change_message='Revoked.')
+
+    count = tokens.revoke_access_tokens(queryset, on_revoke=log_revocations)
+    modeladmin.message_user(request, f'Revoked {count} access tokens.')
+
+
 @admin.register(models.OAuth2AccessToken)
-class AccessTokenAdmin(admin.ModelAdmin):
+class AccessTokenAdmin(KeysetChangeListMixin, admin.ModelAdmin):
     list_display = ('token', 'user', 'application', 'scope', 'expires')
-    list_filter = ('application', 'scope')
+    list_filter = ('application', admin_filters.ExpiryFilter)
+    list_select_related = ('user', 'application')
     raw_id_fields = ('user',)
-    search_fields = ('scope',)
+    search_fields = ('user__email',)
+    ordering = ('-id',)
+
+    actions = [revoke_tokens]
+
+    def get_actions(self, request):
+        # Django's delete action loads and lists every token before deleting.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        if not self.has_delete_permission(request):
+            actions.pop('revoke_tokens', None)
+        return actions
+
+    def delete_model(self, request, obj):
+        # Revoking records the token in the revocation log.
+        obj.revoke()
+
+    def get_search_results(self, request, queryset, search_term):
+        """Finds tokens by their owner's email address or name, or by the token itself."""
+        if not search_term.strip():
+            return queryset, False
+        users = search.search(models.User.objects.all(), search_term)
+        try:
+            token = tokens.find_access_token(search_term.strip())
+        except tokens.AccessToken.DoesNotExist:
+            return queryset.filter(user__in=users), False
+        return queryset.filter(Q(user__in=users) | Q(pk=token.pk)), False
+
+
+@admin.register(models.OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'created', 'attempts', 'next_attempt')
+    list_filter = ('attempts',)
+    search_fields = ('recipients',)
+    exclude = ('message',)
+    readonly_fields = ('subject', 'recipients', 'created', 'attempts', 'last_error')
+
+
+@admin.register(models.Webhook)
+class WebhookAdmin(admin.ModelAdmin):
+    list_display = ('url', 'application', 'description', 'is_active')
+    list_filter = ('is_active', 'application')
+    search_fields = ('url', 'description')
+
+
+@admin.register(models.WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """Shows pending events, and those that were given up on, see bid_main.webhooks."""
+
+    list_display = ('id', 'webhook', 'user_id', 'created', 'attempts', 'next_attempt')
+    list_filter = ('webhook', 'attempts')
+    list_select_related = ('webhook',)
+    search_fields = ('=user_id',)
+    ordering = ('-id',)
+    readonly_fields = ('webhook', 'user_id', 'created', 'attempts', 'next_attempt', 'last_error')
+
+    def has_add_permission(self, request):
+        return False
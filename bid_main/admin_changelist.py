@@ -0,0 +1,206 @@
+"""
+Admin changelist support for very large tables.
+
+KeysetChangeList pages through the results by remembering the ordering
+values of the last shown row (the 'after' query parameter), instead of
+using OFFSET, which has to skip over all earlier rows. It falls back to
+regular pagination when the ordering cannot be used for this, for example
+when it contains nullable or related fields.
+
+ApproximateCountPaginator avoids exact counts over entire tables, using the
+database's own estimate of the table size instead, and caches the counts
+of filtered results.
+
+Use KeysetChangeListMixin on a ModelAdmin to use both.
+"""
+
+import hashlib
+import json
+import logging
+import typing
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+log = logging.getLogger(__name__)
+
+CURSOR_VAR = 'after'
+
+
+def table_size_estimate(queryset: QuerySet) -> typing.Optional[int]:
+    """Returns the database's estimate of the number of rows in the table.
+
+    Returns None when the database doesn't provide an estimate.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        query = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'mysql':
+        query = 'SELECT table_rows FROM information_schema.tables ' \
+                'WHERE table_schema = DATABASE() AND table_name = %s'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(query, [table])
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def approximate_count(queryset: QuerySet) -> int:
+    """Returns the (approximate) number of results of the queryset.
+
+    Unfiltered querysets of tables larger than
+    settings.BLENDER_ID_ADMIN_EXACT_COUNT_LIMIT use the database's estimate
+    of the table size. Other counts are exact, but cached for
+    settings.BLENDER_ID_ADMIN_COUNT_CACHE_SECONDS.
+    """
+    if not queryset.query.where:
+        estimate = table_size_estimate(queryset)
+        if estimate is not None and estimate > settings.BLENDER_ID_ADMIN_EXACT_COUNT_LIMIT:
+            return estimate
+
+    query = str(queryset.query).encode('utf8', 'replace')
+    cache_key = f'bid_main.admin_changelist:count:{hashlib.sha1(query).hexdigest()}'
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, settings.BLENDER_ID_ADMIN_COUNT_CACHE_SECONDS)
+    return count
+
+
+class ApproximateCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList that pages on the ordering fields instead of OFFSET.
+
+    The template should use the 'keyset' attribute to decide how to render
+    the pagination; see admin/keyset_change_list.html.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # A cursor is only valid for the ordering and filters it was made for.
+        if not new_params or CURSOR_VAR not in new_params:
+            remove = [*(remove or []), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    @cached_property
+    def keyset_fields(self) -> typing.Optional[typing.List[typing.Tuple[str, bool]]]:
+        """Returns (field attname, descending) tuples for the current ordering.
+
+        Returns None when the ordering cannot be used for keyset pagination.
+        """
+        opts = self.model._meta
+        keyset = []
+        for order in self.queryset.query.order_by:
+            if not isinstance(order, str) or order == '?':
+                return None
+            descending = order.startswith('-')
+            name = order.lstrip('-')
+            if name == 'pk':
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.is_relation or field.null:
+                return None
+            keyset.append((field.attname, descending))
+
+        pk_names = {opts.pk.name, opts.pk.attname}
+        if not keyset or keyset[-1][0] not in pk_names:
+            # Without the primary key the ordering may not be unique.
+            return None
+        return keyset
+
+    def get_results(self, request):
+        self.keyset = self.keyset_fields is not None and not self.show_all
+        if not self.keyset:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        queryset = self.queryset
+        self.cursor = request.GET.get(CURSOR_VAR, '')
+        if self.cursor:
+            queryset = queryset.filter(self.cursor_filter(self.cursor))
+
+        # Fetch one more than shown, to know whether there is a next page.
+        result_list = list(queryset[:self.list_per_page + 1])
+        self.has_next_page = len(result_list) > self.list_per_page
+        result_list = result_list[:self.list_per_page]
+        self.next_cursor = self.make_cursor(result_list[-1]) if self.has_next_page else ''
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = self.has_next_page or bool(self.cursor)
+        self.paginator = paginator
+
+    def make_cursor(self, obj) -> str:
+        values = []
+        for attname, _ in self.keyset_fields:
+            field = self.model._meta.get_field(attname)
+            values.append(field.value_to_string(obj))
+        return json.dumps(values, separators=(',', ':'))
+
+    def cursor_filter(self, cursor: str) -> Q:
+        """Returns the filter for the rows following the cursor.
+
+        For ordering (a, b) this is 'a > x OR (a = x AND b > y)', with '<'
+        instead of '>' for descending fields.
+        """
+        try:
+            values = json.loads(cursor)
+            if len(values) != len(self.keyset_fields):
+                raise ValueError('wrong number of values')
+            values = [self.model._meta.get_field(attname).to_python(value)
+                      for (attname, _), value in zip(self.keyset_fields, values)]
+        except (TypeError, ValueError, ValidationError) as ex:
+            log.debug('Invalid cursor %r: %s', cursor, ex)
+            raise IncorrectLookupParameters(f'Invalid cursor {cursor!r}')
+
+        result = Q()
+        equal = {}
+        for (attname, descending), value in zip(self.keyset_fields, values):
+            lookup = 'lt' if descending else 'gt'
+            result |= Q(**equal, **{f'{attname}__{lookup}': value})
+            equal[attname] = value
+        return result
+
+    def get_next_page_url(self) -> str:
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    def get_first_page_url(self) -> str:
+        return self.get_query_string()
+
+
+class KeysetChangeListMixin:
+    """ModelAdmin mixin for keyset pagination and approximate counts."""
+
+    change_list_template = 'admin/keyset_change_list.html'
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
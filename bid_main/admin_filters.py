@@ -0,0 +1,196 @@
+"""
+List filters for the admin.
+
+The user admin shows cached facet counts in its filters.
+
+The number of users per role, per group, and per flag are counted in a few
+queries over the entire table, and cached for
+settings.BLENDER_ID_ADMIN_FACET_CACHE_SECONDS by the refresh_admin_facets
+management command; call it regularly to refresh them before they expire.
+Admin requests never count them; until the cache is filled, the filters are
+shown without counts. As the command runs in its own process, this needs a
+cache that is shared between processes.
+
+The role and group filters filter on the through table of the relation,
+so that the user table doesn't have to be joined and made DISTINCT.
+"""
+
+import datetime
+import typing
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Sum, When
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from . import models, role_registry
+
+CACHE_KEY = 'bid_main.admin_filters:facets'
+FLAGS = ('is_active', 'is_staff', 'is_superuser')
+
+
+def compute_facets() -> dict:
+    """Counts the users per role, group and flag."""
+
+    def count_per(through, related_field: str) -> typing.Dict[int, int]:
+        return dict(through.objects
+                    .order_by()
+                    .values_list(f'{related_field}_id')
+                    .annotate(Count('user_id')))
+
+    aggregates = {flag: Sum(Case(When(**{flag: True}, then=1), default=0,
+                                 output_field=IntegerField()))
+                  for flag in FLAGS}
+    facets = models.User.objects.aggregate(
+        total=Count('id'),
+        confirmed_email=Count('confirmed_email_at'),
+        **aggregates)
+    # Sum() over an empty table is None.
+    facets = {key: value or 0 for key, value in facets.items()}
+    # Roles keep count of their members themselves.
+    facets['roles'] = dict(models.Role.objects.values_list('id', 'member_count'))
+    facets['groups'] = count_per(models.User.groups.through, 'group')
+    return facets
+
+
+def refresh_facets() -> dict:
+    facets = compute_facets()
+    cache.set(CACHE_KEY, facets, settings.BLENDER_ID_ADMIN_FACET_CACHE_SECONDS)
+    return facets
+
+
+def get_facets() -> typing.Optional[dict]:
+    """Returns the cached facet counts, or None when they are not cached."""
+    return cache.get(CACHE_KEY)
+
+
+def with_count(label, count: int) -> str:
+    return f'{label} ({count})'
+
+
+class ThroughTableFilter(admin.SimpleListFilter):
+    """Filters users on a many-to-many relation by the related object's ID.
+
+    Subclasses set the name of the relation as 'field_name'. The parameter
+    name is the same as that of Django's own filter for the relation.
+    """
+
+    field_name = ''
+
+    def __init__(self, request, params, model, model_admin):
+        self.field = model._meta.get_field(self.field_name)
+        super().__init__(request, params, model, model_admin)
+
+    def related_objects(self) -> typing.Iterable[typing.Tuple[int, str]]:
+        """Returns (ID, label) tuples of the related objects to filter on."""
+        return [(obj.pk, str(obj)) for obj in self.field.related_model._default_manager.all()]
+
+    def lookups(self, request, model_admin):
+        facets = get_facets()
+        if facets is None:
+            return [(str(pk), label) for pk, label in self.related_objects()]
+        counts = facets[self.field_name]
+        return [(str(pk), with_count(label, counts.get(pk, 0)))
+                for pk, label in self.related_objects()]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        user_ids = self.field.remote_field.through.objects \
+            .filter(**{f'{self.field.m2m_reverse_field_name()}_id': self.value()}) \
+            .values(f'{self.field.m2m_field_name()}_id')
+        return queryset.filter(pk__in=user_ids)
+
+
+class RoleFilter(ThroughTableFilter):
+    title = _('roles')
+    parameter_name = 'roles__id__exact'
+    field_name = 'roles'
+
+    def related_objects(self):
+        # Same order and labels as the Role model, without querying it.
+        roles = sorted(role_registry.get_registry().roles.values(),
+                       key=lambda role: (not role.is_active, role.name))
+        return [(role.id, role.name if role.is_active else f'{role.name} [inactive]')
+                for role in roles]
+
+
+class GroupFilter(ThroughTableFilter):
+    title = _('groups')
+    parameter_name = 'groups__id__exact'
+    field_name = 'groups'
+
+    def related_objects(self):
+        return [(group.pk, str(group)) for group in Group.objects.order_by('name')]
+
+
+class ConfirmedEmailFilter(admin.SimpleListFilter):
+    title = _('confirmed email')
+    parameter_name = 'confirmed_email'
+
+    def lookups(self, request, model_admin):
+        facets = get_facets()
+        if facets is None:
+            return [('yes', _('Confirmed')), ('no', _('Not confirmed'))]
+        return [
+            ('yes', with_count(_('Confirmed'), facets['confirmed_email'])),
+            ('no', with_count(_('Not confirmed'), facets['total'] - facets['confirmed_email'])),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() not in {'yes', 'no'}:
+            return queryset
+        return queryset.filter(confirmed_email_at__isnull=self.value() == 'no')
+
+
+class FacetBooleanFieldListFilter(admin.BooleanFieldListFilter):
+    """Boolean filter that shows the number of users for each choice.
+
+    Only works for the fields listed in FLAGS.
+    """
+
+    def choices(self, changelist):
+        facets = get_facets()
+        if facets is None:
+            yield from super().choices(changelist)
+            return
+        true_count = facets[self.field_path]
+        counts = {'1': true_count, '0': facets['total'] - true_count}
+        # The choices are 'All', 'Yes' and 'No', as the flags are not nullable.
+        for lookup, choice in zip((None, '1', '0'), super().choices(changelist)):
+            if lookup is not None:
+                choice['display'] = with_count(choice['display'], counts[lookup])
+            yield choice
+
+
+class ExpiryFilter(admin.SimpleListFilter):
+    """Filters access tokens on when they expire, in non-overlapping buckets."""
+
+    title = _('expires')
+    parameter_name = 'expires'
+
+    # (value, label, start in days from now, end in days from now)
+    buckets = [
+        ('expired', _('Expired'), None, 0),
+        ('day', _('Within a day'), 0, 1),
+        ('week', _('Within a week'), 1, 7),
+        ('month', _('Within a month'), 7, 31),
+        ('later', _('Later'), 31, None),
+    ]
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, label, _start, _end in self.buckets]
+
+    def queryset(self, request, queryset):
+        for value, _label, start, end in self.buckets:
+            if value != self.value():
+                continue
+            now = timezone.now()
+            if start is not None:
+                queryset = queryset.filter(expires__gte=now + datetime.timedelta(days=start))
+            if end is not None:
+                queryset = queryset.filter(expires__lt=now + datetime.timedelta(days=end))
+        return queryset
@@ -7,4 +7,4 @@ class BidMainConfig(AppConfig):
 
     def ready(self):
         # noinspection PyUnresolvedReferences
-        from . import signals
+        from . import checks, signals
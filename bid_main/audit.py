@@ -0,0 +1,80 @@
+"""
+Writing of audit log entries (Django's admin LogEntry).
+
+Depending on settings.BLENDER_ID_AUDIT_LOG_MODE, entries are:
+
+- 'sync': saved immediately, as part of the current transaction.
+- 'buffered': collected in a write buffer and saved in batches, which
+  saves a query per logged action. Entries may be lost when the process
+  is killed. With AuditLogMiddleware, entries logged during a request are
+  only added to the buffer when the response is not an error.
+"""
+
+import itertools
+import threading
+import typing
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+from .write_buffer import WriteBuffer
+
+_local = threading.local()
+_entry_numbers = itertools.count()
+
+
+class AuditLogBuffer(WriteBuffer):
+    def write(self, items: typing.Dict[int, LogEntry]):
+        LogEntry.objects.bulk_create(items.values())
+
+
+buffer = AuditLogBuffer(max_items=settings.BLENDER_ID_AUDIT_LOG_BUFFER_SIZE,
+                        max_age=settings.BLENDER_ID_AUDIT_LOG_BUFFER_SECONDS)
+
+
+def log_action(*, user_id: int, obj: models.Model, action_flag: int, change_message: str = '',
+               object_repr: str = None):
+    """Logs an action performed on obj, like LogEntry.objects.log_action().
+
+    object_repr defaults to str(obj).
+    """
+
+    entry = LogEntry(
+        user_id=user_id,
+        # The content type is cached by the ContentType manager.
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=str(obj.pk),
+        object_repr=(str(obj) if object_repr is None else object_repr)[:200],
+        action_flag=action_flag,
+        change_message=change_message,
+    )
+
+    if settings.BLENDER_ID_AUDIT_LOG_MODE != 'buffered':
+        entry.save()
+        return
+
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.append(entry)
+    else:
+        buffer.add(next(_entry_numbers), entry)
+
+
+class AuditLogMiddleware:
+    """Discards the audit log entries of failed requests, see the 'buffered' mode."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.pending = []
+        try:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                for entry in _local.pending:
+                    buffer.add(next(_entry_numbers), entry)
+        finally:
+            _local.pending = None
+        return response
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from . import user_cache
+
+UserModel = get_user_model()
+
+
+class CachingModelBackend(ModelBackend):
+    """ModelBackend that gets users from the user cache.
+
+    See bid_main.user_cache.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None:
+            # Stop here; ModelBackend is only listed for sessions from before
+            # this backend, and would check the password a second time.
+            raise PermissionDenied()
+        return user
+
+    def get_user(self, user_id):
+        try:
+            user = user_cache.get_user(user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
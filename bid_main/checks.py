@@ -0,0 +1,30 @@
+"""
+System checks for settings that only work with a shared cache.
+"""
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Error, Tags, register
+
+# Cache backends that are not shared between processes.
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def has_shared_cache() -> bool:
+    return settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_user_cache(app_configs, **kwargs):
+    if not settings.BLENDER_ID_USER_CACHE_SECONDS or has_shared_cache():
+        return []
+    return [Error(
+        'BLENDER_ID_USER_CACHE_SECONDS requires a cache that is shared between processes.',
+        hint='Configure CACHES to use memcached or Redis, or set '
+             'BLENDER_ID_USER_CACHE_SECONDS to 0. With a per-process cache, changes to a user '
+             '(such as deactivation) do not reach the other processes.',
+        id='bid_main.E001',
+    )]
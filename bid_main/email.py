@@ -0,0 +1,188 @@
+"""
+Outbox for email.
+
+Set EMAIL_BACKEND to 'bid_main.email.OutboxEmailBackend' to store outgoing
+email in the database, instead of sending it during the request. The
+send_queued_email management command sends it through the backend in
+settings.BLENDER_ID_EMAIL_DELIVERY_BACKEND, reusing one connection for a
+batch of messages, and retrying failed messages with exponential backoff.
+
+Email queued in a transaction is only sent when that transaction commits.
+Messages are claimed before they are sent, so that multiple senders don't
+send the same message twice. Messages that could not be delivered are kept
+until they are removed by the prune_outgoing_email management command.
+
+Messages are stored as JSON with their subject, body, addresses, headers,
+alternatives and attachments; see message_to_dict().
+"""
+
+import base64
+import datetime
+import json
+import logging
+import typing
+
+from django.conf import settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+log = logging.getLogger(__name__)
+
+# How long a claimed message is left alone by other senders. A message that
+# is neither sent nor failed in this time, because its sender died, is tried
+# again after it.
+CLAIM_DURATION = datetime.timedelta(minutes=10)
+
+
+def message_to_dict(message: EmailMessage) -> dict:
+    """Returns the message as JSON-compatible dict.
+
+    :raises ValueError: for attachments that are MIME objects, which are
+        not supported.
+    """
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError('MIME attachments cannot be queued')
+        filename, content, mimetype = attachment
+        if isinstance(content, bytes):
+            attachments.append([filename, base64.b64encode(content).decode('ascii'),
+                                mimetype, True])
+        else:
+            attachments.append([filename, content, mimetype, False])
+
+    return {
+        'subject': str(message.subject),
+        'body': str(message.body),
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'alternatives': [list(alternative)
+                         for alternative in getattr(message, 'alternatives', [])],
+        'attachments': attachments,
+    }
+
+
+def message_from_dict(data: dict) -> EmailMessage:
+    """Returns the message stored by message_to_dict()."""
+
+    attachments = [(filename, base64.b64decode(content) if is_binary else content, mimetype)
+                   for filename, content, mimetype, is_binary in data['attachments']]
+    return EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(alternative) for alternative in data['alternatives']],
+        attachments=attachments,
+    )
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Stores email in the outbox (the OutgoingEmail model)."""
+
+    def send_messages(self, email_messages: typing.List[EmailMessage]) -> int:
+        from .models import OutgoingEmail
+
+        outgoing = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            outgoing.append(OutgoingEmail(
+                subject=message.subject[:255],
+                recipients=', '.join(message.recipients()),
+                message=json.dumps(message_to_dict(message)),
+            ))
+        OutgoingEmail.objects.bulk_create(outgoing)
+        return len(outgoing)
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    """Returns the delay before retrying after this many failed attempts."""
+    return datetime.timedelta(
+        seconds=settings.BLENDER_ID_EMAIL_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def send_queued(batch_size: int) -> typing.Tuple[int, int]:
+    """Sends at most batch_size queued messages that are due.
+
+    :returns: the number of sent and failed messages.
+    """
+    from .models import OutgoingEmail
+
+    batch = _claim(OutgoingEmail.objects
+                   .filter(next_attempt__lte=timezone.now())
+                   .order_by('next_attempt')[:batch_size])
+    if not batch:
+        return 0, 0
+
+    sent_ids = []
+    failed = 0
+    connection = get_connection(settings.BLENDER_ID_EMAIL_DELIVERY_BACKEND)
+    try:
+        for outgoing in batch:
+            try:
+                message = message_from_dict(json.loads(outgoing.message))
+                # Keeps the connection open for the rest of the batch; this
+                # does nothing when it is open already.
+                connection.open()
+                connection.send_messages([message])
+            except Exception as ex:
+                log.warning('Error sending email %d %s: %s', outgoing.id, outgoing, ex)
+                failed += 1
+                _record_failure(outgoing, ex)
+                # The error may have broken the connection; the next message
+                # reopens it, instead of failing on the broken one.
+                _close_quietly(connection)
+            else:
+                sent_ids.append(outgoing.id)
+    finally:
+        _close_quietly(connection)
+
+    OutgoingEmail.objects.filter(id__in=sent_ids).delete()
+    return len(sent_ids), failed
+
+
+def _claim(candidates) -> list:
+    """Returns the candidates that weren't claimed by another sender in the meantime.
+
+    Claiming postpones the next attempt, without holding any locks while
+    sending. It only succeeds when the next attempt is still as it was read.
+    """
+    from .models import OutgoingEmail
+
+    claimed_until = timezone.now() + CLAIM_DURATION
+    claimed = []
+    for outgoing in candidates:
+        if OutgoingEmail.objects \
+                .filter(id=outgoing.id, next_attempt=outgoing.next_attempt) \
+                .update(next_attempt=claimed_until):
+            outgoing.next_attempt = claimed_until
+            claimed.append(outgoing)
+    return claimed
+
+
+def _record_failure(outgoing, error: Exception):
+    outgoing.attempts += 1
+    outgoing.last_error = str(error)
+    if outgoing.attempts >= settings.BLENDER_ID_EMAIL_MAX_ATTEMPTS:
+        log.error('Giving up on sending email %d %s', outgoing.id, outgoing)
+        outgoing.next_attempt = None
+    else:
+        outgoing.next_attempt = timezone.now() + retry_delay(outgoing.attempts)
+    outgoing.save(update_fields=['attempts', 'last_error', 'next_attempt'])
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception as ex:
+        log.debug('Error closing email connection: %s', ex)
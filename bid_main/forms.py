@@ -1,4 +1,5 @@
 import logging
+import re
 
 from django import forms
 from django.contrib.auth import forms as auth_forms
@@ -27,6 +28,49 @@ class UserRegistrationForm(BootstrapModelFormMixin, forms.ModelForm):
         model = User
         fields = ['full_name', 'email', ]
 
+    def validate_unique(self):
+        """Skips the query for email uniqueness.
+
+        The unique index on the email address is checked on insert instead,
+        see RegistrationView.
+        """
+        exclude = self._get_validation_exclusions() + ['email']
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except forms.ValidationError as ex:
+            self._update_errors(ex)
+
+    def add_email_exists_error(self):
+        self.add_error('email', User._meta.get_field('email').error_messages['unique'])
+
+
+class PasswordResetForm(auth_forms.PasswordResetForm):
+    """Also sends password reset links to users without a usable password.
+
+    Newly registered users don't have a password until they follow the link
+    in their verification email; they should be able to request a new link.
+    """
+
+    # Set by send_to_user(), to skip looking up the user by email.
+    _users = None
+
+    def get_users(self, email):
+        if self._users is not None:
+            return self._users
+        return User.objects.filter(email__iexact=email, is_active=True)
+
+    def send_to_user(self, user, **kwargs):
+        """Sends the email sent by save() to the given user, without looking them up.
+
+        Takes the same keyword arguments as save().
+        """
+        self.cleaned_data = {'email': user.email}
+        self._users = [user]
+        try:
+            self.save(**kwargs)
+        finally:
+            self._users = None
+
 
 class SetInitialPasswordForm(BootstrapModelFormMixin, auth_forms.SetPasswordForm):
     """Used when setting password in user registration flow.
@@ -70,3 +114,33 @@ class AppRevokeTokensForm(forms.Form):
     """Form for revoking OAuth tokens for a specific application."""
 
     app_id = forms.IntegerField(widget=forms.HiddenInput)
+
+
+class RoleMembersForm(forms.Form):
+    """Email addresses of users to grant a role to, or revoke it from."""
+
+    action = forms.ChoiceField(
+        choices=[('grant', _('Grant the role')), ('revoke', _('Revoke the role'))],
+        initial='grant', widget=forms.RadioSelect)
+    emails = forms.CharField(
+        required=False, widget=forms.Textarea(attrs={'rows': 10, 'cols': 60}),
+        help_text=_('Email addresses, separated by newlines, commas or spaces.'))
+    email_file = forms.FileField(
+        required=False, label=_('Email file'),
+        help_text=_('Text or CSV file with email addresses, in UTF-8.'))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        text = cleaned_data.get('emails') or ''
+        email_file = cleaned_data.get('email_file')
+        if email_file:
+            try:
+                text += '\n' + email_file.read().decode('utf8')
+            except UnicodeDecodeError:
+                raise forms.ValidationError(_('The email file should be UTF-8 encoded text.'))
+
+        emails = [email for email in re.split(r'[\s,;"]+', text) if email]
+        if not emails:
+            raise forms.ValidationError(_('Give at least one email address.'))
+        cleaned_data['email_list'] = list(dict.fromkeys(emails))
+        return cleaned_data
@@ -0,0 +1,85 @@
+"""
+Bookkeeping of user logins.
+
+Every login updates last_login, last_login_ip, current_login_ip and
+login_count of the user. To avoid concurrent logins waiting on each other's
+row locks, these updates are buffered in memory and written in batches,
+unless settings.BLENDER_ID_LOGIN_STATS_MODE is 'sync'.
+"""
+
+import datetime
+import typing
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, F, GenericIPAddressField, IntegerField, \
+    Value, When
+from django.utils import timezone
+
+from . import user_cache
+from .write_buffer import WriteBuffer
+
+
+class Login(typing.NamedTuple):
+    """Pending bookkeeping of one or more logins of a user."""
+    count: int
+    last_login: datetime.datetime
+    current_ip: typing.Optional[str]
+    # The IP of the previous login is only known when multiple logins are
+    # pending; otherwise it is the current IP in the database.
+    previous_ip: typing.Optional[str] = None
+    has_previous: bool = False
+
+
+class LoginStatsBuffer(WriteBuffer):
+    def merge(self, pending: Login, value: Login) -> Login:
+        return Login(count=pending.count + value.count,
+                     last_login=value.last_login,
+                     current_ip=value.current_ip,
+                     previous_ip=pending.current_ip,
+                     has_previous=True)
+
+    def write(self, items: typing.Dict[int, Login]):
+        from .models import User
+
+        def per_user(value_for, output_field):
+            whens = []
+            for user_id, login in items.items():
+                value = value_for(login)
+                if not hasattr(value, 'resolve_expression'):
+                    # Without an output field, values reach the database driver unconverted.
+                    value = Value(value, output_field=output_field)
+                whens.append(When(pk=user_id, then=value))
+            return Case(*whens, output_field=output_field)
+
+        def previous_ip(login: Login):
+            if login.has_previous:
+                return login.previous_ip
+            return F('current_login_ip')
+
+        now = timezone.now()
+        # MySQL assigns columns from left to right, so last_login_ip has to
+        # be assigned before current_login_ip.
+        User.objects.filter(pk__in=list(items)).update(
+            login_count=F('login_count') + per_user(lambda login: login.count, IntegerField()),
+            last_login=per_user(lambda login: login.last_login, DateTimeField()),
+            last_login_ip=per_user(previous_ip, GenericIPAddressField()),
+            current_login_ip=per_user(lambda login: login.current_ip, GenericIPAddressField()),
+            last_update=now,
+        )
+        user_cache.invalidate_many(items, now)
+
+
+buffer = LoginStatsBuffer(max_items=settings.BLENDER_ID_LOGIN_STATS_BUFFER_SIZE,
+                          max_age=settings.BLENDER_ID_LOGIN_STATS_BUFFER_SECONDS)
+
+
+def record_login(user, request=None):
+    """Records that the user logged in just now."""
+
+    ip_address = request.META.get('REMOTE_ADDR') if request is not None else None
+    login = Login(count=1, last_login=timezone.now(), current_ip=ip_address or None)
+
+    if settings.BLENDER_ID_LOGIN_STATS_MODE == 'sync':
+        buffer.write({user.pk: login})
+    else:
+        buffer.add(user.pk, login)
@@ -0,0 +1,44 @@
+"""
+Moves old entries of the admin log to the LogEntryArchive model.
+
+This keeps the admin log table small, and the admin history pages fast.
+Set up a cron job to call this regularly.
+"""
+
+import datetime
+
+from django.contrib.admin.models import LogEntry
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from bid_main.models import LogEntryArchive
+
+FIELDS = ['id', 'action_time', 'user_id', 'content_type_id', 'object_id', 'object_repr',
+          'action_flag', 'change_message']
+
+
+class Command(BaseCommand):
+    help = 'Moves old admin log entries to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365,
+                            help='Archive entries older than this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of entries to move per transaction.')
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - datetime.timedelta(days=options['days'])
+        old_entries = LogEntry.objects.filter(action_time__lt=threshold).order_by('id')
+
+        moved = 0
+        while True:
+            with transaction.atomic():
+                batch = list(old_entries.values(*FIELDS)[:options['batch_size']])
+                if not batch:
+                    break
+                LogEntryArchive.objects.bulk_create(LogEntryArchive(**row) for row in batch)
+                LogEntry.objects.filter(id__in=[row['id'] for row in batch]).delete()
+            moved += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} admin log entries.'))
@@ -0,0 +1,53 @@
+"""
+Measures how many registrations per second a single process can handle.
+
+Registrations are performed through RegistrationView, in a transaction
+that is rolled back afterwards, so this can be run against any database.
+Email is handled by the configured EMAIL_BACKEND.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from bid_main.views import RegistrationView
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures the number of registrations per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100,
+                            help='Number of users to register.')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        factory = RequestFactory()
+        view = RegistrationView.as_view()
+        prefix = f'benchmark-{time.time():.0f}'
+
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                for i in range(count):
+                    request = factory.post('/register/', {
+                        'full_name': f'Benchmark User {i}',
+                        'email': f'{prefix}-{i}@example.com',
+                    })
+                    response = view(request)
+                    if response.status_code != 302:
+                        raise ValueError(f'Registration {i} failed: {response.status_code}')
+                duration = time.perf_counter() - start
+                raise Rollback()
+        except Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Registered {count} users in {duration:.2f} seconds, '
+            f'{count / duration:.1f} registrations per second.'))
@@ -0,0 +1,33 @@
+"""
+Removes expired sessions from the database in batches.
+
+This is an alternative for Django's 'clearsessions' command, which removes
+all expired sessions in a single query, locking the session table for a
+long time when there are many.
+"""
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Removes expired sessions from the database in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of sessions to remove per query.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by('expire_date')
+
+        total = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            Session.objects.filter(session_key__in=keys).delete()
+            total += len(keys)
+
+        self.stdout.write(self.style.SUCCESS(f'Removed {total} expired sessions.'))
@@ -0,0 +1,27 @@
+"""
+Removes email that was given up on, see bid_main.email.
+
+It is kept for a while so that failed deliveries can be inspected in the
+admin. Set up a cron job to call this regularly.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bid_main.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Removes email that was given up on'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Remove given up email created more than this many days ago.')
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - datetime.timedelta(days=options['days'])
+        count, _ = OutgoingEmail.objects.filter(next_attempt__isnull=True,
+                                                created__lt=threshold).delete()
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} outgoing email messages.'))
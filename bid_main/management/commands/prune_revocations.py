@@ -0,0 +1,26 @@
+"""
+Removes old entries from the token revocation log.
+
+Entries only need to be kept as long as the revoked tokens could otherwise
+still be valid. Set up a cron job to call this regularly.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bid_main.models import TokenRevocation
+
+
+class Command(BaseCommand):
+    help = 'Removes old entries from the token revocation log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=366,
+                            help='Remove entries older than this many days.')
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - datetime.timedelta(days=options['days'])
+        count, _ = TokenRevocation.objects.filter(revoked_at__lt=threshold).delete()
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} token revocations.'))
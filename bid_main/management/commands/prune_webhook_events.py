@@ -0,0 +1,27 @@
+"""
+Removes webhook events that were given up on, see bid_main.webhooks.
+
+They are kept for a while so that failed deliveries can be inspected in the
+admin. Set up a cron job to call this regularly.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bid_main.models import WebhookEvent
+
+
+class Command(BaseCommand):
+    help = 'Removes webhook events that were given up on'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Remove given up events created more than this many days ago.')
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - datetime.timedelta(days=options['days'])
+        count, _ = WebhookEvent.objects.filter(next_attempt__isnull=True,
+                                               created__lt=threshold).delete()
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} webhook events.'))
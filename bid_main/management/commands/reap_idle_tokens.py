@@ -0,0 +1,62 @@
+"""
+Revokes access tokens that have not been used for a long time.
+
+Tokens that were never used count as idle from their creation date, but
+not from before last_used was introduced: tokens that predate it may well
+be in use, they just haven't been validated since then.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.utils import timezone
+
+from bid_main import token_usage, tokens
+from bid_main.models import OAuth2AccessToken
+
+# The migration that added OAuth2AccessToken.last_used.
+LAST_USED_MIGRATION = ('bid_main', '0012_accesstoken_last_used')
+
+
+def tracking_since() -> datetime.datetime:
+    """Returns when the last use of tokens started to be tracked."""
+    app, name = LAST_USED_MIGRATION
+    applied = MigrationRecorder.Migration.objects \
+        .filter(app=app, name=name) \
+        .values_list('applied', flat=True) \
+        .first()
+    return applied or timezone.now()
+
+
+class Command(BaseCommand):
+    help = 'Revokes access tokens that have not been used for a long time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180,
+                            help='Revoke tokens not used in this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of tokens to revoke per transaction.')
+        parser.add_argument('--dry-run', action='store_true', default=False,
+                            help='Only count the idle tokens, do not revoke them.')
+
+    def handle(self, *args, **options):
+        # Make sure recent usage is in the database before deciding what is idle.
+        token_usage.buffer.flush()
+
+        threshold = timezone.now() - datetime.timedelta(days=options['days'])
+        idle_filter = Q(last_used__lt=threshold)
+        if tracking_since() < threshold:
+            idle_filter |= Q(last_used__isnull=True, created__lt=threshold)
+        idle = OAuth2AccessToken.objects.filter(idle_filter)
+
+        if options['dry_run']:
+            self.stdout.write(f'There are {idle.count()} idle tokens.')
+            return
+
+        total = tokens.revoke_access_tokens(
+            idle, batch_size=options['batch_size'],
+            progress=lambda count: self.stdout.write(f'Revoked {count} idle tokens so far.'))
+
+        self.stdout.write(self.style.SUCCESS(f'Revoked {total} idle tokens.'))
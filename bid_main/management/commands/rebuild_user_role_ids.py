@@ -0,0 +1,51 @@
+"""
+Rebuilds the cached role IDs of users from their roles.
+
+The cached role IDs are kept in sync by signals, but changes that bypass
+them (such as raw SQL) can make them outdated. Users whose cached role IDs
+were wrong are handled as if their roles just changed.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bid_main import user_cache, webhooks
+from bid_main.models import User
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the cached role IDs of users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of users to check per query.')
+
+    def handle(self, *args, **options):
+        through = User.roles.through
+        last_id = 0
+        fixed = 0
+        while True:
+            users = list(User.objects
+                         .filter(id__gt=last_id)
+                         .order_by('id')
+                         .values_list('id', 'cached_role_ids')
+                         [:options['batch_size']])
+            if not users:
+                break
+            last_id = users[-1][0]
+
+            role_ids = {user_id: set() for user_id, _ in users}
+            for user_id, role_id in through.objects.filter(user_id__in=role_ids.keys()) \
+                    .values_list('user_id', 'role_id'):
+                role_ids[user_id].add(role_id)
+            outdated = {user_id for user_id, cached in users if cached != role_ids[user_id]}
+            if not outdated:
+                continue
+
+            now = timezone.now()
+            User.objects.sync_role_ids(outdated, last_update=now)
+            user_cache.invalidate_many(outdated, now)
+            webhooks.enqueue_user_changes(outdated)
+            fixed += len(outdated)
+
+        self.stdout.write(self.style.SUCCESS(f'Fixed the cached role IDs of {fixed} users.'))
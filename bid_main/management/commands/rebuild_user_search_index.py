@@ -0,0 +1,40 @@
+"""
+Rebuilds the search index of users, see bid_main.search.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bid_main import search
+from bid_main.models import User, UserSearchTerm
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the user search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of users to index per transaction.')
+
+    def handle(self, *args, **options):
+        last_id = 0
+        indexed = 0
+        while True:
+            users = list(User.objects
+                         .filter(id__gt=last_id)
+                         .order_by('id')
+                         .values_list('id', 'email', 'full_name')
+                         [:options['batch_size']])
+            if not users:
+                break
+            with transaction.atomic():
+                user_ids = [user_id for user_id, _, _ in users]
+                UserSearchTerm.objects.filter(user_id__in=user_ids).delete()
+                UserSearchTerm.objects.bulk_create(
+                    UserSearchTerm(user_id=user_id, term=term)
+                    for user_id, email, full_name in users
+                    for term in search.terms_for(email, full_name))
+            last_id = user_ids[-1]
+            indexed += len(users)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} users.'))
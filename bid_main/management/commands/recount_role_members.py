@@ -0,0 +1,32 @@
+"""
+Recounts the members of every role, and fixes Role.member_count.
+
+The counts are kept up to date by signals, but changes that bypass them
+(such as raw SQL) can make them drift. Set up a cron job to call this
+once in a while.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from bid_main.models import Role, User
+
+
+class Command(BaseCommand):
+    help = 'Recounts the members of every role'
+
+    def handle(self, *args, **options):
+        counts = dict(User.roles.through.objects
+                      .order_by()
+                      .values_list('role_id')
+                      .annotate(Count('user_id')))
+        fixed = 0
+        for role_id, name, member_count in Role.objects.values_list('id', 'name', 'member_count'):
+            count = counts.get(role_id, 0)
+            if count == member_count:
+                continue
+            self.stdout.write(f'Role {name!r} has {count} members, not {member_count}.')
+            Role.objects.filter(pk=role_id).update(member_count=count)
+            fixed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Fixed the member count of {fixed} roles.'))
@@ -0,0 +1,18 @@
+"""
+Refreshes the cached user counts shown in the user admin filters.
+
+Set up a cron job to call this more often than
+settings.BLENDER_ID_ADMIN_FACET_CACHE_SECONDS.
+"""
+
+from django.core.management.base import BaseCommand
+
+from bid_main import admin_filters
+
+
+class Command(BaseCommand):
+    help = 'Refreshes the cached user counts of the admin filters'
+
+    def handle(self, *args, **options):
+        facets = admin_filters.refresh_facets()
+        self.stdout.write(self.style.SUCCESS(f'Counted {facets["total"]} users.'))
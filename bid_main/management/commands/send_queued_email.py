@@ -0,0 +1,36 @@
+"""
+Sends email from the outbox, see bid_main.email.
+
+Either set up a cron job to call this regularly, or keep it running with
+--loop. Multiple instances can run at the same time.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from bid_main import email
+
+
+class Command(BaseCommand):
+    help = 'Sends queued email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of messages to send over one connection.')
+        parser.add_argument('--loop', action='store_true', default=False,
+                            help='Keep running, checking for new email every --sleep seconds.')
+        parser.add_argument('--sleep', type=float, default=5.0,
+                            help='Number of seconds to wait for new email with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = email.send_queued(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} messages, {failed} failed.')
+            if sent + failed >= options['batch_size']:
+                # There may be more messages waiting.
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,36 @@
+"""
+Delivers webhook events, see bid_main.webhooks.
+
+Either set up a cron job to call this regularly, or keep it running with
+--loop. Only run one instance at a time.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from bid_main import webhooks
+
+
+class Command(BaseCommand):
+    help = 'Delivers webhook events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Maximum number of events to send per request.')
+        parser.add_argument('--loop', action='store_true', default=False,
+                            help='Keep running, checking for new events every --sleep seconds.')
+        parser.add_argument('--sleep', type=float, default=5.0,
+                            help='Number of seconds to wait for new events with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            delivered, failed = webhooks.send_queued(options['batch_size'])
+            if delivered or failed:
+                self.stdout.write(f'Delivered {delivered} events, {failed} failed.')
+            if delivered:
+                # There may be more events waiting.
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
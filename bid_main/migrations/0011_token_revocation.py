@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 16:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0010_oauth2_model_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('token_id', models.BigIntegerField(help_text='ID of the revoked access token.')),
+                ('token_digest', models.CharField(help_text='Hex-encoded SHA-256 digest of the revoked access token.', max_length=64)),
+                ('user_id', models.IntegerField(blank=True, help_text='ID of the user owning the revoked access token.', null=True)),
+                ('revoked_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'OAuth2 token revocation',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 16:23
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0011_token_revocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='oauth2accesstoken',
+            name='last_used',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Approximate date & time at which this token was last validated. See bid_main.token_usage for how precise this is.', null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 16:39
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0013_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogEntryArchive',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('action_time', models.DateTimeField(db_index=True)),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('content_type_id', models.IntegerField(blank=True, null=True)),
+                ('object_id', models.TextField(blank=True, null=True)),
+                ('object_repr', models.CharField(max_length=200)),
+                ('action_flag', models.PositiveSmallIntegerField()),
+                ('change_message', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'archived log entry',
+                'verbose_name_plural': 'archived log entries',
+            },
+        ),
+    ]
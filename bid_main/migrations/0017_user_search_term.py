@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 16:50
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def terms_for(email, full_name):
+    # Copy of bid_main.search.terms_for() at the time of this migration.
+    email = email.lower()
+    terms = {email, *email.split('@', 1)}
+    terms.update(full_name.lower().split())
+    return {term[:80] for term in terms if term}
+
+
+def fill_search_terms(apps, schema_editor):
+    User = apps.get_model('bid_main', 'User')
+    UserSearchTerm = apps.get_model('bid_main', 'UserSearchTerm')
+
+    last_id = 0
+    while True:
+        users = list(User.objects
+                     .filter(id__gt=last_id)
+                     .order_by('id')
+                     .values_list('id', 'email', 'full_name')
+                     [:BATCH_SIZE])
+        if not users:
+            break
+        UserSearchTerm.objects.bulk_create(
+            UserSearchTerm(user_id=user_id, term=term)
+            for user_id, email, full_name in users
+            for term in terms_for(email, full_name))
+        last_id = users[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0016_webhooks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=80)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(fill_search_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 16:58
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0017_user_search_term'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='oauth2accesstoken',
+            index=models.Index(fields=['application', 'expires'], name='token_application_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oauth2accesstoken',
+            index=models.Index(fields=['expires'], name='token_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 17:07
+from __future__ import unicode_literals
+
+import itertools
+
+import bid_main.models
+from django.db import migrations
+
+
+def fill_cached_role_ids(apps, schema_editor):
+    User = apps.get_model('bid_main', 'User')
+    through = User.roles.through
+    rows = through.objects.order_by('user_id').values_list('user_id', 'role_id').iterator()
+    for user_id, user_rows in itertools.groupby(rows, key=lambda row: row[0]):
+        role_ids = ','.join(str(role_id) for role_id in sorted(row[1] for row in user_rows))
+        User.objects.filter(pk=user_id).update(cached_role_ids=role_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0018_access_token_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='cached_role_ids',
+            field=bid_main.models.IntegerSetField(blank=True, default=frozenset, editable=False, help_text='IDs of the roles of this user, kept in sync with the roles field to look them up without a join.'),
+        ),
+        migrations.RunPython(fill_cached_role_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 17:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_role_management(apps, schema_editor):
+    Role = apps.get_model('bid_main', 'Role')
+    RoleManagement = apps.get_model('bid_main', 'RoleManagement')
+
+    edges = {}
+    for manager_id, managed_id in Role.may_manage_roles.through.objects.values_list(
+            'from_role_id', 'to_role_id'):
+        edges.setdefault(manager_id, set()).add(managed_id)
+
+    rows = []
+    for manager_id in edges:
+        reached = set()
+        todo = list(edges[manager_id])
+        while todo:
+            role_id = todo.pop()
+            if role_id not in reached:
+                reached.add(role_id)
+                todo.extend(edges.get(role_id, ()))
+        rows.extend(RoleManagement(manager_id=manager_id, managed_id=managed_id)
+                    for managed_id in reached)
+    RoleManagement.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0019_user_cached_role_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleManagement',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('managed', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bid_main.Role')),
+                ('manager', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bid_main.Role')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='rolemanagement',
+            unique_together=set([('manager', 'managed')]),
+        ),
+        migrations.RunPython(fill_role_management, migrations.RunPython.noop),
+    ]
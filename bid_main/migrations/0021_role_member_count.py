@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-19 17:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def count_role_members(apps, schema_editor):
+    User = apps.get_model('bid_main', 'User')
+    Role = apps.get_model('bid_main', 'Role')
+    counts = User.roles.through.objects.order_by().values_list('role_id') \
+        .annotate(models.Count('user_id'))
+    for role_id, count in counts:
+        Role.objects.filter(pk=role_id).update(member_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bid_main', '0020_role_management'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='role',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of users with this role, kept up to date by signals. See the recount_role_members management command.'),
+        ),
+        migrations.RunPython(count_role_members, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+import hashlib
+import typing
+
+from django.db import models, transaction
 from django.conf import settings
 from django.core.mail import send_mail
 from django.contrib.auth.models import PermissionsMixin
@@ -8,6 +11,8 @@ from django.utils.translation import ugettext_lazy as _
 
 import oauth2_provider.models as oa2_models
 
+from . import role_registry
+
 
 class UserManager(BaseUserManager):
     """UserManager that doesn't use a username, but an email instead."""
@@ -42,6 +47,57 @@ class UserManager(BaseUserManager):
 
         return self._create_user(email, password, **extra_fields)
 
+    @transaction.atomic()
+    def sync_role_ids(self, user_ids: typing.Iterable[int], *, chunk_size: int = 500,
+                      **fields) -> typing.Dict[int, typing.FrozenSet[int]]:
+        """Stores the current role IDs of the users in their cached_role_ids field.
+
+        Other fields given as keyword arguments are updated as well. Returns
+        the role IDs per user.
+        """
+        user_ids = sorted(user_ids)
+        through = self.model.roles.through
+        role_ids = {user_id: set() for user_id in user_ids}
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            # Lock the users, so that concurrent role changes of the same user
+            # wait for each other, instead of each storing only their own change.
+            # The through table is read with a locking read too, as that sees
+            # rows committed after this transaction started.
+            list(self.select_for_update().filter(pk__in=chunk).values_list('pk', flat=True))
+            for user_id, role_id in through.objects.select_for_update() \
+                    .filter(user_id__in=chunk).values_list('user_id', 'role_id'):
+                role_ids[user_id].add(role_id)
+
+            field = self.model._meta.get_field('cached_role_ids')
+            whens = [models.When(pk=user_id,
+                                 then=models.Value(field.get_prep_value(role_ids[user_id])))
+                     for user_id in chunk]
+            self.filter(pk__in=chunk).update(
+                cached_role_ids=models.Case(*whens, output_field=models.TextField()),
+                **fields)
+        return {user_id: frozenset(ids) for user_id, ids in role_ids.items()}
+
+
+class IntegerSetField(models.TextField):
+    """Set of integers, stored as sorted, comma-separated text."""
+
+    def from_db_value(self, value, expression, connection, context):
+        return self.to_python(value)
+
+    def to_python(self, value) -> typing.FrozenSet[int]:
+        if not value:
+            return frozenset()
+        if isinstance(value, str):
+            return frozenset(int(item) for item in value.split(','))
+        return frozenset(value)
+
+    def get_prep_value(self, value) -> str:
+        return ','.join(str(item) for item in sorted(self.to_python(value)))
+
+    def value_to_string(self, obj) -> str:
+        return self.get_prep_value(self.value_from_object(obj))
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     """
@@ -63,6 +119,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     full_name = models.CharField(_('full name'), max_length=80, blank=True, db_index=True)
     roles = models.ManyToManyField('Role', related_name='users', blank=True)
+    cached_role_ids = IntegerSetField(
+        default=frozenset, blank=True, editable=False,
+        help_text=_('IDs of the roles of this user, kept in sync with the roles field '
+                    'to look them up without a join.'))
 
     confirmed_email_at = models.DateTimeField(
         null=True, blank=True,
@@ -102,13 +162,65 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _('user')
         verbose_name_plural = _('users')
+        indexes = [
+            # For the feed of changed users, see bid_api.views.user_changes.
+            models.Index(fields=['last_update', 'id'], name='user_last_update_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Field values as loaded from the database, to find changed fields on save.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if hasattr(self, '_loaded_values'):
+            self._snapshot_fields(fields)
+
+    def _snapshot_fields(self, field_names=None):
+        if field_names is None:
+            field_names = [f.attname for f in self._meta.concrete_fields
+                           if f.attname in self.__dict__]
+        self._loaded_values.update((name, getattr(self, name)) for name in field_names)
+
+    def get_changed_fields(self) -> typing.Optional[typing.List[str]]:
+        """Returns the names of the fields that changed since loading.
+
+        Returns None when this instance was not loaded from the database.
+        """
+        if not hasattr(self, '_loaded_values'):
+            return None
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                # Deferred fields that have not been loaded cannot have changed.
+                continue
+            if field.attname not in self._loaded_values or \
+                    getattr(self, field.attname) != self._loaded_values[field.attname]:
+                changed.append(field.attname)
+        return changed
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not kwargs.get('force_insert'):
+            # Only UPDATE the fields that changed, and nothing at all when nothing changed.
+            update_fields = self.get_changed_fields()
+            if update_fields is not None and not update_fields:
+                return
+
         self.last_update = timezone.now()
+        if update_fields is not None:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'last_update'}
+        super().save(*args, **kwargs)
 
-        if kwargs.get('update_fields') is not None:
-            kwargs['update_fields'].append('last_update')
-        return super().save(*args, **kwargs)
+        if update_fields is None:
+            # Track changes from now on, also for newly created users.
+            self._loaded_values = {}
+        elif not hasattr(self, '_loaded_values'):
+            return
+        self._snapshot_fields(update_fields)
 
     def get_full_name(self):
         """
@@ -131,9 +243,18 @@ class User(AbstractBaseUser, PermissionsMixin):
     def has_confirmed_email(self):
         return self.confirmed_email_at is not None
 
+    def get_role_ids(self) -> typing.FrozenSet[int]:
+        """Returns the IDs of the user's roles, without querying the database."""
+        return self.cached_role_ids
+
     @property
     def role_names(self):
-        return {role.name for role in self.roles.all()}
+        return role_registry.get_registry().names(self.get_role_ids())
+
+    def public_roles(self) -> typing.Dict[str, bool]:
+        """Returns the user's active, public roles, as returned by the /api/user endpoint."""
+        names = role_registry.get_registry().public_names(self.get_role_ids())
+        return {name: True for name in names}
 
 
 class SettingValueField(models.CharField):
@@ -177,6 +298,10 @@ class Role(models.Model):
     may_manage_roles = models.ManyToManyField(
         'Role', related_name='managers', blank=True,
         help_text='Users with this role will be able to grant or revoke these roles to any other user.')
+    member_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text='Number of users with this role, kept up to date by signals. '
+                  'See the recount_role_members management command.')
 
     class Meta:
         ordering = ['-is_active', 'name']
@@ -186,13 +311,77 @@ class Role(models.Model):
             return self.name
         return '%s [inactive]' % self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            # The member count is only changed with F() expressions; writing
+            # the value loaded into this instance would undo concurrent changes.
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name != 'member_count']
+        super().save(*args, **kwargs)
+
+
+class RoleManagement(models.Model):
+    """Transitive closure of Role.may_manage_roles, see bid_main.role_management."""
+
+    manager = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='+')
+    managed = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = [('manager', 'managed')]
+
 
 class OAuth2AccessToken(oa2_models.AbstractAccessToken):
     class Meta:
         verbose_name = 'OAuth2 access token'
+        indexes = [
+            # For the admin filters on application and expiry date.
+            models.Index(fields=['application', 'expires'], name='token_application_expires_idx'),
+            models.Index(fields=['expires'], name='token_expires_idx'),
+        ]
 
     host_label = models.CharField(max_length=255, unique=False, blank=True)
     subclient = models.CharField(max_length=255, unique=False, blank=True)
+    last_used = models.DateTimeField(
+        null=True, blank=True, db_index=True,
+        help_text='Approximate date & time at which this token was last validated. '
+                  'See bid_main.token_usage for how precise this is.')
+
+    @transaction.atomic()
+    def revoke(self):
+        # Bulk deletes record their revocations through bid_main.tokens.delete_access_tokens().
+        if not self.is_expired():
+            TokenRevocation.for_token(self).save()
+        super().revoke()
+
+
+class TokenRevocation(models.Model):
+    """Log of revoked access tokens.
+
+    Services that cache token validations can poll this log (through the
+    /api/revocations endpoint) to learn which tokens were revoked since they
+    last checked. The ID of this model acts as sequence number.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    token_id = models.BigIntegerField(help_text='ID of the revoked access token.')
+    token_digest = models.CharField(
+        max_length=64,
+        help_text='Hex-encoded SHA-256 digest of the revoked access token.')
+    user_id = models.IntegerField(null=True, blank=True,
+                                  help_text='ID of the user owning the revoked access token.')
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'OAuth2 token revocation'
+
+    @classmethod
+    def for_token(cls, token: OAuth2AccessToken, **fields) -> 'TokenRevocation':
+        """Returns an unsaved TokenRevocation for the given access token."""
+        return cls(token_id=token.id,
+                   token_digest=hashlib.sha256(token.token.encode()).hexdigest(),
+                   user_id=token.user_id,
+                   **fields)
 
 
 class OAuth2RefreshToken(oa2_models.AbstractRefreshToken):
@@ -205,3 +394,89 @@ class OAuth2Application(oa2_models.AbstractApplication):
         verbose_name = 'OAuth2 application'
 
     url = models.URLField(unique=False, blank=True)
+
+
+class Webhook(models.Model):
+    """Notifies an application of changes to users.
+
+    See bid_main.webhooks.
+    """
+
+    application = models.ForeignKey(OAuth2Application, on_delete=models.CASCADE,
+                                    related_name='webhooks')
+    url = models.URLField()
+    secret = models.CharField(
+        max_length=128,
+        help_text='Shared secret, used to sign the payload with HMAC-SHA256.')
+    is_active = models.BooleanField(default=True)
+    description = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f'Webhook {self.url} of {self.application}'
+
+
+class WebhookEvent(models.Model):
+    """Change of a user, still to be sent to a webhook."""
+
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='events')
+    # Not a foreign key, as deleted users should be reported too.
+    user_id = models.IntegerField()
+    created = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(
+        null=True, blank=True, default=timezone.now, db_index=True,
+        help_text='When to (re)try sending this event. None when delivery was given up.')
+    last_error = models.TextField(blank=True)
+
+
+class OutgoingEmail(models.Model):
+    """Email waiting to be sent by the send_queued_email management command.
+
+    See bid_main.email.
+    """
+
+    created = models.DateTimeField(default=timezone.now)
+    subject = models.CharField(max_length=255, blank=True)
+    recipients = models.TextField(blank=True, help_text='Comma-separated, for display only.')
+    message = models.TextField(help_text='The message as JSON, see bid_main.email.')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(
+        null=True, blank=True, default=timezone.now, db_index=True,
+        help_text='When to (re)try sending this email. None when delivery was given up.')
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'outgoing email'
+        ordering = ['created']
+
+    def __str__(self):
+        return f'{self.subject!r} to {self.recipients}'
+
+
+class LogEntryArchive(models.Model):
+    """Old entries of Django's admin log, moved by the archive_admin_log command.
+
+    Has the same fields as django.contrib.admin.models.LogEntry, without
+    foreign keys, so that deleting users or content types doesn't touch
+    this table.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    action_time = models.DateTimeField(db_index=True)
+    user_id = models.IntegerField(db_index=True)
+    content_type_id = models.IntegerField(null=True, blank=True)
+    object_id = models.TextField(null=True, blank=True)
+    object_repr = models.CharField(max_length=200)
+    action_flag = models.PositiveSmallIntegerField()
+    change_message = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'archived log entry'
+        verbose_name_plural = 'archived log entries'
+
+
+class UserSearchTerm(models.Model):
+    """Index for searching users in the admin, see bid_main.search."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=80, db_index=True)
@@ -0,0 +1,36 @@
+"""
+OAuth2 validator that understands our own token formats.
+
+Set as OAUTH2_PROVIDER['OAUTH2_VALIDATOR_CLASS'] in the settings.
+"""
+
+from oauth2_provider import oauth2_validators
+
+from . import tokens, token_usage
+
+
+class OAuth2Validator(oauth2_validators.OAuth2Validator):
+    def validate_bearer_token(self, token, scopes, request):
+        """Validates all our token formats.
+
+        This does not support token introspection on another server, as the
+        default implementation does; we are the authentication server.
+        """
+        if not token:
+            return False
+
+        queryset = tokens.AccessToken.objects.select_related('application', 'user')
+        try:
+            access_token = tokens.find_access_token(token, queryset)
+        except tokens.AccessToken.DoesNotExist:
+            return False
+
+        if not access_token.is_valid(scopes):
+            return False
+        token_usage.record_use(access_token)
+
+        request.client = access_token.application
+        request.user = access_token.user
+        request.scopes = scopes
+        request.access_token = access_token
+        return True
@@ -0,0 +1,67 @@
+"""
+Granting and revoking a role for many users at once.
+
+Users are looked up and changed in chunks, so that the queries stay within
+the limits databases put on the number of query parameters. Changes go
+through the role's users relation, so that the cached role IDs, member
+counts, and webhooks are taken care of by the usual signals.
+"""
+
+import typing
+
+from django.db import transaction
+
+CHUNK_SIZE = 500
+
+
+class Result(typing.NamedTuple):
+    changed: int
+    unchanged: int
+    unknown_emails: typing.List[str]
+
+
+def _chunks(items: list):
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def find_users(emails: typing.Iterable[str]) \
+        -> typing.Tuple[typing.Dict[str, int], typing.List[str]]:
+    """Returns the user IDs by email address, and the unknown email addresses.
+
+    Email addresses are matched case-insensitively, like MySQL does, and
+    returned as given.
+    """
+    from .models import User
+
+    emails = list(dict.fromkeys(emails))
+    found = {}
+    for chunk in _chunks(emails):
+        found.update((email.lower(), user_id) for email, user_id
+                     in User.objects.filter(email__in=chunk).values_list('email', 'id'))
+    user_ids = {email: found[email.lower()] for email in emails if email.lower() in found}
+    unknown = [email for email in emails if email.lower() not in found]
+    return user_ids, unknown
+
+
+@transaction.atomic()
+def change_members(role, emails: typing.Iterable[str], *, grant: bool) -> Result:
+    """Grants the role to, or revokes it from, the users with the given email addresses."""
+    from .models import User
+
+    user_ids, unknown = find_users(emails)
+    # Different spellings of an email address refer to the same user.
+    user_ids = sorted(set(user_ids.values()))
+    through = User.roles.through
+    changed = 0
+    for chunk in _chunks(user_ids):
+        members = set(through.objects.filter(role=role, user_id__in=chunk)
+                      .values_list('user_id', flat=True))
+        if grant:
+            to_change = [user_id for user_id in chunk if user_id not in members]
+            role.users.add(*to_change)
+        else:
+            to_change = [user_id for user_id in chunk if user_id in members]
+            role.users.remove(*to_change)
+        changed += len(to_change)
+    return Result(changed=changed, unchanged=len(user_ids) - changed, unknown_emails=unknown)
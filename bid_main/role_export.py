@@ -0,0 +1,69 @@
+"""
+Streaming export of the members of a role.
+
+Members are read in batches ordered by user ID, each batch continuing
+after the last ID of the previous one, so that memory use stays constant
+regardless of the number of members, on every database backend.
+"""
+
+import csv
+import json
+import typing
+
+FIELDS = ('id', 'email', 'full_name', 'is_active', 'date_joined')
+
+
+def iter_members(role_id: int, *, batch_size: int = 2000) -> typing.Iterator[tuple]:
+    """Yields a tuple of FIELDS values for every member of the role."""
+    from .models import User
+
+    member_ids = User.roles.through.objects.filter(role_id=role_id).values('user_id')
+    last_id = 0
+    while True:
+        batch = list(User.objects
+                     .filter(id__in=member_ids, id__gt=last_id)
+                     .order_by('id')
+                     .values_list(*FIELDS)
+                     [:batch_size])
+        yield from batch
+        if len(batch) < batch_size:
+            break
+        last_id = batch[-1][0]
+
+
+class _Echo:
+    """File-like object that returns what is written, for csv.writer."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+# Spreadsheets treat cells starting with these as formulas.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def escape_formula(value):
+    """Prevents a user-controlled value from being run as a spreadsheet formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(rows: typing.Iterable[tuple]) -> typing.Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([escape_formula(value) for value in row])
+
+
+def jsonl_lines(rows: typing.Iterable[tuple]) -> typing.Iterator[str]:
+    for row in rows:
+        record = dict(zip(FIELDS, row))
+        record['date_joined'] = record['date_joined'].isoformat()
+        yield json.dumps(record) + '\n'
+
+
+FORMATS = {
+    'csv': ('text/csv', csv_lines),
+    'jsonl': ('application/x-ndjson', jsonl_lines),
+}
@@ -0,0 +1,78 @@
+"""
+Transitive closure of which roles may manage which other roles.
+
+Role.may_manage_roles forms a graph: users with a role may grant and
+revoke the roles it manages, and through delegation also the roles that
+those roles manage, and so on. The RoleManagement model contains a row for
+every (manager, managed) pair in that graph, so that checking whether a
+role may be managed is a single indexed lookup, regardless of the length
+of the delegation chain.
+
+The rows are updated by signals (see bid_main.signals) whenever
+may_manage_roles changes or a role is deleted. Only the rows of the roles
+that (transitively) manage the changed role are recomputed.
+"""
+
+import collections
+import typing
+
+from django.db import transaction
+
+
+def _load_edges() -> typing.Dict[int, typing.Set[int]]:
+    from .models import Role
+
+    edges = collections.defaultdict(set)
+    for manager_id, managed_id in Role.may_manage_roles.through.objects.values_list(
+            'from_role_id', 'to_role_id'):
+        edges[manager_id].add(managed_id)
+    return edges
+
+
+def _reachable(edges: typing.Dict[int, typing.Set[int]], start: int) -> typing.Set[int]:
+    """Returns the IDs of the roles that the start role manages, directly or not."""
+    reached = set()
+    todo = list(edges.get(start, ()))
+    while todo:
+        role_id = todo.pop()
+        if role_id in reached:
+            continue
+        reached.add(role_id)
+        todo.extend(edges.get(role_id, ()))
+    return reached
+
+
+def managers_of(role_ids: typing.Iterable[int]) -> typing.Set[int]:
+    """Returns the IDs of the roles that manage any of the given roles."""
+    from .models import RoleManagement
+
+    return set(RoleManagement.objects.filter(managed_id__in=role_ids)
+               .values_list('manager_id', flat=True))
+
+
+@transaction.atomic()
+def update(role_ids: typing.Iterable[int]):
+    """Recomputes the rows of roles whose may_manage_roles changed.
+
+    This also recomputes the rows of the roles that manage them, as they
+    inherit the change.
+    """
+    from .models import RoleManagement
+
+    role_ids = set(role_ids)
+    affected = role_ids | managers_of(role_ids)
+    edges = _load_edges()
+
+    RoleManagement.objects.filter(manager_id__in=affected).delete()
+    RoleManagement.objects.bulk_create(
+        RoleManagement(manager_id=manager_id, managed_id=managed_id)
+        for manager_id in affected
+        for managed_id in _reachable(edges, manager_id))
+
+
+def manageable_role_ids(role_ids: typing.Iterable[int]) -> typing.Set[int]:
+    """Returns the IDs of the roles that users with the given roles may manage."""
+    from .models import RoleManagement
+
+    return set(RoleManagement.objects.filter(manager_id__in=role_ids)
+               .values_list('managed_id', flat=True))
@@ -0,0 +1,83 @@
+"""
+Process-wide registry of roles.
+
+Every process keeps all roles in memory, see bid_main.versioned_registry.
+Changes that bypass the signals, such as QuerySet.update(), should call
+bump_version() themselves.
+"""
+
+import typing
+
+from . import versioned_registry
+
+VERSION_KEY = 'bid_main.role_registry:version'
+
+
+class RoleInfo(typing.NamedTuple):
+    id: int
+    name: str
+    is_active: bool
+    is_badge: bool
+    is_public: bool
+    # IDs of the roles that users with this role may grant and revoke,
+    # see bid_main.role_management.
+    may_manage: typing.FrozenSet[int]
+
+
+class Registry:
+    def __init__(self, roles: typing.Iterable[RoleInfo]):
+        self.roles = {role.id: role for role in roles}
+
+    def __contains__(self, role_id: int) -> bool:
+        return role_id in self.roles
+
+    def __getitem__(self, role_id: int) -> RoleInfo:
+        return self.roles[role_id]
+
+    def get_many(self, role_ids: typing.Iterable[int]) -> typing.List[RoleInfo]:
+        """Returns the roles with the given IDs, ignoring unknown IDs."""
+        return [self.roles[role_id] for role_id in role_ids if role_id in self.roles]
+
+    def names(self, role_ids: typing.Iterable[int]) -> typing.Set[str]:
+        return {role.name for role in self.get_many(role_ids)}
+
+    def public_names(self, role_ids: typing.Iterable[int]) -> typing.Set[str]:
+        """Returns the names of the roles that are active and public."""
+        return {role.name for role in self.get_many(role_ids)
+                if role.is_active and role.is_public}
+
+    def manageable(self, role_ids: typing.Iterable[int]) -> typing.Dict[str, RoleInfo]:
+        """Returns the roles that users with the given roles may manage, by name."""
+        return {self.roles[managed_id].name: self.roles[managed_id]
+                for role in self.get_many(role_ids)
+                for managed_id in role.may_manage
+                if managed_id in self.roles}
+
+
+def load() -> Registry:
+    from .models import Role, RoleManagement
+
+    # Includes the roles that may be managed through delegation.
+    may_manage = {}
+    for manager_id, managed_id in RoleManagement.objects.values_list('manager_id', 'managed_id'):
+        may_manage.setdefault(manager_id, set()).add(managed_id)
+
+    roles = [RoleInfo(id=role_id, name=name, is_active=is_active, is_badge=is_badge,
+                      is_public=is_public, may_manage=frozenset(may_manage.get(role_id, ())))
+             for role_id, name, is_active, is_badge, is_public
+             in Role.objects.values_list('id', 'name', 'is_active', 'is_badge', 'is_public')]
+    return Registry(roles)
+
+
+_registry = versioned_registry.VersionedRegistry(
+    VERSION_KEY, load, 'BLENDER_ID_ROLE_REGISTRY_MAX_AGE')
+
+
+def bump_version():
+    """Makes all processes reload their registry."""
+    _registry.bump_version()
+
+
+def get_registry() -> Registry:
+    """Returns the registry, reloading it when it is outdated or too old."""
+    return _registry.get()
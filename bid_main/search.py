@@ -0,0 +1,65 @@
+"""
+Searching users by email address and name.
+
+Searching with LIKE '%term%' cannot use an index, so every search would
+scan the entire user table. Instead, the lowercased email address, its
+local part and domain, and the words of the full name are stored as
+UserSearchTerm rows, and searched by prefix.
+
+The terms are updated when a user is saved with a different email address
+or name, and existing users are indexed by migration 0017. Run the
+rebuild_user_search_index management command to index users that were
+changed in other ways, such as QuerySet.update().
+"""
+
+import typing
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+MAX_TERM_LENGTH = 80
+
+
+def terms_for(email: str, full_name: str) -> typing.Set[str]:
+    """Returns the search terms for a user."""
+    email = email.lower()
+    terms = {email, *email.split('@', 1)}
+    terms.update(full_name.lower().split())
+    return {term[:MAX_TERM_LENGTH] for term in terms if term}
+
+
+def needs_update(user, update_fields=None) -> bool:
+    """Returns whether the search terms of a just-saved user are outdated."""
+    if update_fields is not None and not {'email', 'full_name'} & set(update_fields):
+        return False
+    loaded_values = getattr(user, '_loaded_values', None)
+    if not loaded_values or 'email' not in loaded_values or 'full_name' not in loaded_values:
+        return True
+    return (loaded_values['email'], loaded_values['full_name']) != (user.email, user.full_name)
+
+
+@transaction.atomic()
+def update_terms(user):
+    from .models import UserSearchTerm
+
+    UserSearchTerm.objects.filter(user=user).delete()
+    UserSearchTerm.objects.bulk_create(
+        UserSearchTerm(user=user, term=term)
+        for term in terms_for(user.email, user.full_name))
+
+
+def search(queryset: QuerySet, text: str) -> QuerySet:
+    """Filters the users on all words of the text.
+
+    Every word should be the start of a search term of the user.
+    """
+    from .models import UserSearchTerm
+
+    for word in text.lower().split():
+        # The terms are lowercase already; istartswith avoids MySQL's LIKE BINARY,
+        # which cannot use the index on the case-insensitive column.
+        matching = UserSearchTerm.objects \
+            .filter(term__istartswith=word[:MAX_TERM_LENGTH]) \
+            .values('user_id')
+        queryset = queryset.filter(id__in=matching)
+    return queryset
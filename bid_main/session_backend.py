@@ -0,0 +1,90 @@
+"""
+Cached, database-backed sessions that avoid unnecessary database writes.
+
+Like Django's 'cached_db' session engine, sessions are read from the cache,
+and only from the database when they are not in the cache. Unlike that
+engine, saving a session only writes to the database when its data has
+actually changed, or when the expiry date in the database lags behind by
+more than settings.BLENDER_ID_SESSION_EXPIRY_REFRESH_SECONDS. As a result,
+a session can expire up to that many seconds early when it drops out of
+the cache.
+
+Use a cache that is shared between all processes (such as memcached) for
+this to be effective.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db, db
+from django.core.exceptions import SuspiciousOperation
+from django.utils import timezone
+from django.utils.encoding import force_text
+
+KEY_PREFIX = 'bid_main.session_backend'
+
+
+class SessionStore(cached_db.SessionStore):
+    """Cached, database backed sessions with write coalescing.
+
+    The cache contains a dict with the session data and the expiry date of
+    the session in the database.
+    """
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded_data = None
+        self._db_expiry = None
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            # Some backends (e.g. memcache) raise an exception on invalid
+            # cache keys. If this happens, reset the session. See #17810.
+            entry = None
+
+        if entry is None:
+            try:
+                s = self.model.objects.get(
+                    session_key=self.session_key,
+                    expire_date__gt=timezone.now()
+                )
+                entry = {'data': self.decode(s.session_data), 'db_expiry': s.expire_date}
+            except (self.model.DoesNotExist, SuspiciousOperation) as e:
+                if isinstance(e, SuspiciousOperation):
+                    logger = logging.getLogger('django.security.%s' % e.__class__.__name__)
+                    logger.warning(force_text(e))
+                self._session_key = None
+                return {}
+            self._cache.set(self.cache_key, entry, self.get_expiry_age(expiry=s.expire_date))
+
+        data = entry['data']
+        self._loaded_data = self.serializer().dumps(data)
+        self._db_expiry = entry['db_expiry']
+        return data
+
+    def _needs_db_write(self, data, expiry: datetime.datetime) -> bool:
+        if self._loaded_data is None or self._db_expiry is None:
+            return True
+        if self.serializer().dumps(data) != self._loaded_data:
+            return True
+        refresh = datetime.timedelta(seconds=settings.BLENDER_ID_SESSION_EXPIRY_REFRESH_SECONDS)
+        return expiry - self._db_expiry >= refresh
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        data = self._get_session(no_load=must_create)
+        expiry = self.get_expiry_date()
+        if must_create or self._needs_db_write(data, expiry):
+            # Skip cached_db.SessionStore.save(), as it caches the data in another format.
+            db.SessionStore.save(self, must_create)
+            self._loaded_data = self.serializer().dumps(data)
+            self._db_expiry = expiry
+
+        entry = {'data': data, 'db_expiry': self._db_expiry}
+        self._cache.set(self.cache_key, entry, self.get_expiry_age())
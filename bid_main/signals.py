@@ -1,7 +1,18 @@
 import logging
 
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_logged_in
 from django.core.signals import got_request_exception
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.signals import post_delete, pre_delete, pre_save, post_save, m2m_changed
 from django.dispatch import receiver
+from django.utils import timezone
+
+import loginas.settings
+
+from . import (login_stats, models, role_management, role_registry, search, tokens,
+               user_cache, user_settings, webhooks)
 
 log = logging.getLogger(__name__)
 
@@ -9,3 +20,260 @@ log = logging.getLogger(__name__)
 @receiver(got_request_exception)
 def log_exception(sender, **kwargs):
     log.exception('uncaught exception occurred')
+
+
+# Replaced by our own bookkeeping, which doesn't save the user on every login.
+user_logged_in.disconnect(update_last_login)
+
+# Views in which django-loginas switches users. It doesn't update the last
+# login of the user switched to, and neither do we.
+LOGINAS_VIEW_NAMES = {'loginas-user-login', 'loginas-logout', 'bid_main:logout'}
+
+
+@receiver(user_logged_in)
+def record_login(sender, request, user, **kwargs):
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match and resolver_match.view_name in LOGINAS_VIEW_NAMES \
+            and not loginas.settings.UPDATE_LAST_LOGIN:
+        return
+    login_stats.record_login(user, request)
+
+
+# Revocations are recorded by the code that deletes access tokens (see
+# bid_main.tokens.delete_access_tokens), rather than by a post_delete
+# receiver, which would make Django load and signal every deleted token.
+# Only deletions that cascade from other objects are recorded here.
+@receiver(pre_delete, sender=models.User)
+@receiver(pre_delete, sender=models.OAuth2Application)
+def log_cascading_token_revocations(sender, instance, **kwargs):
+    related_field = 'user' if sender is models.User else 'application'
+    tokens.record_revocations(
+        models.OAuth2AccessToken.objects.filter(**{related_field: instance}))
+
+
+@receiver(pre_save, sender=models.User)
+def check_user_deactivation(sender, instance: models.User, raw=False, **kwargs):
+    """Marks users that are being deactivated, so that their tokens can be revoked."""
+    if raw or instance.is_active or instance.pk is None:
+        return
+    loaded_values = getattr(instance, '_loaded_values', None)
+    if loaded_values is not None and 'is_active' in loaded_values:
+        instance._is_being_deactivated = loaded_values['is_active']
+        return
+    # Only inactive users that were not loaded from the database are checked,
+    # so this query is rare.
+    instance._is_being_deactivated = sender.objects.filter(
+        pk=instance.pk, is_active=True).exists()
+
+
+@receiver(post_save, sender=models.User)
+def revoke_tokens_of_deactivated_user(sender, instance: models.User, raw=False, **kwargs):
+    if raw or not getattr(instance, '_is_being_deactivated', False):
+        return
+    instance._is_being_deactivated = False
+
+    log.info('User %s was deactivated, revoking their access tokens', instance.email)
+    tokens.delete_access_tokens(models.OAuth2AccessToken.objects.filter(user=instance))
+
+
+@receiver(post_save, sender=models.User)
+def invalidate_cached_user(sender, instance: models.User, **kwargs):
+    user_cache.invalidate(instance.pk, instance.last_update)
+
+
+@receiver(post_delete, sender=models.User)
+def forget_cached_user(sender, instance: models.User, **kwargs):
+    user_cache.invalidate(instance.pk, None)
+
+
+@receiver(post_save, sender=models.User)
+def update_search_terms(sender, instance: models.User, raw=False, update_fields=None, **kwargs):
+    if raw or not search.needs_update(instance, update_fields):
+        return
+    search.update_terms(instance)
+
+
+@receiver(post_save, sender=models.User)
+@receiver(post_delete, sender=models.User)
+def notify_webhooks(sender, instance: models.User, raw=False, **kwargs):
+    if raw:
+        return
+    webhooks.enqueue_user_changes([instance.pk])
+
+
+@receiver(post_save, sender=models.Webhook)
+@receiver(post_delete, sender=models.Webhook)
+def forget_active_webhooks(sender, **kwargs):
+    # Other processes can cache the old state until the transaction commits.
+    webhooks.forget_active_webhooks()
+    transaction.on_commit(webhooks.forget_active_webhooks)
+
+
+@receiver(m2m_changed, sender=models.Role.may_manage_roles.through)
+def update_role_management(sender, instance: models.Role, action, reverse, pk_set, **kwargs):
+    """Keeps the transitive closure of may_manage_roles up to date."""
+    if action == 'pre_clear' and reverse:
+        instance._cleared_manager_ids = set(
+            sender.objects.filter(to_role=instance).values_list('from_role_id', flat=True))
+        return
+    if action not in {'post_add', 'post_remove', 'post_clear'}:
+        return
+
+    if not reverse:
+        changed_ids = {instance.pk}
+    elif action == 'post_clear':
+        changed_ids = getattr(instance, '_cleared_manager_ids', set())
+    else:
+        changed_ids = pk_set or set()
+    if changed_ids:
+        role_management.update(changed_ids)
+
+
+@receiver(pre_delete, sender=models.Role)
+def remember_role_managers(sender, instance: models.Role, **kwargs):
+    # Deleting the role also deletes its closure rows, but not those of the
+    # roles that managed other roles through it.
+    instance._manager_ids = role_management.managers_of([instance.pk])
+
+
+@receiver(post_delete, sender=models.Role)
+def update_role_management_after_delete(sender, instance: models.Role, **kwargs):
+    manager_ids = getattr(instance, '_manager_ids', set())
+    if manager_ids:
+        role_management.update(manager_ids)
+
+
+@receiver(post_save, sender=models.Role)
+@receiver(post_delete, sender=models.Role)
+@receiver(m2m_changed, sender=models.Role.may_manage_roles.through)
+def bump_role_registry_version(sender, action=None, **kwargs):
+    if action is not None and action not in {'post_add', 'post_remove', 'post_clear'}:
+        return
+    # Other processes can load the old roles until the transaction commits.
+    role_registry.bump_version()
+    transaction.on_commit(role_registry.bump_version)
+
+
+@receiver(post_save, sender=models.Setting)
+@receiver(post_delete, sender=models.Setting)
+def bump_user_settings_version(sender, **kwargs):
+    # Other processes can load the old settings until the transaction commits.
+    user_settings.bump_version()
+    transaction.on_commit(user_settings.bump_version)
+
+
+@receiver(m2m_changed, sender=models.User.roles.through)
+@receiver(m2m_changed, sender=models.User.groups.through)
+@receiver(m2m_changed, sender=models.User.user_permissions.through)
+def touch_users_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Bumps last_update of users whose roles, groups, or permissions changed.
+
+    This also invalidates their cached user objects, and updates their
+    cached_role_ids when their roles changed.
+    """
+    if action == 'pre_clear' and reverse:
+        # The affected users are no longer known after clearing. The
+        # through-models name their foreign keys after the related models.
+        related_field = instance._meta.model_name
+        instance._cleared_user_ids = set(sender.objects.filter(**{related_field: instance})
+                                         .values_list('user_id', flat=True))
+        return
+    if action not in {'post_add', 'post_remove', 'post_clear'}:
+        return
+
+    now = timezone.now()
+    if not reverse:
+        user_ids = {instance.pk}
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_user_ids', set())
+    else:
+        user_ids = pk_set or set()
+    if not user_ids:
+        return
+
+    if sender is models.User.roles.through:
+        role_ids = models.User.objects.sync_role_ids(user_ids, last_update=now)
+        webhooks.enqueue_user_changes(user_ids)
+    else:
+        role_ids = None
+        models.User.objects.filter(pk__in=user_ids).update(last_update=now)
+    user_cache.invalidate_many(user_ids, now)
+
+    if not reverse:
+        changed = {'last_update': now}
+        if role_ids is not None:
+            changed['cached_role_ids'] = role_ids[instance.pk]
+        for attname, value in changed.items():
+            setattr(instance, attname, value)
+            if hasattr(instance, '_loaded_values'):
+                instance._loaded_values[attname] = value
+
+
+@receiver(m2m_changed, sender=models.User.roles.through)
+def count_role_members(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keeps Role.member_count up to date."""
+    if action == 'pre_remove':
+        # Django sends all IDs that were asked to be removed, even unrelated ones.
+        if reverse:
+            related = sender.objects.filter(role=instance, user_id__in=pk_set)
+            instance._removed_member_ids = set(related.values_list('user_id', flat=True))
+        else:
+            related = sender.objects.filter(user=instance, role_id__in=pk_set)
+            instance._removed_member_ids = set(related.values_list('role_id', flat=True))
+        return
+    if action == 'pre_clear' and not reverse:
+        related = sender.objects.filter(user=instance)
+        instance._removed_member_ids = set(related.values_list('role_id', flat=True))
+        return
+
+    if action == 'post_add':
+        changed_ids, delta = pk_set or set(), 1
+    elif action in {'post_remove', 'post_clear'}:
+        changed_ids, delta = getattr(instance, '_removed_member_ids', set()), -1
+    else:
+        return
+
+    if not reverse:
+        _add_role_members(changed_ids, delta)
+    elif action == 'post_clear':
+        models.Role.objects.filter(pk=instance.pk).update(member_count=0)
+    else:
+        _add_role_members({instance.pk}, delta * len(changed_ids))
+
+
+@receiver(post_delete, sender=models.User)
+def uncount_role_members(sender, instance: models.User, **kwargs):
+    # Deleting the user deletes the through-table rows without sending m2m_changed.
+    _add_role_members(instance.cached_role_ids, -1)
+
+
+def _add_role_members(role_ids, delta: int):
+    if not role_ids or not delta:
+        return
+    if delta > 0:
+        member_count = F('member_count') + delta
+    else:
+        # Never below zero, even when the count was off. The column is unsigned
+        # on MySQL, which refuses to even compute a negative intermediate value.
+        removed = -delta
+        member_count = Case(When(member_count__gte=removed, then=F('member_count') - removed),
+                            default=Value(0), output_field=PositiveIntegerField())
+    models.Role.objects.filter(pk__in=role_ids).update(member_count=member_count)
+
+
+@receiver(pre_delete, sender=models.Role)
+def remember_role_members(sender, instance: models.Role, **kwargs):
+    # Deleting the role deletes its through-table rows without sending m2m_changed.
+    instance._member_ids = set(models.User.roles.through.objects.filter(role=instance)
+                               .values_list('user_id', flat=True))
+
+
+@receiver(post_delete, sender=models.Role)
+def touch_role_members(sender, instance: models.Role, **kwargs):
+    user_ids = getattr(instance, '_member_ids', set())
+    if not user_ids:
+        return
+    now = timezone.now()
+    models.User.objects.sync_role_ids(user_ids, last_update=now)
+    user_cache.invalidate_many(user_ids, now)
+    webhooks.enqueue_user_changes(user_ids)
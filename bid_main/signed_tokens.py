@@ -0,0 +1,152 @@
+"""
+Signed access tokens that can be verified without calling Blender ID.
+
+These tokens are JSON Web Tokens (RFC 7519) signed with HMAC-SHA256. The
+signing keys are configured in settings.BLENDER_ID_TOKEN_SIGNING_KEYS as a
+mapping from key ID to secret; new tokens are signed with the key
+settings.BLENDER_ID_TOKEN_SIGNING_KEY_ID. To rotate keys, add a new key,
+make it the current one, and remove the old key once all tokens signed
+with it have expired.
+
+Every signed token refers to an access token in the database by its ID
+(the 'jti' claim), so revoking the database token also revokes the signed
+token for services that check for revocation.
+
+As the signing keys are shared with other services, a valid signature does
+not prove that Blender ID issued the token. Blender ID itself only accepts a
+signed token as bearer token when its 'tkh' claim matches the database
+token; see token_hash() and matches_access_token().
+"""
+
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import time
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+ALGORITHM = 'HS256'
+
+
+class InvalidSignedToken(ValueError):
+    """Raised when a signed token cannot be verified."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data: str) -> bytes:
+    padding = '=' * (-len(data) % 4)
+    return base64.urlsafe_b64decode(data + padding)
+
+
+def _signature(key_id: str, signing_input: bytes) -> bytes:
+    try:
+        secret = settings.BLENDER_ID_TOKEN_SIGNING_KEYS[key_id]
+    except KeyError:
+        raise InvalidSignedToken(f'unknown signing key {key_id!r}')
+    return hmac.new(secret.encode(), signing_input, hashlib.sha256).digest()
+
+
+def is_enabled() -> bool:
+    """Returns True when signed tokens can be issued."""
+    return bool(settings.BLENDER_ID_TOKEN_SIGNING_KEY_ID)
+
+
+def is_signed_token(token: str) -> bool:
+    """Cheap check whether the token looks like a signed token.
+
+    This does not verify the token in any way.
+    """
+    return bool(token) and token.count('.') == 2
+
+
+def sign(claims: dict) -> str:
+    """Returns a signed token containing the claims."""
+
+    key_id = settings.BLENDER_ID_TOKEN_SIGNING_KEY_ID
+    header = {'alg': ALGORITHM, 'typ': 'JWT', 'kid': key_id}
+    signing_input = '.'.join(
+        _b64encode(json.dumps(part, separators=(',', ':')).encode())
+        for part in (header, claims))
+    signature = _signature(key_id, signing_input.encode('ascii'))
+    return f'{signing_input}.{_b64encode(signature)}'
+
+
+def verify(token: str) -> dict:
+    """Verifies the token's signature and expiry, and returns its claims.
+
+    :raises InvalidSignedToken: when the token cannot be verified.
+    """
+    try:
+        header_b64, claims_b64, signature_b64 = token.split('.')
+        header = json.loads(_b64decode(header_b64))
+        claims = json.loads(_b64decode(claims_b64))
+        signature = _b64decode(signature_b64)
+    except (ValueError, TypeError) as ex:
+        raise InvalidSignedToken(f'malformed token: {ex}')
+
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise InvalidSignedToken('malformed token')
+    if header.get('alg') != ALGORITHM:
+        raise InvalidSignedToken(f'unsupported algorithm {header.get("alg")!r}')
+
+    key_id = header.get('kid', '')
+    if not isinstance(key_id, str):
+        raise InvalidSignedToken('malformed key ID')
+    expected = _signature(key_id, f'{header_b64}.{claims_b64}'.encode('ascii'))
+    if not hmac.compare_digest(expected, signature):
+        raise InvalidSignedToken('signature mismatch')
+
+    if claims.get('exp', 0) <= time.time():
+        raise InvalidSignedToken('token expired')
+
+    return claims
+
+
+def token_hash(access_token) -> str:
+    """Returns a hash of the database token's secret.
+
+    It is keyed with settings.SECRET_KEY, so services that have the signing
+    keys can neither compute it for other tokens nor learn the secret from it.
+    """
+    return salted_hmac('bid_main.signed_tokens', access_token.token).hexdigest()
+
+
+def matches_access_token(claims: dict, access_token) -> bool:
+    """Returns True when the claims were issued for this database token."""
+    tkh = claims.get('tkh')
+    if not isinstance(tkh, str):
+        return False
+    return hmac.compare_digest(tkh.encode(), token_hash(access_token).encode())
+
+
+def sign_access_token(access_token) -> str:
+    """Returns a signed token for the given database access token."""
+
+    return sign({
+        'jti': str(access_token.id),
+        'tkh': token_hash(access_token),
+        'sub': access_token.user_id,
+        'scope': access_token.scope,
+        'subclient': access_token.subclient,
+        'iat': int(time.time()),
+        'exp': calendar.timegm(access_token.expires.utctimetuple()),
+    })
+
+
+def key_set() -> dict:
+    """Returns the signing keys as JSON Web Key Set (RFC 7517)."""
+
+    return {'keys': [
+        {'kty': 'oct',
+         'alg': ALGORITHM,
+         'use': 'sig',
+         'kid': key_id,
+         'k': _b64encode(secret.encode())}
+        for key_id, secret in sorted(settings.BLENDER_ID_TOKEN_SIGNING_KEYS.items())
+    ]}
@@ -0,0 +1,273 @@
+from datetime import timedelta
+import io
+
+from django.contrib import admin
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+import oauth2_provider.models as oa2_models
+
+from bid_main import models, tokens
+from bid_main.admin import revoke_tokens
+
+UserModel = get_user_model()
+Application = oa2_models.get_application_model()
+
+
+class UserChangeListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = UserModel.objects.create_superuser('admin@user.com', '123456')
+        self.client.login(email='admin@user.com', password='123456')
+
+        role = models.Role.objects.create(name='cloud_subscriber')
+        self.users = [UserModel.objects.create_user(f'user{i:02}@example.com') for i in range(30)]
+        for user in self.users:
+            user.roles.add(role)
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:bid_main_user_changelist'), params)
+        self.assertEqual(200, response.status_code)
+        return response.context['cl']
+
+    def test_keyset_pages(self):
+        seen = []
+        cl = self.changelist()
+        self.assertTrue(cl.keyset)
+        while True:
+            seen.extend(user.email for user in cl.result_list)
+            if not cl.has_next_page:
+                break
+            cl = self.changelist(after=cl.next_cursor)
+
+        expected = UserModel.objects.order_by('-last_update', '-id').values_list('email', flat=True)
+        self.assertEqual(list(expected), seen)
+
+    def test_ordering_by_column(self):
+        # Ordering by the email column (the first in list_display).
+        cl = self.changelist(o='1')
+        self.assertTrue(cl.keyset)
+        cl = self.changelist(o='1', after=cl.next_cursor)
+        self.assertEqual('user11@example.com', cl.result_list[0].email)
+
+    def test_next_page_link(self):
+        response = self.client.get(reverse('admin:bid_main_user_changelist'))
+        cl = response.context['cl']
+        self.assertContains(response, f'href="{cl.get_next_page_url()}"'.replace('&', '&amp;'))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('admin:bid_main_user_changelist'), {'after': 'nonsense'})
+        self.assertEqual(302, response.status_code)
+
+    def test_role_names_without_queries(self):
+        self.changelist()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin:bid_main_user_changelist'))
+        # Role IDs are cached on the users, role names come from the role registry.
+        role_queries = [q['sql'] for q in ctx.captured_queries
+                        if '"bid_main_user_roles"' in q['sql'] or '"bid_main_role"' in q['sql']]
+        self.assertFalse(role_queries)
+        self.assertContains(response, '<td class="field-role_names">cloud_subscriber</td>',
+                            count=12)
+
+    def test_count_cached(self):
+        cl = self.changelist(is_active__exact='1')
+        self.assertEqual(31, cl.result_count)
+
+        UserModel.objects.create_user('new@example.com')
+        cl = self.changelist(is_active__exact='1')
+        self.assertEqual(31, cl.result_count)
+
+
+class UserFilterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = UserModel.objects.create_superuser('admin@user.com', '123456')
+        self.client.login(email='admin@user.com', password='123456')
+
+        self.role = models.Role.objects.create(name='cloud_subscriber')
+        models.Role.objects.create(name='cloud_demo')
+        for i in range(3):
+            user = UserModel.objects.create_user(f'user{i}@example.com')
+            user.roles.add(self.role)
+        call_command('refresh_admin_facets', stdout=io.StringIO())
+
+    def get(self, **params):
+        response = self.client.get(reverse('admin:bid_main_user_changelist'), params)
+        self.assertEqual(200, response.status_code)
+        return response
+
+    def test_role_filter(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(roles__id__exact=str(self.role.pk))
+        self.assertEqual(3, response.context['cl'].result_count)
+        self.assertContains(response, 'cloud_subscriber (3)')
+        self.assertContains(response, 'cloud_demo (0)')
+
+        user_queries = [q['sql'] for q in ctx.captured_queries
+                        if 'FROM "bid_main_user" ' in q['sql']]
+        self.assertTrue(user_queries)
+        for sql in user_queries:
+            self.assertNotIn('DISTINCT', sql)
+            self.assertNotIn('JOIN', sql)
+
+    def test_flag_and_confirmed_filters(self):
+        response = self.get(is_superuser__exact='1')
+        self.assertEqual(1, response.context['cl'].result_count)
+        self.assertContains(response, 'Yes (1)')
+        self.assertContains(response, 'No (3)')
+
+        response = self.get(confirmed_email='no')
+        self.assertEqual(4, response.context['cl'].result_count)
+        self.assertContains(response, 'Not confirmed (4)')
+
+    def test_facets_cached(self):
+        self.get()
+        UserModel.objects.create_user('new@example.com').roles.add(self.role)
+        self.assertContains(self.get(), 'cloud_subscriber (3)')
+
+        call_command('refresh_admin_facets', stdout=io.StringIO())
+        self.assertContains(self.get(), 'cloud_subscriber (4)')
+
+    def test_facets_not_cached(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get()
+        self.assertContains(response, '>cloud_subscriber</a>')
+        self.assertContains(response, '>Not confirmed</a>')
+        self.assertNotContains(response, 'Yes (')
+        # The counts are left to the refresh_admin_facets command.
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'SUM(' in q['sql']])
+
+
+class UserSearchTest(TestCase):
+    def setUp(self):
+        self.admin = UserModel.objects.create_superuser('admin@user.com', '123456')
+        self.client.login(email='admin@user.com', password='123456')
+        self.user = UserModel.objects.create_user('harry.dresden@example.com',
+                                                  full_name='Harry Blackstone Dresden')
+        UserModel.objects.create_user('harriet@blender.org', full_name='Harriet Jones')
+
+    def search(self, query):
+        response = self.client.get(reverse('admin:bid_main_user_changelist'), {'q': query})
+        self.assertEqual(200, response.status_code)
+        return sorted(user.email for user in response.context['cl'].result_list)
+
+    def test_terms(self):
+        terms = set(models.UserSearchTerm.objects.filter(user=self.user)
+                    .values_list('term', flat=True))
+        self.assertEqual({'harry.dresden@example.com', 'harry.dresden', 'example.com',
+                          'harry', 'blackstone', 'dresden'}, terms)
+
+    def test_email_prefix(self):
+        self.assertEqual(['harry.dresden@example.com'], self.search('Harry.D'))
+        self.assertEqual(['harriet@blender.org'], self.search('harriet@ble'))
+        self.assertEqual(['harriet@blender.org'], self.search('blender.org'))
+
+    def test_name_words(self):
+        self.assertEqual(['harriet@blender.org', 'harry.dresden@example.com'],
+                         self.search('harr'))
+        self.assertEqual(['harry.dresden@example.com'], self.search('harr dres'))
+        self.assertEqual([], self.search('resden'))
+
+    def test_terms_updated_on_save(self):
+        self.user.full_name = 'Harry Copperfield'
+        self.user.save()
+        self.assertEqual([], self.search('dresden'))
+        self.assertEqual(['harry.dresden@example.com'], self.search('copper'))
+
+        # Saving other fields leaves the terms alone.
+        user = UserModel.objects.get(pk=self.user.pk)
+        user.is_staff = True
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_rebuild_command(self):
+        models.UserSearchTerm.objects.all().delete()
+        call_command('rebuild_user_search_index', '--batch-size', '2', stdout=io.StringIO())
+        self.assertEqual(['harry.dresden@example.com'], self.search('dresden'))
+
+
+class AccessTokenAdminTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = UserModel.objects.create_superuser('admin@user.com', '123456')
+        self.client.login(email='admin@user.com', password='123456')
+
+        self.application = Application.objects.create(
+            name='test', redirect_uris='https://example.com/',
+            client_type=Application.CLIENT_PUBLIC,
+            authorization_grant_type=Application.GRANT_AUTHORIZATION_CODE)
+        self.user = UserModel.objects.create_user('harry@example.com')
+        now = timezone.now()
+        self.tokens = [
+            tokens.create_access_token(self_describing=True, user=self.user,
+                                       application=self.application, scope='email',
+                                       expires=now + timedelta(days=days))
+            for days in (-1, 3, 3, 60)
+        ]
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:bid_main_oauth2accesstoken_changelist'), params)
+        self.assertEqual(200, response.status_code)
+        return response.context['cl']
+
+    def test_keyset_and_expiry_filter(self):
+        cl = self.changelist(expires='week')
+        self.assertTrue(cl.keyset)
+        self.assertEqual([self.tokens[2].pk, self.tokens[1].pk], [t.pk for t in cl.result_list])
+        self.assertEqual(1, self.changelist(expires='expired').result_count)
+
+    def test_search(self):
+        other = UserModel.objects.create_user('sally@example.com')
+        tokens.create_access_token(self_describing=True, user=other, scope='email',
+                                   expires=timezone.now())
+        self.assertEqual(4, self.changelist(q='harry').result_count)
+        self.assertEqual(1, self.changelist(q='sally@').result_count)
+        cl = self.changelist(q=self.tokens[0].token)
+        self.assertEqual([self.tokens[0].pk], [t.pk for t in cl.result_list])
+
+    def test_revoke_action(self):
+        url = reverse('admin:bid_main_oauth2accesstoken_changelist')
+        response = self.client.post(url, {
+            'action': 'revoke_tokens',
+            '_selected_action': [self.tokens[0].pk, self.tokens[3].pk],
+        })
+        self.assertEqual(302, response.status_code)
+        self.assertEqual({self.tokens[1].pk, self.tokens[2].pk},
+                         set(models.OAuth2AccessToken.objects.values_list('pk', flat=True)))
+        # Only the unexpired token is logged as revoked.
+        self.assertEqual([self.tokens[3].pk],
+                         list(models.TokenRevocation.objects.values_list('token_id', flat=True)))
+
+        entries = LogEntry.objects.filter(action_flag=DELETION, user=self.admin)
+        self.assertEqual({str(self.tokens[0].pk), str(self.tokens[3].pk)},
+                         {entry.object_id for entry in entries})
+        for entry in entries:
+            self.assertNotIn(entry.object_repr, {token.token for token in self.tokens})
+
+    def test_revoke_action_requires_delete_permission(self):
+        staff = UserModel.objects.create_user('staff@user.com', '123456', is_staff=True)
+        staff.user_permissions.add(Permission.objects.get(codename='change_oauth2accesstoken'))
+        self.client.login(email='staff@user.com', password='123456')
+
+        url = reverse('admin:bid_main_oauth2accesstoken_changelist')
+        self.assertNotContains(self.client.get(url), 'revoke_tokens')
+        self.client.post(url, {'action': 'revoke_tokens',
+                               '_selected_action': [self.tokens[0].pk]})
+        self.assertEqual(4, models.OAuth2AccessToken.objects.count())
+
+        request = RequestFactory().post(url)
+        request.user = staff
+        with self.assertRaises(PermissionDenied):
+            revoke_tokens(admin.site._registry[models.OAuth2AccessToken], request,
+                          models.OAuth2AccessToken.objects.all())
@@ -0,0 +1,81 @@
+from datetime import timedelta
+import io
+
+from django.contrib.admin.models import LogEntry, ADDITION
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseServerError
+from django.test import TestCase, RequestFactory, override_settings
+from django.utils import timezone
+
+from bid_main import audit
+from bid_main.models import LogEntryArchive
+
+UserModel = get_user_model()
+
+
+@override_settings(BLENDER_ID_AUDIT_LOG_MODE='buffered')
+class AuditLogTest(TestCase):
+    def setUp(self):
+        audit.buffer.flush()
+        self.user = UserModel.objects.create_user('test@user.com', '123456')
+
+    def tearDown(self):
+        audit.buffer.flush()
+
+    def log(self, message='test'):
+        audit.log_action(user_id=self.user.id, obj=self.user, action_flag=ADDITION,
+                         change_message=message)
+
+    def middleware(self, response_class):
+        def view(request):
+            self.log('first')
+            self.log('second')
+            return response_class()
+        return audit.AuditLogMiddleware(view)
+
+    def test_sync_mode(self):
+        with self.settings(BLENDER_ID_AUDIT_LOG_MODE='sync'):
+            self.log()
+        self.assertEqual(1, LogEntry.objects.count())
+        self.assertEqual(0, len(audit.buffer))
+
+    def test_request(self):
+        middleware = self.middleware(HttpResponse)
+        with self.assertNumQueries(0):
+            middleware(RequestFactory().get('/'))
+        self.assertEqual(2, len(audit.buffer))
+
+        with self.assertNumQueries(1):
+            audit.buffer.flush()
+        self.assertEqual(['first', 'second'],
+                         sorted(LogEntry.objects.values_list('change_message', flat=True)))
+
+    def test_failed_request(self):
+        self.middleware(HttpResponseServerError)(RequestFactory().get('/'))
+        self.middleware(HttpResponseForbidden)(RequestFactory().get('/'))
+        self.assertEqual(0, len(audit.buffer))
+
+    def test_buffered_mode(self):
+        self.log()
+        self.log()
+        self.assertFalse(LogEntry.objects.exists())
+
+        with self.assertNumQueries(1):
+            audit.buffer.flush()
+        entry = LogEntry.objects.first()
+        self.assertEqual(2, LogEntry.objects.count())
+        self.assertEqual(self.user, entry.get_edited_object())
+
+    @override_settings(BLENDER_ID_AUDIT_LOG_MODE='sync')
+    def test_archive(self):
+        self.log('old')
+        self.log('new')
+        LogEntry.objects.filter(change_message='old') \
+            .update(action_time=timezone.now() - timedelta(days=400))
+
+        call_command('archive_admin_log', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(['new'], list(LogEntry.objects.values_list('change_message', flat=True)))
+        archived = LogEntryArchive.objects.get()
+        self.assertEqual('old', archived.change_message)
+        self.assertEqual(self.user.id, archived.user_id)
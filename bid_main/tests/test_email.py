@@ -0,0 +1,154 @@
+from datetime import timedelta
+import io
+import smtplib
+
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from bid_main import email
+from bid_main.models import OutgoingEmail
+
+
+class FailingEmailBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise OSError('connection refused')
+
+
+class DroppingEmailBackend(locmem.EmailBackend):
+    """Loses its connection on the first message, like a timed-out SMTP connection."""
+
+    dropped = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        if not self.is_open:
+            raise smtplib.SMTPServerDisconnected('please run connect() first')
+        if not DroppingEmailBackend.dropped:
+            DroppingEmailBackend.dropped = True
+            raise smtplib.SMTPServerDisconnected('connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='bid_main.email.OutboxEmailBackend',
+    BLENDER_ID_EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxTest(TestCase):
+    def test_registration_queues_email(self):
+        self.client.post(reverse('bid_main:register'),
+                         {'full_name': 'Šuper Ũseŕ', 'email': 'super@hero.com'})
+        self.assertEqual([], mail.outbox)
+        self.assertEqual(['super@hero.com'],
+                         [outgoing.recipients for outgoing in OutgoingEmail.objects.all()])
+
+        call_command('send_queued_email', stdout=io.StringIO())
+        self.assertEqual(1, len(mail.outbox))
+        self.assertEqual(['super@hero.com'], mail.outbox[0].to)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_batches(self):
+        for i in range(5):
+            mail.send_mail('subject', 'body', None, [f'user{i}@example.com'])
+        self.assertEqual((2, 0), email.send_queued(batch_size=2))
+        self.assertEqual(2, len(mail.outbox))
+
+        call_command('send_queued_email', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(5, len(mail.outbox))
+
+    @override_settings(BLENDER_ID_EMAIL_DELIVERY_BACKEND=f'{__name__}.FailingEmailBackend',
+                       BLENDER_ID_EMAIL_MAX_ATTEMPTS=2)
+    def test_retries(self):
+        mail.send_mail('subject', 'body', None, ['user@example.com'])
+        self.assertEqual((0, 1), email.send_queued(batch_size=10))
+
+        outgoing = OutgoingEmail.objects.get()
+        self.assertEqual(1, outgoing.attempts)
+        self.assertEqual('connection refused', outgoing.last_error)
+        self.assertGreater(outgoing.next_attempt, timezone.now())
+
+        # Not due yet.
+        self.assertEqual((0, 0), email.send_queued(batch_size=10))
+
+        outgoing.next_attempt = timezone.now() - timedelta(seconds=1)
+        outgoing.save()
+        self.assertEqual((0, 1), email.send_queued(batch_size=10))
+        outgoing.refresh_from_db()
+        self.assertEqual(2, outgoing.attempts)
+        self.assertIsNone(outgoing.next_attempt)
+
+    def test_message_fields(self):
+        connection = mail.get_connection()
+        message = EmailMultiAlternatives(
+            'Ŝubject', 'body', 'from@example.com', ['to@example.com'],
+            cc=['cc@example.com'], bcc=['bcc@example.com'], reply_to=['reply@example.com'],
+            headers={'X-Mailer': 'Blender ID'}, connection=connection)
+        message.attach_alternative('<p>body</p>', 'text/html')
+        message.attach('data.bin', b'\x00\xff', 'application/octet-stream')
+        message.send()
+
+        # The caller's message is left alone.
+        self.assertIs(connection, message.connection)
+
+        email.send_queued(batch_size=10)
+        sent = mail.outbox[0]
+        self.assertEqual('Ŝubject', sent.subject)
+        self.assertEqual('from@example.com', sent.from_email)
+        self.assertEqual(['to@example.com'], sent.to)
+        self.assertEqual(['cc@example.com'], sent.cc)
+        self.assertEqual(['bcc@example.com'], sent.bcc)
+        self.assertEqual(['reply@example.com'], sent.reply_to)
+        self.assertEqual({'X-Mailer': 'Blender ID'}, sent.extra_headers)
+        self.assertEqual([('<p>body</p>', 'text/html')], sent.alternatives)
+        self.assertEqual([('data.bin', b'\x00\xff', 'application/octet-stream')],
+                         sent.attachments)
+
+    @override_settings(BLENDER_ID_EMAIL_DELIVERY_BACKEND=f'{__name__}.DroppingEmailBackend')
+    def test_reconnect_after_error(self):
+        DroppingEmailBackend.dropped = False
+        for i in range(3):
+            mail.send_mail('subject', 'body', None, [f'user{i}@example.com'])
+        self.assertEqual((2, 1), email.send_queued(batch_size=10))
+        self.assertEqual(['user1@example.com', 'user2@example.com'],
+                         [message.to[0] for message in mail.outbox])
+
+    def test_claimed_once(self):
+        mail.send_mail('subject', 'body', None, ['user@example.com'])
+        # Two senders that read the same due message.
+        first = list(OutgoingEmail.objects.all())
+        second = list(OutgoingEmail.objects.all())
+        self.assertEqual(1, len(email._claim(first)))
+        self.assertEqual([], email._claim(second))
+
+        # Claimed messages are not due until the claim expires.
+        self.assertEqual((0, 0), email.send_queued(batch_size=10))
+        OutgoingEmail.objects.update(next_attempt=timezone.now() - timedelta(seconds=1))
+        self.assertEqual((1, 0), email.send_queued(batch_size=10))
+
+    def test_prune_given_up(self):
+        for i in range(3):
+            mail.send_mail('subject', 'body', None, [f'user{i}@example.com'])
+        pending, given_up, recent = OutgoingEmail.objects.order_by('id')
+        old = timezone.now() - timedelta(days=31)
+        OutgoingEmail.objects.filter(id=pending.id).update(created=old)
+        OutgoingEmail.objects.filter(id=given_up.id).update(created=old, next_attempt=None)
+        OutgoingEmail.objects.filter(id=recent.id).update(next_attempt=None)
+
+        call_command('prune_outgoing_email', stdout=io.StringIO())
+        self.assertEqual([pending.id, recent.id],
+                         list(OutgoingEmail.objects.order_by('id').values_list('id', flat=True)))
@@ -1,4 +1,5 @@
 from datetime import timedelta
+import io
 import json
 
 from django.http import HttpResponse
@@ -7,6 +8,8 @@ from django.core.urlresolvers import reverse
 from django.utils import timezone
 from django.http import HttpResponse
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
@@ -57,3 +60,22 @@ class RegisterTest(TestCase):
         # This should render a template just fine; it shouldn't cause an internal error.
         self.assertEqual(200, response.status_code, f'respose: {response}')
         self.assertEqual(1, len(UserModel.objects.all()))
+
+    def test_register_without_password(self):
+        self.client.post(reverse('bid_main:register'),
+                         {'full_name': 'Šuper Ũseŕ', 'email': 'super@hero.com'})
+
+        db_user = UserModel.objects.get(email='super@hero.com')
+        self.assertFalse(db_user.has_usable_password())
+        self.assertEqual(1, len(mail.outbox))
+        self.assertEqual(['super@hero.com'], mail.outbox[0].to)
+
+        # Users without password should be able to get a new verification link.
+        self.client.post(reverse('bid_main:password_reset'), {'email': 'super@hero.com'})
+        self.assertEqual(2, len(mail.outbox))
+
+    def test_benchmark(self):
+        out = io.StringIO()
+        call_command('benchmark_registration', count=3, stdout=out)
+        self.assertIn('Registered 3 users', out.getvalue())
+        self.assertEqual(1, UserModel.objects.count())
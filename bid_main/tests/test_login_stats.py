@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from bid_main import login_stats, user_cache
+
+UserModel = get_user_model()
+
+
+class LoginStatsTest(TestCase):
+    def setUp(self):
+        # Other tests may have left pending writes in the buffer.
+        login_stats.buffer.flush()
+        cache.clear()
+
+        self.user = UserModel.objects.create_user('test@user.com', '123456')
+        UserModel.objects.filter(pk=self.user.pk).update(current_login_ip='10.0.0.1')
+
+    def tearDown(self):
+        login_stats.buffer.flush()
+
+    def login(self, ip_address: str):
+        self.client.post(reverse('bid_main:login'),
+                         {'username': 'test@user.com', 'password': '123456'},
+                         REMOTE_ADDR=ip_address)
+        self.client.logout()
+
+    def test_buffered(self):
+        self.login('10.0.0.2')
+        self.user.refresh_from_db()
+        self.assertEqual(0, self.user.login_count)
+        self.assertIsNone(self.user.last_login)
+
+        login_stats.buffer.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(1, self.user.login_count)
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual('10.0.0.1', self.user.last_login_ip)
+        self.assertEqual('10.0.0.2', self.user.current_login_ip)
+
+    def test_coalesced_logins(self):
+        self.login('10.0.0.2')
+        self.login('10.0.0.3')
+        self.login('10.0.0.4')
+        self.assertEqual(1, len(login_stats.buffer))
+
+        with self.assertNumQueries(1):
+            login_stats.buffer.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(3, self.user.login_count)
+        self.assertEqual('10.0.0.3', self.user.last_login_ip)
+        self.assertEqual('10.0.0.4', self.user.current_login_ip)
+
+    def test_multiple_users(self):
+        other = UserModel.objects.create_user('other@user.com', '123456')
+        login_stats.record_login(self.user)
+        login_stats.record_login(other)
+        login_stats.record_login(other)
+
+        with self.assertNumQueries(1):
+            login_stats.buffer.flush()
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(1, self.user.login_count)
+        self.assertEqual(2, other.login_count)
+        self.assertEqual(self.user.last_update, user_cache.get_user(self.user.pk).last_update)
+
+    @override_settings(BLENDER_ID_LOGIN_STATS_MODE='sync')
+    def test_sync(self):
+        self.login('10.0.0.2')
+        self.assertEqual(0, len(login_stats.buffer))
+        self.user.refresh_from_db()
+        self.assertEqual(1, self.user.login_count)
+        self.assertEqual('10.0.0.2', self.user.current_login_ip)
+
+    def test_loginas_not_recorded(self):
+        request = RequestFactory().post('/')
+        request.resolver_match = resolve(reverse('loginas-user-login', args=(self.user.pk,)))
+
+        with mock.patch('loginas.settings.UPDATE_LAST_LOGIN', False):
+            user_logged_in.send(sender=UserModel, request=request, user=self.user)
+        self.assertEqual(0, len(login_stats.buffer))
+
+        with mock.patch('loginas.settings.UPDATE_LAST_LOGIN', True):
+            user_logged_in.send(sender=UserModel, request=request, user=self.user)
+        self.assertEqual(1, len(login_stats.buffer))
@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from bid_main import role_management, role_registry
+from bid_main.models import Role, RoleManagement
+
+
+class RoleManagementTest(TestCase):
+    def setUp(self):
+        self.admin, self.badger, self.badge1, self.badge2 = [
+            Role.objects.create(name=name) for name in ('admin', 'badger', 'badge1', 'badge2')]
+        self.admin.may_manage_roles.add(self.badger)
+        self.badger.may_manage_roles.add(self.badge1)
+
+    def pairs(self):
+        return set(RoleManagement.objects.values_list('manager__name', 'managed__name'))
+
+    def test_transitive(self):
+        self.assertEqual({('admin', 'badger'), ('admin', 'badge1'), ('badger', 'badge1')},
+                         self.pairs())
+        self.assertEqual({self.badger.id, self.badge1.id},
+                         role_management.manageable_role_ids([self.admin.id]))
+
+        with self.assertNumQueries(1):
+            role_management.manageable_role_ids([self.admin.id, self.badge2.id])
+
+    def test_add_extends_managers(self):
+        self.badge1.may_manage_roles.add(self.badge2)
+        self.assertIn(('admin', 'badge2'), self.pairs())
+        self.assertIn(('badger', 'badge2'), self.pairs())
+
+    def test_remove(self):
+        self.admin.may_manage_roles.add(self.badge1)
+        self.badger.may_manage_roles.remove(self.badge1)
+        # The admin still manages badge1 directly.
+        self.assertEqual({('admin', 'badger'), ('admin', 'badge1')}, self.pairs())
+
+        self.admin.may_manage_roles.clear()
+        self.assertEqual(set(), self.pairs())
+
+    def test_reverse_changes(self):
+        self.badge2.managers.add(self.badge1)
+        self.assertIn(('admin', 'badge2'), self.pairs())
+
+        # Nobody manages badge1 any more, so badge2 is only managed by badge1.
+        self.badge1.managers.clear()
+        self.assertEqual({('admin', 'badger'), ('badge1', 'badge2')}, self.pairs())
+
+    def test_cycle(self):
+        self.badge1.may_manage_roles.add(self.admin)
+        for manager in ('admin', 'badger', 'badge1'):
+            self.assertEqual({'admin', 'badger', 'badge1'},
+                             {managed for m, managed in self.pairs() if m == manager})
+
+    def test_delete_intermediate_role(self):
+        self.badger.delete()
+        self.assertEqual(set(), self.pairs())
+
+    def test_registry(self):
+        registry = role_registry.get_registry()
+        self.assertEqual({'badger', 'badge1'}, set(registry.manageable([self.admin.id])))
@@ -0,0 +1,205 @@
+import io
+import json
+from unittest import mock
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from bid_main import role_assignment, role_export
+from bid_main.models import Role
+
+UserModel = get_user_model()
+
+
+class MemberCountTest(TestCase):
+    def setUp(self):
+        self.role1 = Role.objects.create(name='role1')
+        self.role2 = Role.objects.create(name='role2')
+        self.users = [UserModel.objects.create_user(f'user{i}@example.com') for i in range(3)]
+
+    def counts(self):
+        return {role.name: role.member_count for role in Role.objects.all()}
+
+    def test_forward_changes(self):
+        self.users[0].roles.add(self.role1, self.role2)
+        self.users[1].roles.add(self.role1)
+        self.users[1].roles.add(self.role1)
+        self.assertEqual({'role1': 2, 'role2': 1}, self.counts())
+
+        # Removing a role the user doesn't have doesn't change its count.
+        self.users[1].roles.remove(self.role1, self.role2)
+        self.assertEqual({'role1': 1, 'role2': 1}, self.counts())
+
+        self.users[0].roles.clear()
+        self.assertEqual({'role1': 0, 'role2': 0}, self.counts())
+
+    def test_reverse_changes(self):
+        self.role1.users.add(*self.users)
+        self.role1.users.remove(self.users[0], self.users[0])
+        self.assertEqual({'role1': 2, 'role2': 0}, self.counts())
+
+        self.role1.users.clear()
+        self.assertEqual({'role1': 0, 'role2': 0}, self.counts())
+
+    def test_user_deleted(self):
+        self.role1.users.add(*self.users)
+        UserModel.objects.get(pk=self.users[0].pk).delete()
+        self.assertEqual({'role1': 2, 'role2': 0}, self.counts())
+
+    def test_save_keeps_count(self):
+        role = Role.objects.get(pk=self.role1.pk)
+        self.role1.users.add(*self.users)
+        role.description = 'changed'
+        role.save()
+        self.assertEqual({'role1': 3, 'role2': 0}, self.counts())
+
+    def test_count_never_negative(self):
+        self.role1.users.add(self.users[0])
+        Role.objects.update(member_count=0)
+        UserModel.objects.get(pk=self.users[0].pk).delete()
+        self.assertEqual({'role1': 0, 'role2': 0}, self.counts())
+
+    def test_recount(self):
+        self.role1.users.add(*self.users)
+        Role.objects.update(member_count=7)
+        call_command('recount_role_members', stdout=io.StringIO())
+        self.assertEqual({'role1': 3, 'role2': 0}, self.counts())
+
+
+class RoleExportTest(TestCase):
+    def setUp(self):
+        self.admin = UserModel.objects.create_superuser('admin@user.com', '123456')
+        self.role = Role.objects.create(name='Cloud Subscriber')
+        self.users = [UserModel.objects.create_user(f'user{i}@example.com', full_name=f'User {i}')
+                      for i in range(5)]
+        self.role.users.add(*self.users[1:])
+
+    def test_iter_members_in_batches(self):
+        with self.assertNumQueries(3):
+            emails = [row[1] for row in role_export.iter_members(self.role.pk, batch_size=2)]
+        self.assertEqual([user.email for user in self.users[1:]], emails)
+
+    def export(self, export_format):
+        self.client.login(email='admin@user.com', password='123456')
+        url = reverse('admin:bid_main_role_export', args=(self.role.pk, export_format))
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertIn('cloud-subscriber-members', response['Content-Disposition'])
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        lines = self.export('csv').splitlines()
+        self.assertEqual('id,email,full_name,is_active,date_joined', lines[0])
+        self.assertEqual(5, len(lines))
+        self.assertIn('user1@example.com,User 1,True', lines[1])
+
+    def test_csv_formulas_escaped(self):
+        self.users[1].full_name = '=HYPERLINK("http://evil.example.com")'
+        self.users[1].save()
+        self.users[2].full_name = '-2+3'
+        self.users[2].save()
+        lines = self.export('csv').splitlines()
+        self.assertIn(',"\'=HYPERLINK(""http://evil.example.com"")",', lines[1])
+        self.assertIn(",'-2+3,", lines[2])
+
+    def test_jsonl(self):
+        records = [json.loads(line) for line in self.export('jsonl').splitlines()]
+        self.assertEqual(['user1@example.com', 'user2@example.com', 'user3@example.com',
+                          'user4@example.com'], [record['email'] for record in records])
+
+    def test_requires_permission(self):
+        UserModel.objects.create_user('staff@user.com', '123456', is_staff=True)
+        self.client.login(email='staff@user.com', password='123456')
+        url = reverse('admin:bid_main_role_export', args=(self.role.pk, 'csv'))
+        response = self.client.get(url)
+        self.assertEqual(403, response.status_code)
+
+
+class RoleAssignmentTest(TestCase):
+    def setUp(self):
+        self.admin = UserModel.objects.create_superuser('admin@user.com', '123456')
+        self.role = Role.objects.create(name='Cloud Subscriber')
+        self.users = [UserModel.objects.create_user(f'user{i}@example.com') for i in range(4)]
+        self.role.users.add(self.users[0])
+        self.url = reverse('admin:bid_main_role_members', args=(self.role.pk,))
+
+    def member_emails(self):
+        return set(self.role.users.values_list('email', flat=True))
+
+    def test_change_members_in_chunks(self):
+        emails = [user.email for user in self.users] + ['unknown@example.com']
+        with mock.patch.object(role_assignment, 'CHUNK_SIZE', 2):
+            result = role_assignment.change_members(self.role, emails, grant=True)
+        self.assertEqual(role_assignment.Result(3, 1, ['unknown@example.com']), result)
+        self.assertEqual({user.email for user in self.users}, self.member_emails())
+
+        self.role.refresh_from_db()
+        self.assertEqual(4, self.role.member_count)
+        self.users[1].refresh_from_db()
+        self.assertEqual({self.role.pk}, self.users[1].cached_role_ids)
+
+    def test_find_users_ignores_case(self):
+        # The database may match either spelling; both refer to the same user.
+        emails = [self.users[0].email.upper(), self.users[0].email]
+        user_ids, unknown = role_assignment.find_users(emails)
+        self.assertEqual({email: self.users[0].id for email in emails}, user_ids)
+        self.assertEqual([], unknown)
+
+        result = role_assignment.change_members(self.role, emails, grant=False)
+        self.assertEqual(role_assignment.Result(1, 0, []), result)
+
+    def test_grant_pasted(self):
+        self.client.login(email='admin@user.com', password='123456')
+        response = self.client.post(self.url, {
+            'action': 'grant',
+            'emails': 'user0@example.com, user1@example.com\nuser2@example.com',
+        })
+        self.assertRedirects(response, reverse('admin:bid_main_role_changelist'))
+        self.assertEqual({'user0@example.com', 'user1@example.com', 'user2@example.com'},
+                         self.member_emails())
+        entry = LogEntry.objects.get(object_id=str(self.role.pk))
+        self.assertEqual('Granted role to 2 users.', entry.change_message)
+
+    def test_revoke_uploaded(self):
+        self.role.users.add(self.users[1])
+        email_file = SimpleUploadedFile('emails.csv', b'user0@example.com\nnobody@example.com\n')
+        self.client.login(email='admin@user.com', password='123456')
+        response = self.client.post(self.url, {'action': 'revoke', 'email_file': email_file})
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, 'nobody@example.com')
+        self.assertEqual({'user1@example.com'}, self.member_emails())
+
+    def test_no_emails(self):
+        self.client.login(email='admin@user.com', password='123456')
+        response = self.client.post(self.url, {'action': 'grant', 'emails': ' \n'})
+        self.assertContains(response, 'Give at least one email address.')
+        self.assertEqual({'user0@example.com'}, self.member_emails())
+
+    def test_requires_permission(self):
+        UserModel.objects.create_user('staff@user.com', '123456', is_staff=True)
+        self.client.login(email='staff@user.com', password='123456')
+        response = self.client.post(self.url, {'action': 'grant', 'emails': 'user1@example.com'})
+        self.assertEqual(403, response.status_code)
+        self.assertEqual({'user0@example.com'}, self.member_emails())
+
+    def test_requires_user_permission(self):
+        staff = UserModel.objects.create_user('staff@user.com', '123456', is_staff=True)
+        staff.user_permissions.add(*Permission.objects.filter(
+            content_type__app_label='bid_main', codename__endswith='_role'))
+        self.client.login(email='staff@user.com', password='123456')
+        response = self.client.get(reverse('admin:bid_main_role_changelist'))
+        self.assertEqual(200, response.status_code)
+        response = self.client.post(self.url, {'action': 'grant', 'emails': 'user1@example.com'})
+        self.assertEqual(403, response.status_code)
+        self.assertEqual({'user0@example.com'}, self.member_emails())
+
+        staff.user_permissions.add(Permission.objects.get(codename='change_user'))
+        response = self.client.post(self.url, {'action': 'grant', 'emails': 'user1@example.com'})
+        self.assertEqual(302, response.status_code)
+        self.assertEqual({'user0@example.com', 'user1@example.com'}, self.member_emails())
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from bid_main import role_registry
+from bid_main.models import Role
+
+UserModel = get_user_model()
+
+
+class RoleRegistryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.badge = Role.objects.create(name='badge', is_badge=True)
+        self.hidden = Role.objects.create(name='hidden', is_public=False)
+        self.badger = Role.objects.create(name='badger')
+        self.badger.may_manage_roles.add(self.badge)
+
+    def test_load(self):
+        registry = role_registry.get_registry()
+        self.assertEqual('badge', registry[self.badge.id].name)
+        self.assertTrue(registry[self.badge.id].is_badge)
+        self.assertEqual(frozenset({self.badge.id}), registry[self.badger.id].may_manage)
+        self.assertEqual({'badge': registry[self.badge.id]},
+                         registry.manageable([self.badger.id, self.badge.id]))
+        self.assertEqual({'badge', 'badger'},
+                         registry.public_names([self.badge.id, self.hidden.id, self.badger.id]))
+
+    def test_cached_until_changed(self):
+        registry = role_registry.get_registry()
+        with self.assertNumQueries(0):
+            self.assertIs(registry, role_registry.get_registry())
+
+        # Updates that bypass the signals need an explicit bump.
+        Role.objects.filter(id=self.badge.id).update(name='renamed')
+        self.assertEqual('badge', role_registry.get_registry()[self.badge.id].name)
+        role_registry.bump_version()
+        self.assertEqual('renamed', role_registry.get_registry()[self.badge.id].name)
+
+    def test_reload_when_too_old(self):
+        # Other processes don't see the new version with a per-process cache.
+        registry = role_registry.get_registry()
+        Role.objects.filter(id=self.badge.id).update(name='renamed')
+        self.assertIs(registry, role_registry.get_registry())
+
+        with override_settings(BLENDER_ID_ROLE_REGISTRY_MAX_AGE=0):
+            self.assertEqual('renamed', role_registry.get_registry()[self.badge.id].name)
+
+    def test_reload_on_change(self):
+        role_registry.get_registry()
+        self.hidden.is_active = False
+        self.hidden.save()
+        self.assertFalse(role_registry.get_registry()[self.hidden.id].is_active)
+
+        self.badger.may_manage_roles.add(self.hidden)
+        self.assertEqual(frozenset({self.badge.id, self.hidden.id}),
+                         role_registry.get_registry()[self.badger.id].may_manage)
+
+        self.badge.delete()
+        self.assertNotIn(self.badge.id, role_registry.get_registry())
+
+    def test_role_names(self):
+        user = UserModel.objects.create_user('harry@example.com')
+        user.roles.add(self.badge, self.hidden)
+        role_registry.get_registry()
+        with self.assertNumQueries(0):
+            self.assertEqual({'badge', 'hidden'}, user.role_names)
@@ -0,0 +1,63 @@
+from datetime import timedelta
+import io
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bid_main.session_backend import SessionStore
+
+
+class SessionStoreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.session = SessionStore()
+        self.session['user'] = 'aap'
+        self.session.save()
+
+    def reload(self) -> SessionStore:
+        session = SessionStore(self.session.session_key)
+        self.assertEqual('aap', session['user'])
+        return session
+
+    def test_unchanged_session_not_written(self):
+        session = self.reload()
+        session['user'] = 'aap'
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_session_written(self):
+        session = self.reload()
+        session['user'] = 'noot'
+        session.save()
+
+        # Even when dropped from the cache, the change should be in the database.
+        cache.clear()
+        self.assertEqual('noot', SessionStore(self.session.session_key)['user'])
+
+    def test_load_from_database(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            session = self.reload()
+        with self.assertNumQueries(0):
+            session.save()
+
+    @override_settings(BLENDER_ID_SESSION_EXPIRY_REFRESH_SECONDS=60)
+    def test_expiry_refresh(self):
+        db_session = Session.objects.get(session_key=self.session.session_key)
+        db_session.expire_date -= timedelta(seconds=120)
+        db_session.save()
+        cache.clear()
+
+        session = self.reload()
+        session.save()
+        db_session.refresh_from_db()
+        self.assertGreater(db_session.expire_date, timezone.now() + timedelta(days=1))
+
+    def test_clear_expired_sessions(self):
+        Session.objects.filter(session_key=self.session.session_key) \
+            .update(expire_date=timezone.now() - timedelta(seconds=1))
+        call_command('clear_expired_sessions', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(0, Session.objects.count())
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from unittest import mock
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TestCase
+from django.utils import timezone
+
+import oauth2_provider.models as oa2_models
+
+from bid_main import token_usage
+
+AccessToken = oa2_models.get_access_token_model()
+UserModel = get_user_model()
+
+
+class TokenUsageTest(TestCase):
+    def setUp(self):
+        # Other tests may have left pending writes in the buffer.
+        token_usage.buffer.flush()
+
+        self.user = UserModel.objects.create_user('test@user.com', '123456')
+        self.tokens = [AccessToken.objects.create(
+            user=self.user,
+            scope='email',
+            expires=timezone.now() + timedelta(days=1),
+            token=f'token-{i}',
+        ) for i in range(3)]
+
+    def tearDown(self):
+        token_usage.buffer.flush()
+
+    def test_coalesced_writes(self):
+        token_usage.record_use(self.tokens[0])
+        token_usage.record_use(self.tokens[0])
+        token_usage.record_use(self.tokens[1])
+        self.assertEqual(2, len(token_usage.buffer))
+
+        # Nothing is written until the buffer is flushed.
+        self.tokens[0].refresh_from_db()
+        self.assertIsNone(self.tokens[0].last_used)
+
+        with self.assertNumQueries(1):
+            token_usage.buffer.flush()
+        for token in self.tokens:
+            token.refresh_from_db()
+        self.assertIsNotNone(self.tokens[0].last_used)
+        self.assertIsNotNone(self.tokens[1].last_used)
+        self.assertIsNone(self.tokens[2].last_used)
+
+        # Recently used tokens are not recorded again.
+        token_usage.record_use(self.tokens[0])
+        self.assertEqual(0, len(token_usage.buffer))
+
+    def test_reap_idle_tokens(self):
+        long_ago = timezone.now() - timedelta(days=200)
+        MigrationRecorder.Migration.objects \
+            .filter(app='bid_main', name='0012_accesstoken_last_used') \
+            .update(applied=long_ago)
+        AccessToken.objects.filter(id=self.tokens[0].id).update(last_used=long_ago)
+        AccessToken.objects.filter(id=self.tokens[1].id).update(created=long_ago)
+        AccessToken.objects.filter(id=self.tokens[2].id).update(created=long_ago,
+                                                                last_used=timezone.now())
+
+        call_command('reap_idle_tokens', days=180, stdout=io.StringIO())
+        self.assertEqual([self.tokens[2].id],
+                         list(AccessToken.objects.values_list('id', flat=True)))
+
+    def test_reap_unused_tokens_after_grace_period(self):
+        long_ago = timezone.now() - timedelta(days=200)
+        AccessToken.objects.filter(id=self.tokens[0].id).update(created=long_ago)
+
+        # Tokens that were never used only count as idle once last_used has
+        # been tracked for the idle period.
+        call_command('reap_idle_tokens', days=180, stdout=io.StringIO())
+        self.assertEqual(3, AccessToken.objects.count())
+
+        MigrationRecorder.Migration.objects \
+            .filter(app='bid_main', name='0012_accesstoken_last_used') \
+            .update(applied=timezone.now() - timedelta(days=181))
+        call_command('reap_idle_tokens', days=180, stdout=io.StringIO())
+        self.assertEqual(2, AccessToken.objects.count())
+
+    def test_flush_after_request_when_due(self):
+        token_usage.record_use(self.tokens[0])
+        request_finished.send(sender=self.__class__)
+        # Not due yet.
+        self.assertEqual(1, len(token_usage.buffer))
+
+        with mock.patch.object(token_usage.buffer, 'max_age', 0):
+            request_finished.send(sender=self.__class__)
+        self.assertEqual(0, len(token_usage.buffer))
+        self.tokens[0].refresh_from_db()
+        self.assertIsNotNone(self.tokens[0].last_used)
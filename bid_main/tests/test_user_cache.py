@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bid_main import checks, login_stats, models, user_cache
+from bid_main.backends import CachingModelBackend
+
+UserModel = get_user_model()
+
+
+@override_settings(BLENDER_ID_USER_CACHE_SECONDS=3600)
+class UserCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user('test@user.com', '123456', full_name='Aap')
+
+    def test_cached(self):
+        with self.assertNumQueries(1):
+            user_cache.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = user_cache.get_user(self.user.pk)
+        self.assertEqual('Aap', user.full_name)
+
+    def test_save_invalidates(self):
+        user_cache.get_user(self.user.pk)
+        self.user.full_name = 'Noot'
+        self.user.save()
+        self.assertEqual('Noot', user_cache.get_user(self.user.pk).full_name)
+
+    def test_stale_copy_ignored(self):
+        stale = UserModel.objects.get(pk=self.user.pk)
+        self.user.full_name = 'Noot'
+        self.user.save()
+
+        # Another process caching the user it read before the save.
+        cache.set(user_cache._user_key(self.user.pk), stale)
+        self.assertEqual('Noot', user_cache.get_user(self.user.pk).full_name)
+
+    def test_role_change_invalidates(self):
+        role = models.Role.objects.create(name='cloud_subscriber')
+        user_cache.get_user(self.user.pk)
+
+        self.user.roles.add(role)
+        cached_version = user_cache.get_user(self.user.pk).last_update
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_update, cached_version)
+
+        role.users.clear()
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.last_update, cached_version)
+        self.assertEqual(self.user.last_update, user_cache.get_user(self.user.pk).last_update)
+
+    def test_delete(self):
+        user_id = self.user.pk
+        user_cache.get_user(user_id)
+        self.user.delete()
+        with self.assertRaises(UserModel.DoesNotExist):
+            user_cache.get_user(user_id)
+
+    def test_backend_inactive_user(self):
+        backend = CachingModelBackend()
+        self.assertEqual(self.user, backend.get_user(self.user.pk))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+        self.assertIsNone(backend.get_user(self.user.pk + 1))
+
+    def test_request_user(self):
+        self.client.login(email='test@user.com', password='123456')
+        # Writing the login stats invalidates the cached user; don't let that
+        # happen at the end of a request.
+        login_stats.buffer.flush()
+        self.client.get(reverse('bid_main:index'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('bid_main:index'))
+        self.assertEqual(200, resp.status_code)
+        user_queries = [q['sql'] for q in ctx.captured_queries
+                        if q['sql'].startswith('SELECT "bid_main_user"."id"')]
+        self.assertEqual([], user_queries)
+
+    @override_settings(BLENDER_ID_USER_CACHE_SECONDS=0)
+    def test_disabled(self):
+        user_cache.get_user(self.user.pk)
+        with self.assertNumQueries(1):
+            user_cache.get_user(self.user.pk)
+        self.assertEqual([], checks.check_user_cache(None))
+
+    def test_requires_shared_cache(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache'}}
+        with self.settings(CACHES=local):
+            self.assertEqual(['bid_main.E001'],
+                             [error.id for error in checks.check_user_cache(None)])
+        with self.settings(CACHES=shared):
+            self.assertEqual([], checks.check_user_cache(None))
+
+    def test_old_sessions(self):
+        self.client.login(email='test@user.com', password='123456')
+        session = self.client.session
+        session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
+        session.save()
+        response = self.client.get(reverse('bid_main:index'))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.user, response.context['user'])
+
+    def test_failed_login(self):
+        backend = CachingModelBackend()
+        with self.assertRaises(PermissionDenied):
+            backend.authenticate(None, username='test@user.com', password='wrong')
+        self.assertFalse(self.client.login(email='test@user.com', password='wrong'))
@@ -0,0 +1,116 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from bid_main.models import Role
+
+UserModel = get_user_model()
+
+
+class DirtyFieldsTest(TestCase):
+    def setUp(self):
+        UserModel.objects.create_user('test@user.com', '123456', full_name='Aap')
+        self.user = UserModel.objects.get(email='test@user.com')
+
+    def test_no_changes(self):
+        self.assertEqual([], self.user.get_changed_fields())
+        last_update = self.user.last_update
+        with self.assertNumQueries(0):
+            self.user.save()
+        self.assertEqual(last_update, self.user.last_update)
+
+    def test_narrow_update(self):
+        self.user.full_name = 'Noot'
+        self.assertEqual(['full_name'], self.user.get_changed_fields())
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.user.save()
+        # Changing the name also updates the search index.
+        user_queries = [q['sql'] for q in ctx.captured_queries
+                        if q['sql'].startswith('UPDATE "bid_main_user"')]
+        self.assertEqual(1, len(user_queries))
+        sql = user_queries[0]
+        self.assertIn('"full_name"', sql)
+        self.assertIn('"last_update"', sql)
+        self.assertNotIn('"email"', sql)
+
+        # Saved changes are no longer dirty.
+        self.assertEqual([], self.user.get_changed_fields())
+        self.user.refresh_from_db()
+        self.assertEqual('Noot', self.user.full_name)
+
+    def test_refresh_from_db(self):
+        UserModel.objects.filter(pk=self.user.pk).update(full_name='Mies')
+        self.user.refresh_from_db()
+        self.assertEqual([], self.user.get_changed_fields())
+
+    def test_deferred_fields(self):
+        user = UserModel.objects.only('email').get(pk=self.user.pk)
+        self.assertEqual([], user.get_changed_fields())
+
+        user.full_name = 'Noot'
+        self.assertEqual(['full_name'], user.get_changed_fields())
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual('Noot', self.user.full_name)
+
+    def test_new_user_tracked_after_save(self):
+        user = UserModel(email='new@user.com')
+        self.assertIsNone(user.get_changed_fields())
+        user.save()
+        self.assertEqual([], user.get_changed_fields())
+
+
+class CachedRoleIdsTest(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user('test@user.com', '123456')
+        self.other = UserModel.objects.create_user('other@user.com', '123456')
+        self.role1 = Role.objects.create(name='role1')
+        self.role2 = Role.objects.create(name='role2')
+
+    def cached_role_ids(self, user):
+        return UserModel.objects.get(pk=user.pk).cached_role_ids
+
+    def test_forward_changes(self):
+        self.user.roles.add(self.role1, self.role2)
+        self.assertEqual({self.role1.id, self.role2.id}, self.user.get_role_ids())
+        self.assertEqual({self.role1.id, self.role2.id}, self.cached_role_ids(self.user))
+
+        self.user.roles.remove(self.role1)
+        self.assertEqual({self.role2.id}, self.cached_role_ids(self.user))
+
+        self.user.roles.clear()
+        self.assertEqual(frozenset(), self.cached_role_ids(self.user))
+        # Saving the user afterwards doesn't overwrite the cached role IDs.
+        self.user.roles.add(self.role1)
+        self.user.full_name = 'Aap'
+        self.user.save()
+        self.assertEqual({self.role1.id}, self.cached_role_ids(self.user))
+
+    def test_reverse_changes(self):
+        self.role1.users.add(self.user, self.other)
+        self.assertEqual({self.role1.id}, self.cached_role_ids(self.other))
+
+        self.role1.users.clear()
+        self.assertEqual(frozenset(), self.cached_role_ids(self.user))
+        self.assertEqual(frozenset(), self.cached_role_ids(self.other))
+
+    def test_role_deleted(self):
+        self.user.roles.add(self.role1, self.role2)
+        self.role1.delete()
+        self.assertEqual({self.role2.id}, self.cached_role_ids(self.user))
+
+    def test_rebuild_command(self):
+        self.user.roles.add(self.role1)
+        UserModel.objects.filter(pk=self.user.pk).update(cached_role_ids={self.role2.id})
+        UserModel.objects.filter(pk=self.other.pk).update(cached_role_ids={self.role1.id})
+
+        out = io.StringIO()
+        call_command('rebuild_user_role_ids', '--batch-size', '1', stdout=out)
+        self.assertIn('of 2 users', out.getvalue())
+        self.assertEqual({self.role1.id}, self.cached_role_ids(self.user))
+        self.assertEqual(frozenset(), self.cached_role_ids(self.other))
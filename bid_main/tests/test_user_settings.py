@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from bid_main import user_settings
+from bid_main.models import Setting, UserSetting
+
+UserModel = get_user_model()
+
+
+class UserSettingsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.newsletter = Setting.objects.create(name='newsletter', default='true')
+        self.beta = Setting.objects.create(name='beta', default='False')
+        self.users = [UserModel.objects.create_user(f'user{i}@example.com') for i in range(2)]
+        UserSetting.objects.create(user=self.users[0], setting=self.beta, unconstrained_value='1')
+
+    def test_effective_settings(self):
+        user_settings.get_definitions()
+        with self.assertNumQueries(1):
+            result = user_settings.effective_settings_many([user.id for user in self.users])
+        self.assertEqual({self.users[0].id: {'newsletter': True, 'beta': True},
+                          self.users[1].id: {'newsletter': True, 'beta': False}}, result)
+
+    def test_reload_on_change(self):
+        user_settings.get_definitions()
+        self.newsletter.default = 'false'
+        self.newsletter.save()
+        self.assertEqual({'newsletter': False, 'beta': False},
+                         user_settings.effective_settings(self.users[1].id))
+
+        self.beta.delete()
+        self.assertEqual({'newsletter': False},
+                         user_settings.effective_settings(self.users[0].id))
+
+    def test_update_settings(self):
+        user_settings.update_settings({
+            self.users[0].id: {'beta': None, 'newsletter': False},
+            self.users[1].id: {'beta': True},
+        })
+        self.assertEqual({'newsletter': False, 'beta': False},
+                         user_settings.effective_settings(self.users[0].id))
+        self.assertEqual({'newsletter': True, 'beta': True},
+                         user_settings.effective_settings(self.users[1].id))
+        self.assertEqual(2, UserSetting.objects.count())
+
+    def test_update_invalid(self):
+        with self.assertRaises(KeyError):
+            user_settings.update_settings({self.users[0].id: {'unknown': True}})
+        with self.assertRaises(ValueError):
+            user_settings.update_settings({self.users[0].id: {'beta': 'yes'}})
+        self.assertEqual({'newsletter': True, 'beta': True},
+                         user_settings.effective_settings(self.users[0].id))
+
+    def test_value_too_long(self):
+        Setting.objects.create(name='motto', data_type='text', default='')
+        user_settings.update_settings({self.users[0].id: {'motto': 'x' * 128}})
+        with self.assertRaises(ValueError):
+            user_settings.update_settings({self.users[0].id: {'motto': 'x' * 129}})
+        self.assertEqual('x' * 128, user_settings.effective_settings(self.users[0].id)['motto'])
+
+    def test_duplicate_names(self):
+        duplicate = Setting.objects.create(name='beta', default='true')
+        UserSetting.objects.create(user=self.users[1], setting=duplicate,
+                                   unconstrained_value='true')
+        with self.assertLogs('bid_main.user_settings', 'WARNING'):
+            definitions = user_settings.get_definitions()
+        self.assertEqual(self.beta.id, definitions.by_name['beta'].id)
+        self.assertNotIn(duplicate.id, definitions.by_id)
+        self.assertEqual({'newsletter': True, 'beta': False},
+                         user_settings.effective_settings(self.users[1].id))
+
+    def test_reload_when_too_old(self):
+        definitions = user_settings.get_definitions()
+        Setting.objects.filter(id=self.beta.id).update(default='true')
+        self.assertIs(definitions, user_settings.get_definitions())
+
+        with override_settings(BLENDER_ID_USER_SETTINGS_MAX_AGE=0):
+            self.assertEqual({'newsletter': True, 'beta': True},
+                             user_settings.effective_settings(self.users[1].id))
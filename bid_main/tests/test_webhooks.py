@@ -0,0 +1,153 @@
+from datetime import timedelta
+import http.server
+import io
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+import oauth2_provider.models as oa2_models
+
+from bid_main import webhooks
+from bid_main.models import Role, Webhook, WebhookEvent
+
+Application = oa2_models.get_application_model()
+UserModel = get_user_model()
+
+
+class CallbackHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.headers['X-Webhook-Signature'], body))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = http.server.HTTPServer(('127.0.0.1', 0), CallbackHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.server.requests = []
+        self.server.status = 200
+
+        owner = UserModel.objects.create_user('owner@user.com')
+        self.application = Application.objects.create(
+            name='test app', user=owner,
+            client_type=Application.CLIENT_PUBLIC,
+            authorization_grant_type=Application.GRANT_CLIENT_CREDENTIALS)
+        host, port = self.server.server_address
+        self.webhook = Webhook.objects.create(
+            application=self.application, url=f'http://{host}:{port}/hook', secret='secret')
+        self.user = UserModel.objects.create_user('test@user.com', full_name='Aap')
+
+    def tearDown(self):
+        # The webhook is rolled back, so shouldn't be cached for other tests.
+        webhooks.forget_active_webhooks()
+
+    def send(self) -> (int, int):
+        return webhooks.send_queued(batch_size=100)
+
+    def received(self) -> list:
+        payloads = []
+        for signature, body in self.server.requests:
+            self.assertEqual(webhooks.sign('secret', body), signature)
+            payloads.append(json.loads(body))
+        return payloads
+
+    def test_coalesced_changes(self):
+        self.user.full_name = 'Noot'
+        self.user.save()
+        role = Role.objects.create(name='cloud_subscriber')
+        self.user.roles.add(role)
+        self.assertEqual(3, WebhookEvent.objects.filter(user_id=self.user.id).count())
+
+        self.assertEqual((3, 0), self.send())
+        payload, = self.received()
+        change, = payload['changes']
+        self.assertEqual(self.user.id, change['id'])
+        self.assertEqual('Noot', change['full_name'])
+        self.assertEqual({'cloud_subscriber': True}, change['roles'])
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_deleted_user(self):
+        self.send()
+        user_id = self.user.id
+        self.user.delete()
+
+        self.send()
+        self.assertEqual([{'changes': [{'id': user_id, 'deleted': True}]}], self.received()[1:])
+
+    def test_inactive_webhook(self):
+        self.send()
+        self.webhook.is_active = False
+        self.webhook.save()
+
+        self.user.save()
+        self.user.full_name = 'Noot'
+        self.user.save()
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_retry(self):
+        self.server.status = 500
+        self.assertEqual((0, 1), self.send())
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(1, event.attempts)
+        self.assertIn('500', event.last_error)
+        self.assertGreater(event.next_attempt, timezone.now())
+
+        # Not due yet.
+        self.assertEqual((0, 0), self.send())
+
+        self.server.status = 200
+        WebhookEvent.objects.update(next_attempt=timezone.now() - timedelta(seconds=1))
+        call_command('send_webhooks', stdout=io.StringIO())
+        self.assertFalse(WebhookEvent.objects.exists())
+        self.assertEqual(2, len(self.received()))
+
+    def test_prune_given_up(self):
+        old = timezone.now() - timedelta(days=31)
+        pending = WebhookEvent.objects.get()
+        WebhookEvent.objects.filter(id=pending.id).update(created=old)
+        given_up = WebhookEvent.objects.create(webhook=self.webhook, user_id=self.user.id,
+                                               created=old, next_attempt=None)
+        recent = WebhookEvent.objects.create(webhook=self.webhook, user_id=self.user.id,
+                                             next_attempt=None)
+
+        call_command('prune_webhook_events', stdout=io.StringIO())
+        self.assertEqual({pending.id, recent.id},
+                         set(WebhookEvent.objects.values_list('id', flat=True)))
+        self.assertFalse(WebhookEvent.objects.filter(id=given_up.id).exists())
+
+    def test_admin(self):
+        self.server.status = 500
+        self.send()
+        event = WebhookEvent.objects.get()
+        UserModel.objects.create_superuser('admin@user.com', '123456')
+        self.client.login(email='admin@user.com', password='123456')
+
+        response = self.client.get(reverse('admin:bid_main_webhookevent_changelist'))
+        self.assertContains(response, 'field-attempts">1<')
+        response = self.client.get(reverse('admin:bid_main_webhookevent_change',
+                                           args=(event.id,)))
+        self.assertContains(response, '500')
@@ -0,0 +1,40 @@
+"""
+Tracking of when access tokens were last used.
+
+To avoid a database write on every token validation, the last-used
+timestamp of a token is only updated when it is older than
+settings.BLENDER_ID_TOKEN_LAST_USED_INTERVAL seconds, and those updates
+are buffered and written in batches.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .write_buffer import WriteBuffer
+
+
+class TokenUsageBuffer(WriteBuffer):
+    def write(self, items):
+        from .models import OAuth2AccessToken
+
+        # Using the same timestamp for the entire batch allows for a single
+        # UPDATE query; the difference is at most the buffer's max_age.
+        OAuth2AccessToken.objects \
+            .filter(id__in=list(items)) \
+            .update(last_used=max(items.values()))
+
+
+buffer = TokenUsageBuffer(max_items=settings.BLENDER_ID_TOKEN_USAGE_BUFFER_SIZE,
+                          max_age=settings.BLENDER_ID_TOKEN_USAGE_BUFFER_SECONDS)
+
+
+def record_use(token):
+    """Records that the access token was used just now."""
+
+    now = timezone.now()
+    interval = datetime.timedelta(seconds=settings.BLENDER_ID_TOKEN_LAST_USED_INTERVAL)
+    if token.last_used and now - token.last_used < interval:
+        return
+    buffer.add(token.id, now)
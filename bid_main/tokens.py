@@ -0,0 +1,148 @@
+"""
+Helpers for generating and looking up OAuth2 access tokens.
+
+Besides the opaque tokens generated by oauthlib, we support a self-describing
+token format "<id>.<secret>", where <id> is the primary key of the access
+token in the database. Such tokens can be found with a primary key lookup,
+rather than a lookup on the (much larger) secondary index on the token string.
+The secret is still compared to the stored token, in constant time.
+
+The secrets generated by oauthlib only consist of letters and digits, so the
+'.' separator can never occur in old-style tokens.
+
+Signed tokens (see bid_main.signed_tokens) contain the database ID of the
+access token as well, and are also found by primary key after their
+signature has been verified. As other services know the signing keys, they
+must also contain a hash of the database token's secret.
+"""
+
+import hmac
+import typing
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+import oauth2_provider.models as oa2_models
+import oauthlib.common
+
+from . import signed_tokens
+
+AccessToken = oa2_models.get_access_token_model()
+
+SEPARATOR = '.'
+
+
+def split_token(token: str) -> typing.Optional[int]:
+    """Returns the database ID embedded in a self-describing token.
+
+    Returns None if the token is an old-style opaque token or a signed token.
+    """
+    if not token or token.count(SEPARATOR) != 1:
+        return None
+    token_id, _ = token.split(SEPARATOR, 1)
+    if not token_id.isdigit():
+        return None
+    return int(token_id)
+
+
+@transaction.atomic()
+def create_access_token(*, self_describing: bool, **fields) -> AccessToken:
+    """Creates and saves an access token with a newly generated secret.
+
+    :param self_describing: when True, the token is generated in the
+        "<id>.<secret>" format. This requires an extra UPDATE query,
+        as the ID is only known after the token has been inserted.
+    :param fields: passed to the AccessToken constructor.
+    """
+    secret = oauthlib.common.generate_token()
+    token = AccessToken(token=secret, **fields)
+    token.save()
+
+    if self_describing:
+        token.token = f'{token.id}{SEPARATOR}{secret}'
+        token.save(update_fields=['token'])
+
+    return token
+
+
+def find_access_token(token: str, queryset: QuerySet = None) -> AccessToken:
+    """Finds an access token in the database.
+
+    Self-describing and signed tokens are found by primary key, other tokens
+    by their token string.
+
+    :raises AccessToken.DoesNotExist: when the token cannot be found.
+    """
+    if queryset is None:
+        queryset = AccessToken.objects.all()
+
+    if signed_tokens.is_signed_token(token):
+        try:
+            claims = signed_tokens.verify(token)
+            token_id = int(claims['jti'])
+        except (signed_tokens.InvalidSignedToken, KeyError, TypeError, ValueError) as ex:
+            raise AccessToken.DoesNotExist(f'Invalid signed token: {ex}')
+        db_token = queryset.get(id=token_id)
+        if not signed_tokens.matches_access_token(claims, db_token):
+            raise AccessToken.DoesNotExist('Signed token was not issued for this access token.')
+        return db_token
+
+    token_id = split_token(token)
+    if token_id is None:
+        return queryset.get(token=token)
+
+    db_token = queryset.get(id=token_id)
+    if not hmac.compare_digest(db_token.token.encode(), token.encode()):
+        raise AccessToken.DoesNotExist('Access token secret does not match.')
+    return db_token
+
+
+def record_revocations(queryset: QuerySet) -> int:
+    """Records the unexpired access tokens in the queryset in the revocation log.
+
+    Call this before deleting the tokens. Returns the number of recorded tokens.
+    """
+    from .models import TokenRevocation
+
+    now = timezone.now()
+    unexpired = queryset.filter(expires__gt=now).only('id', 'token', 'user_id')
+    revocations = [TokenRevocation.for_token(token, revoked_at=now) for token in unexpired]
+    TokenRevocation.objects.bulk_create(revocations)
+    return len(revocations)
+
+
+@transaction.atomic()
+def delete_access_tokens(queryset: QuerySet) -> int:
+    """Deletes the access tokens in the queryset, recording their revocation.
+
+    Returns the number of deleted tokens.
+    """
+    record_revocations(queryset)
+    count, _ = queryset.delete()
+    return count
+
+
+def revoke_access_tokens(queryset: QuerySet, *, batch_size: int = 1000,
+                         progress: typing.Callable[[int], None] = None,
+                         on_revoke: typing.Callable[[typing.List[int]], None] = None) -> int:
+    """Deletes the access tokens in the queryset, in batches.
+
+    Each batch is deleted in its own transaction, so that revoking many
+    tokens doesn't lock them all at once. Returns the number of revoked
+    tokens; 'progress' is called with the running total after each batch,
+    and 'on_revoke' with the IDs of each batch, in its transaction.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            delete_access_tokens(AccessToken.objects.filter(id__in=ids))
+            if on_revoke is not None:
+                on_revoke(ids)
+        total += len(ids)
+        if progress is not None:
+            progress(total)
+    return total
@@ -0,0 +1,88 @@
+"""
+Cache of User objects, to avoid a database query on every authenticated request.
+
+Cached users are versioned by their last_update field. Every save of a user
+stores its new last_update as the current version in the cache, so that
+cached copies of older versions are ignored, even when another process
+caches a stale copy it read just before the save.
+
+Changes that do not save the user, such as QuerySet.update(), should call
+invalidate() themselves.
+
+Caching is off unless settings.BLENDER_ID_USER_CACHE_SECONDS is set. It
+requires a cache that is shared between all processes (such as memcached);
+with a per-process cache, invalidation only reaches the process that made
+the change. See bid_main.checks.
+"""
+
+import datetime
+import typing
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+KEY_PREFIX = 'bid_main.user_cache'
+
+
+def _user_key(user_id) -> str:
+    return f'{KEY_PREFIX}:user:{user_id}'
+
+
+def _version_key(user_id) -> str:
+    return f'{KEY_PREFIX}:version:{user_id}'
+
+
+def is_enabled() -> bool:
+    return settings.BLENDER_ID_USER_CACHE_SECONDS > 0
+
+
+def get_user(user_id):
+    """Returns the user with the given ID, from the cache if possible.
+
+    :raises User.DoesNotExist: when the user does not exist.
+    """
+    if not is_enabled():
+        return get_user_model().objects.get(pk=user_id)
+
+    user_key = _user_key(user_id)
+    version_key = _version_key(user_id)
+    timeout = settings.BLENDER_ID_USER_CACHE_SECONDS
+
+    cached = cache.get_many([user_key, version_key])
+    user = cached.get(user_key)
+    version = cached.get(version_key)
+    if user is not None and version is not None and user.last_update == version:
+        return user
+
+    user = get_user_model().objects.get(pk=user_id)
+    if version is None and cache.add(version_key, user.last_update, timeout):
+        version = user.last_update
+    if version == user.last_update:
+        cache.set(user_key, user, timeout)
+    return user
+
+
+def invalidate(user_id, last_update: typing.Optional[datetime.datetime]):
+    """Invalidates the cached user.
+
+    :param last_update: the user's new last_update, or None when the user
+        was deleted.
+    """
+    if not is_enabled():
+        return
+    if last_update is None:
+        cache.delete_many([_user_key(user_id), _version_key(user_id)])
+        return
+    cache.set(_version_key(user_id), last_update, settings.BLENDER_ID_USER_CACHE_SECONDS)
+    cache.delete(_user_key(user_id))
+
+
+def invalidate_many(user_ids: typing.Iterable[int], last_update: datetime.datetime):
+    """Invalidates the cached users, which all got the same new last_update."""
+    if not is_enabled():
+        return
+    user_ids = list(user_ids)
+    cache.set_many({_version_key(user_id): last_update for user_id in user_ids},
+                   settings.BLENDER_ID_USER_CACHE_SECONDS)
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
@@ -0,0 +1,169 @@
+"""
+Effective user settings.
+
+A user's effective settings are the defaults of all settings, overridden
+by the user's own values (UserSetting). Values are converted according to
+the setting's data type.
+
+Every process keeps all settings in memory, see bid_main.versioned_registry,
+so resolving the settings of any number of users takes one query.
+"""
+
+import logging
+import typing
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import versioned_registry
+
+log = logging.getLogger(__name__)
+VERSION_KEY = 'bid_main.user_settings:version'
+
+
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in {'true', 't', 'yes', 'y', 'on', '1'}
+
+
+def _format_bool(value) -> str:
+    if not isinstance(value, bool):
+        raise ValueError('expected true or false')
+    return 'true' if value else 'false'
+
+
+# Per data type, functions to convert stored values to Python and back.
+DATA_TYPES = {
+    'bool': (_parse_bool, _format_bool),
+}
+
+
+def parse(data_type: str, value: str):
+    """Converts a stored value to the setting's data type."""
+    if data_type not in DATA_TYPES:
+        return value
+    return DATA_TYPES[data_type][0](value)
+
+
+def format_value(data_type: str, value) -> str:
+    """Converts a value to its stored form.
+
+    :raises ValueError: when the value doesn't match the data type, or is too long.
+    """
+    from .models import UserSetting
+
+    if data_type not in DATA_TYPES:
+        formatted = str(value)
+    else:
+        formatted = DATA_TYPES[data_type][1](value)
+    max_length = UserSetting._meta.get_field('unconstrained_value').max_length
+    if len(formatted) > max_length:
+        raise ValueError(f'longer than {max_length} characters')
+    return formatted
+
+
+class SettingInfo(typing.NamedTuple):
+    id: int
+    name: str
+    data_type: str
+    default: typing.Any
+
+
+class Definitions:
+    def __init__(self, settings: typing.Iterable[SettingInfo]):
+        # Setting names are not unique in the database; the setting with the
+        # lowest ID wins, and the others are ignored.
+        self.by_name = {}
+        for setting in sorted(settings, key=lambda setting: setting.id):
+            if setting.name in self.by_name:
+                log.warning('Ignoring setting %d, as setting %d has the same name %r',
+                            setting.id, self.by_name[setting.name].id, setting.name)
+                continue
+            self.by_name[setting.name] = setting
+        self.by_id = {setting.id: setting for setting in self.by_name.values()}
+
+    def defaults(self) -> typing.Dict[str, typing.Any]:
+        return {setting.name: setting.default for setting in self.by_id.values()}
+
+
+def load() -> Definitions:
+    from .models import Setting
+
+    settings = [SettingInfo(id=setting_id, name=name, data_type=data_type,
+                            default=parse(data_type, default))
+                for setting_id, name, data_type, default
+                in Setting.objects.values_list('id', 'name', 'data_type', 'default')]
+    return Definitions(settings)
+
+
+_definitions = versioned_registry.VersionedRegistry(
+    VERSION_KEY, load, 'BLENDER_ID_USER_SETTINGS_MAX_AGE')
+
+
+def bump_version():
+    """Makes all processes reload the settings."""
+    _definitions.bump_version()
+
+
+def get_definitions() -> Definitions:
+    """Returns the settings, reloading them when they are outdated or too old."""
+    return _definitions.get()
+
+
+def effective_settings_many(user_ids: typing.Iterable[int]) \
+        -> typing.Dict[int, typing.Dict[str, typing.Any]]:
+    """Returns the effective settings by user ID.
+
+    Unknown user IDs get the defaults.
+    """
+    from .models import UserSetting
+
+    definitions = get_definitions()
+    result = {user_id: definitions.defaults() for user_id in user_ids}
+    if not result:
+        return result
+
+    overrides = UserSetting.objects.filter(user_id__in=result) \
+        .order_by('id').values_list('user_id', 'setting_id', 'unconstrained_value')
+    for user_id, setting_id, value in overrides:
+        setting = definitions.by_id.get(setting_id)
+        if setting is None:
+            # Created after the definitions were loaded.
+            continue
+        result[user_id][setting.name] = parse(setting.data_type, value)
+    return result
+
+
+def effective_settings(user_id: int) -> typing.Dict[str, typing.Any]:
+    """Returns the user's settings: the defaults, overridden by the user's values."""
+    return effective_settings_many([user_id])[user_id]
+
+
+@transaction.atomic()
+def update_settings(changes: typing.Dict[int, typing.Dict[str, typing.Any]]):
+    """Sets the given settings of the given users.
+
+    A value of None removes the user's own value, so that the default applies.
+
+    :raises KeyError: for unknown setting names.
+    :raises ValueError: for values that don't match the setting's data type.
+    """
+    from .models import UserSetting
+
+    definitions = get_definitions()
+    to_delete = Q()
+    to_create = []
+    for user_id, values in changes.items():
+        setting_ids = []
+        for name, value in values.items():
+            setting = definitions.by_name[name]
+            setting_ids.append(setting.id)
+            if value is not None:
+                to_create.append(UserSetting(
+                    user_id=user_id, setting_id=setting.id,
+                    unconstrained_value=format_value(setting.data_type, value)))
+        if setting_ids:
+            to_delete |= Q(user_id=user_id, setting_id__in=setting_ids)
+
+    if to_delete:
+        UserSetting.objects.filter(to_delete).delete()
+    UserSetting.objects.bulk_create(to_create)
@@ -0,0 +1,72 @@
+"""
+Process-wide, in-memory copies of small tables that rarely change.
+
+Every process keeps the loaded data in memory, instead of querying it on
+every request. The data is stamped with a version from the cache; changes
+store a new version (see bid_main.signals), upon which every process
+reloads the data the next time it is used.
+
+The version only reaches other processes through a cache that is shared
+between them (such as memcached). To bound the staleness otherwise, the
+data is also reloaded once it is older than a maximum age.
+"""
+
+import threading
+import time
+import typing
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+T = typing.TypeVar('T')
+
+
+class VersionedRegistry(typing.Generic[T]):
+    """Data returned by 'load', reloaded when its version changes or it gets too old.
+
+    'max_age_setting' is the name of the setting holding the maximum age in
+    seconds.
+    """
+
+    def __init__(self, version_key: str, load: typing.Callable[[], T], max_age_setting: str):
+        self.version_key = version_key
+        self.load = load
+        self.max_age_setting = max_age_setting
+        self._lock = threading.Lock()
+        # (version, time.monotonic() when loaded, data)
+        self._loaded: typing.Optional[typing.Tuple[str, float, T]] = None
+
+    def current_version(self) -> str:
+        version = cache.get(self.version_key)
+        if version is None:
+            new_version = uuid.uuid4().hex
+            cache.add(self.version_key, new_version, None)
+            # Without a working cache every call gets a new version, and reloads.
+            version = cache.get(self.version_key) or new_version
+        return version
+
+    def bump_version(self):
+        """Makes all processes reload the data."""
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+
+    def _is_current(self, loaded, version: str) -> bool:
+        if loaded is None:
+            return False
+        loaded_version, loaded_at, _ = loaded
+        max_age = getattr(settings, self.max_age_setting)
+        return loaded_version == version and time.monotonic() - loaded_at < max_age
+
+    def get(self) -> T:
+        """Returns the data, reloading it when it is outdated or too old."""
+        # The version is read before loading, so that changes made while
+        # loading cause another reload.
+        version = self.current_version()
+        loaded = self._loaded
+        if self._is_current(loaded, version):
+            return loaded[2]
+
+        with self._lock:
+            if not self._is_current(self._loaded, version):
+                self._loaded = (version, time.monotonic(), self.load())
+            return self._loaded[2]
@@ -1,10 +1,9 @@
 import logging
 
-from django.db import transaction
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
 from django.conf import settings
 from django.contrib.auth import views as auth_views
-from django.contrib.auth.forms import PasswordResetForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpResponseRedirect
 from django.shortcuts import redirect
@@ -17,7 +16,7 @@ from django.views.generic.edit import UpdateView
 import oauth2_provider.models as oauth2_models
 import loginas.utils
 
-from . import forms
+from . import forms, tokens
 from .models import User
 
 
@@ -87,25 +86,26 @@ class RegistrationView(CreateView):
         return super().post(request, *args, **kwargs)
 
     def form_valid(self, form):
-        obj = form.save(commit=False)
-        obj.set_password(User.objects.make_random_password())
-        obj.save()
-
-        # This form only requires the "email" field, so will validate.
-        reset_form = PasswordResetForm(self.request.POST)
-        reset_form.is_valid()  # Must trigger validation
-
-        # Copied from django/contrib/auth/views.py : password_reset
-        opts = {
-            'use_https': self.request.is_secure(),
-            'email_template_name': 'registration/email_verification.txt',
-            'html_email_template_name': 'registration/email_verification.html',
-            'subject_template_name': 'registration/email_verification_subject.txt',
-            'request': self.request,
-            # 'html_email_template_name': provide an HTML content template if you desire.
-        }
-        # This form sends the email on save()
-        reset_form.save(**opts)
+        # The user sets their password through the link in the verification
+        # email, so don't spend time hashing a random one.
+        user = form.save(commit=False)
+        user.set_unusable_password()
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            # The unique index on the email address is our duplicate check.
+            form.add_email_exists_error()
+            return self.form_invalid(form)
+
+        forms.PasswordResetForm().send_to_user(
+            user,
+            use_https=self.request.is_secure(),
+            email_template_name='registration/email_verification.txt',
+            html_email_template_name='registration/email_verification.html',
+            subject_template_name='registration/email_verification_subject.txt',
+            request=self.request,
+        )
 
         return redirect('bid_main:register-done')
 
@@ -174,11 +174,13 @@ class ApplicationTokenView(PageIdMixin, LoginRequiredMixin, FormView):
 
         tokens_per_app = list(request.user.bid_main_oauth2accesstoken
                               .values('application')
-                              .annotate(Count('id'))
+                              .annotate(Count('id'), last_used=Max('last_used'))
                               .order_by())
-        app_ids = {tpa['application'] for tpa in tokens_per_app}
+        last_used = {tpa['application']: tpa['last_used'] for tpa in tokens_per_app}
         app_model = oauth2_models.get_application_model()
-        apps = app_model.objects.filter(id__in=app_ids).order_by('name')
+        apps = list(app_model.objects.filter(id__in=last_used.keys()).order_by('name'))
+        for app in apps:
+            app.last_used = last_used[app.id]
 
         ctx['apps'] = apps
 
@@ -194,7 +196,7 @@ class ApplicationTokenView(PageIdMixin, LoginRequiredMixin, FormView):
         gr_model = oauth2_models.get_grant_model()
 
         rt_model.objects.filter(user=user, application=app_id).delete()
-        at_model.objects.filter(user=user, application=app_id).delete()
+        tokens.delete_access_tokens(at_model.objects.filter(user=user, application=app_id))
         gr_model.objects.filter(user=user, application=app_id).delete()
 
         return super().form_valid(form)
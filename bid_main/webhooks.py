@@ -0,0 +1,151 @@
+"""
+Webhooks notifying applications of changes to users.
+
+Saving a user, changing their roles, or deleting them records a
+WebhookEvent for every active webhook, in the same transaction as the
+change. The send_webhooks management command delivers those events in
+batches; multiple events for the same user are sent as one change, with
+the user's info at the time of delivery.
+
+Every delivery is a POST with a JSON body like:
+
+    {"changes": [
+        {"id": 1, "full_name": "...", "email": "...", "is_active": true,
+         "roles": {"cloud_subscriber": true}, "last_update": "..."},
+        {"id": 2, "deleted": true}
+    ]}
+
+The X-Webhook-Signature header contains the hex-encoded HMAC-SHA256 of the
+body, keyed with the webhook's secret. Failed deliveries are retried with
+exponential backoff. Events that were given up on are kept for inspection in
+the admin, until they are removed by the prune_webhook_events management
+command.
+"""
+
+import datetime
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+import requests
+
+log = logging.getLogger(__name__)
+
+ACTIVE_WEBHOOKS_CACHE_KEY = 'bid_main.webhooks:active'
+
+
+def active_webhook_ids() -> typing.List[int]:
+    """Returns the IDs of the active webhooks, from the cache if possible."""
+    from .models import Webhook
+
+    webhook_ids = cache.get(ACTIVE_WEBHOOKS_CACHE_KEY)
+    if webhook_ids is None:
+        webhook_ids = list(Webhook.objects.filter(is_active=True).values_list('id', flat=True))
+        cache.set(ACTIVE_WEBHOOKS_CACHE_KEY, webhook_ids, 300)
+    return webhook_ids
+
+
+def forget_active_webhooks():
+    cache.delete(ACTIVE_WEBHOOKS_CACHE_KEY)
+
+
+def enqueue_user_changes(user_ids: typing.Iterable[int]):
+    """Records changes of the users for all active webhooks."""
+    from .models import WebhookEvent
+
+    webhook_ids = active_webhook_ids()
+    if not webhook_ids:
+        return
+    WebhookEvent.objects.bulk_create(
+        WebhookEvent(webhook_id=webhook_id, user_id=user_id)
+        for webhook_id, user_id in itertools.product(webhook_ids, set(user_ids)))
+
+
+def sign(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    """Returns the delay before retrying after this many failed attempts."""
+    return datetime.timedelta(
+        seconds=settings.BLENDER_ID_WEBHOOK_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def user_changes(user_ids: typing.Set[int]) -> typing.List[dict]:
+    """Returns the current info of the users, for sending to webhooks."""
+    from .models import User
+
+    users = User.objects.filter(id__in=user_ids)
+    changes = [{
+        'id': user.id,
+        'full_name': user.get_full_name(),
+        'email': user.email,
+        'is_active': user.is_active,
+        'roles': user.public_roles(),
+        'last_update': user.last_update,
+    } for user in users]
+
+    deleted_ids = user_ids - {change['id'] for change in changes}
+    changes.extend({'id': user_id, 'deleted': True} for user_id in sorted(deleted_ids))
+    return changes
+
+
+def deliver(webhook, events: list, session: requests.Session) -> bool:
+    """Sends the events to the webhook, returns whether this was successful."""
+    from .models import WebhookEvent
+
+    body = json.dumps({'changes': user_changes({event.user_id for event in events})},
+                      cls=DjangoJSONEncoder).encode()
+    event_ids = [event.id for event in events]
+    try:
+        response = session.post(webhook.url, data=body,
+                                headers={'Content-Type': 'application/json',
+                                         'X-Webhook-Signature': sign(webhook.secret, body)},
+                                timeout=settings.BLENDER_ID_WEBHOOK_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as ex:
+        log.warning('Error delivering %d events to %s: %s', len(events), webhook, ex)
+        # Events of one batch are retried together, so they share their attempts.
+        attempts = max(event.attempts for event in events) + 1
+        if attempts >= settings.BLENDER_ID_WEBHOOK_MAX_ATTEMPTS:
+            log.error('Giving up on delivering %d events to %s', len(events), webhook)
+            next_attempt = None
+        else:
+            next_attempt = timezone.now() + retry_delay(attempts)
+        WebhookEvent.objects.filter(id__in=event_ids).update(
+            attempts=attempts, next_attempt=next_attempt, last_error=str(ex))
+        return False
+
+    WebhookEvent.objects.filter(id__in=event_ids).delete()
+    return True
+
+
+def send_queued(batch_size: int) -> typing.Tuple[int, int]:
+    """Delivers due events, at most batch_size per webhook.
+
+    Only run this in one process at a time, as events are not locked.
+
+    :returns: the number of delivered and failed events.
+    """
+    from .models import Webhook, WebhookEvent
+
+    delivered = failed = 0
+    with requests.Session() as session:
+        for webhook in Webhook.objects.filter(is_active=True):
+            events = list(WebhookEvent.objects
+                          .filter(webhook=webhook, next_attempt__lte=timezone.now())
+                          .order_by('id')[:batch_size])
+            if not events:
+                continue
+            if deliver(webhook, events, session):
+                delivered += len(events)
+            else:
+                failed += len(events)
+    return delivered, failed
@@ -0,0 +1,105 @@
+"""
+Buffering of database writes.
+
+Some writes are not important enough to perform on every request, such as
+bookkeeping of when something was last used. Such writes can be collected
+in a WriteBuffer, which writes them to the database in batches.
+
+The buffer is only written at the end of a request (after the response has
+been sent, outside of the request's transaction) when it is due, when the
+process exits normally, and when flush() is called explicitly. There is no
+timer: a process that handles no requests keeps its pending writes until it
+handles one, and loses them when it is killed.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import typing
+
+from django.core.signals import request_finished
+from django.db import connection
+
+log = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """Collects pending writes per key, and flushes them in batches.
+
+    The buffer is due for flushing when it contains max_items keys, or when
+    the oldest pending write is older than max_age seconds. Subclasses should
+    implement write(), and can implement merge() to combine multiple writes
+    for the same key.
+    """
+
+    def __init__(self, *, max_items: int, max_age: float):
+        self.max_items = max_items
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._items = {}
+        self._oldest = 0.0
+        self._database_name = None
+        atexit.register(self._flush_at_exit)
+        request_finished.connect(self._flush_if_due, weak=False,
+                                 dispatch_uid=f'{__name__}.{id(self)}')
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def add(self, key, value):
+        """Adds a pending write; it is written when the buffer is flushed."""
+
+        with self._lock:
+            if not self._items:
+                self._oldest = time.monotonic()
+                self._database_name = connection.settings_dict['NAME']
+            if key in self._items:
+                value = self.merge(self._items[key], value)
+            self._items[key] = value
+
+    def is_due(self) -> bool:
+        with self._lock:
+            return bool(self._items) and (len(self._items) >= self.max_items or
+                                          time.monotonic() - self._oldest >= self.max_age)
+
+    def flush(self):
+        """Writes all pending writes to the database."""
+
+        with self._lock:
+            items, self._items = self._items, {}
+        if items:
+            self.write(items)
+
+    def merge(self, pending, value):
+        """Combines a pending write with a new one for the same key.
+
+        The default implementation just keeps the new value.
+        """
+        return value
+
+    def write(self, items: typing.Dict[typing.Any, typing.Any]):
+        raise NotImplementedError()
+
+    def _flush_if_due(self, **kwargs):
+        if self.is_due():
+            # A failing write shouldn't break the request that happened to trigger it.
+            self._flush_quietly()
+
+    def _flush_at_exit(self):
+        # The database the writes were meant for can be gone by now; a test
+        # run, for example, has destroyed its test database.
+        if self._items and connection.settings_dict['NAME'] != self._database_name:
+            log.debug('Discarding %d pending writes of %s, as their database is gone',
+                      len(self._items), type(self).__name__)
+            return
+        self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            log.exception('Error flushing %s', type(self).__name__)
@@ -10,6 +10,8 @@ from blenderid.common_settings import *
 DEBUG = True
 BLENDER_ID_ADDON_CLIENT_ID = 'SPECIAL-SNOWFLAKE-57'
 DEFAULT_FROM_EMAIL = 'webmaster@localhost'
+# Email is sent by './manage.py send_queued_email'; this shows it on the console instead.
+BLENDER_ID_EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # Update this to something unique for your machine.
 # This was generated using "pwgen -sync 64"
@@ -33,6 +35,15 @@ DATABASES = {
     # },
 }
 
+# Sessions are cached, so in production use a cache that is shared between
+# processes, for example:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+#         'LOCATION': '127.0.0.1:11211',
+#     }
+# }
+
 
 LOGGING = {
     'version': 1,
@@ -55,6 +55,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'bid_main.audit.AuditLogMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'oauth2_provider.middleware.OAuth2TokenMiddleware',
@@ -62,9 +63,24 @@ MIDDLEWARE = [
 
 AUTHENTICATION_BACKENDS = [
     'oauth2_provider.backends.OAuth2Backend',
+    'bid_main.backends.CachingModelBackend',
+    # Sessions store the name of the backend they were created with, so
+    # removing this would log out everybody who logged in before it was
+    # replaced by CachingModelBackend.
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Number of seconds users are cached for, see bid_main.user_cache. Caching is
+# off when this is 0; enabling it requires CACHES to use a cache that is
+# shared between all processes, such as memcached or Redis.
+BLENDER_ID_USER_CACHE_SECONDS = 0
+
+# Every process keeps the roles and settings in memory, see
+# bid_main.versioned_registry. Changes reach other processes through the cache,
+# and otherwise after this many seconds.
+BLENDER_ID_ROLE_REGISTRY_MAX_AGE = 60
+BLENDER_ID_USER_SETTINGS_MAX_AGE = 60
+
 ROOT_URLCONF = 'blenderid.urls'
 
 TEMPLATES = [
@@ -143,6 +159,35 @@ STATIC_ROOT = BASE_DIR / 'static'
 
 BLENDER_ID_ADDON_CLIENT_ID = '-secret-'
 
+# When True, tokens created for the Blender ID add-on and subclients use the
+# "<id>.<secret>" format, which can be validated with a primary key lookup.
+# Tokens in the old format remain valid either way.
+BLENDER_ID_ADDON_SELF_DESCRIBING_TOKENS = False
+
+# Keys for signing access tokens, as {key ID: secret}. Clients can request
+# such tokens, which other services can verify without calling Blender ID.
+# See bid_main/signed_tokens.py for how to rotate keys.
+BLENDER_ID_TOKEN_SIGNING_KEYS = {}
+# ID of the key to sign new tokens with. Leave empty to disable signed tokens.
+BLENDER_ID_TOKEN_SIGNING_KEY_ID = ''
+
+# Maximum number of seconds that services may cache token introspection results.
+BLENDER_ID_INTROSPECTION_MAX_AGE = 300
+
+# The last-used timestamp of access tokens is updated at most once per this
+# many seconds. Updates are buffered in memory, and written at the end of a
+# request when there are this many tokens in the buffer, or when the buffer is
+# this many seconds old. See bid_main.write_buffer.
+BLENDER_ID_TOKEN_LAST_USED_INTERVAL = 600
+BLENDER_ID_TOKEN_USAGE_BUFFER_SIZE = 200
+BLENDER_ID_TOKEN_USAGE_BUFFER_SECONDS = 60
+
+# Login bookkeeping (last login, IP addresses, login count) of users is
+# buffered like token usage, unless the mode is set to 'sync'.
+BLENDER_ID_LOGIN_STATS_MODE = 'buffered'
+BLENDER_ID_LOGIN_STATS_BUFFER_SIZE = 100
+BLENDER_ID_LOGIN_STATS_BUFFER_SECONDS = 10
+
 # Defining one of those means you have to define them all.
 OAUTH2_PROVIDER_ACCESS_TOKEN_MODEL = 'bid_main.OAuth2AccessToken'
 OAUTH2_PROVIDER_REFRESH_TOKEN_MODEL = 'bid_main.OAuth2RefreshToken'
@@ -160,6 +205,7 @@ OAUTH2_PROVIDER = {
     'ACCESS_TOKEN_MODEL': OAUTH2_PROVIDER_ACCESS_TOKEN_MODEL,
     'REFRESH_TOKEN_MODEL': OAUTH2_PROVIDER_REFRESH_TOKEN_MODEL,
     'APPLICATION_MODEL': OAUTH2_PROVIDER_APPLICATION_MODEL,
+    'OAUTH2_VALIDATOR_CLASS': 'bid_main.oauth2_validators.OAuth2Validator',
 }
 
 # This is required for compatibility with Blender Cloud, as it performs
@@ -190,3 +236,49 @@ NEXT_REDIR_AFTER_LOGIN_ALLOWED_HOSTS = {
 }
 
 CSRF_FAILURE_VIEW = 'bid_main.views.csrf_failure'
+
+# The feed of changed users only returns changes older than this many seconds,
+# so that it doesn't skip changes of transactions that are still running.
+BLENDER_ID_USER_CHANGES_SETTLE_SECONDS = 10
+
+# Likewise for the feed of revoked tokens, whose cursor is an auto-increment ID.
+BLENDER_ID_REVOCATIONS_SETTLE_SECONDS = 10
+
+# Webhooks are called by the send_webhooks management command. Failed calls
+# are retried after the retry delay, which doubles on every attempt.
+BLENDER_ID_WEBHOOK_TIMEOUT = 10
+BLENDER_ID_WEBHOOK_MAX_ATTEMPTS = 10
+BLENDER_ID_WEBHOOK_RETRY_SECONDS = 60
+
+# Admin pages of large tables show the database's estimate of the table size
+# instead of counting rows, when there are more than this many. Other counts
+# are cached for this many seconds.
+BLENDER_ID_ADMIN_EXACT_COUNT_LIMIT = 10000
+BLENDER_ID_ADMIN_COUNT_CACHE_SECONDS = 300
+# The number of users per role, group and flag shown in the user admin filters
+# are cached this long; refresh them with the refresh_admin_facets command.
+# They are only shown when the command and the web server share the cache.
+BLENDER_ID_ADMIN_FACET_CACHE_SECONDS = 3600
+
+# How audit log entries (as shown in the admin history) are written; either
+# 'sync' or 'buffered'. Buffered entries are lost when a process is killed.
+# See bid_main.audit for details.
+BLENDER_ID_AUDIT_LOG_MODE = 'sync'
+BLENDER_ID_AUDIT_LOG_BUFFER_SIZE = 100
+BLENDER_ID_AUDIT_LOG_BUFFER_SECONDS = 10
+
+# Email is stored in an outbox, and sent by the send_queued_email management
+# command through the delivery backend. Failed messages are retried after the
+# retry delay, which doubles on every attempt.
+EMAIL_BACKEND = 'bid_main.email.OutboxEmailBackend'
+BLENDER_ID_EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+BLENDER_ID_EMAIL_MAX_ATTEMPTS = 6
+BLENDER_ID_EMAIL_RETRY_SECONDS = 60
+
+# Set SESSION_ENGINE = 'bid_main.session_backend' in settings.py to cache
+# sessions, and only write them to the database when they change. This
+# requires CACHES to use a cache that is shared between all processes, such as
+# memcached or Redis: with a per-process cache, a logout in one process leaves
+# the session valid in the others. With that engine, the expiry date in the
+# database is only refreshed when it lags more than this many seconds behind.
+BLENDER_ID_SESSION_EXPIRY_REFRESH_SECONDS = 3600 * 24